@@ -0,0 +1,118 @@
+"""
+أدوات التخزين المؤقت لخدمة الشكاوى - منصة نائبك.كوم
+مفاتيح بإصدار لكل نطاق مستخدم (مواطن / نائب / أدمن): أي تعديل على شكوى يرفع إصدار
+نطاقات أصحابها فتصبح القوائم والتفاصيل والإحصائيات المخزنة لها قديمة دون حذفها
+"""
+
+import threading
+import time
+from django.core.cache import cache, caches
+from django.db import transaction
+
+
+VERSION_PREFIX = 'complaints:version:'
+
+# نطاق عام يدخل إصداره في كل المفاتيح (لإبطال كل النطاقات معاً)
+GLOBAL_SCOPE = 'all'
+ADMIN_SCOPE = 'admin'
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+
+def get_user_scope(user):
+    """تحديد نطاق المستخدم (مواطن / نائب / أدمن) كما في ComplaintViewSet.get_queryset"""
+    user_type = getattr(user, 'user_type', None)
+
+    if user_type == 'citizen':
+        return f'citizen:{user.id}'
+
+    if user_type == 'representative':
+        return f'representative:{user.id}'
+
+    return ADMIN_SCOPE
+
+
+def version_key(scope):
+    return f'{VERSION_PREFIX}{scope}'
+
+
+def _initial_version():
+    # إصدار يبدأ من الوقت الحالي: فقدان المفتاح (إخراجه من الذاكرة) لا يعيد إصداراً قديماً
+    return int(time.time() * 1000)
+
+
+def get_scope_version(scope):
+    """الإصدار الحالي للنطاق (مع إصدار النطاق العام) بطلب واحد للتخزين"""
+    keys = [version_key(GLOBAL_SCOPE), version_key(scope)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key, 0)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def scoped_key(namespace, scope, *parts):
+    """مفتاح بإصدار النطاق الحالي: complaints:<namespace>:<scope>:<version>:<parts>"""
+    return ':'.join(['complaints', namespace, scope, get_scope_version(scope), *map(str, parts)])
+
+
+def _bump(scopes):
+    for scope in scopes:
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.add(version_key(scope), _initial_version(), timeout=None)
+
+
+def bump_scope_versions(citizen_ids=(), representative_ids=()):
+    """
+    إبطال النطاقات المتأثرة بتعديل شكاوى: مواطنوها ونوابها والأدمن
+
+    الإبطال يتم فوراً ومرة أخرى بعد نجاح المعاملة، حتى لا يُخزن عامل آخر نسخة
+    قرأها قبل نجاحها تحت الإصدار الجديد
+    """
+    scopes = {ADMIN_SCOPE}
+    scopes.update(f'citizen:{citizen_id}' for citizen_id in citizen_ids if citizen_id is not None)
+    scopes.update(
+        f'representative:{representative_id}'
+        for representative_id in representative_ids if representative_id is not None
+    )
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def bump_all_versions():
+    """إبطال جميع النطاقات (تعديلات مجمّعة أو بيانات مشتركة مثل التصنيفات)"""
+    _bump([GLOBAL_SCOPE])
+    transaction.on_commit(lambda: _bump([GLOBAL_SCOPE]))
+
+
+def record_cache_access(namespace, hit):
+    """عدادات القراءة من التخزين المؤقت لكل نوع بيانات (داخل العملية)"""
+    with _metrics_lock:
+        counters = _metrics.setdefault(namespace, {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+
+
+def get_cache_metrics():
+    """نسبة القراءة من التخزين المؤقت لكل نوع بيانات، ولكل طبقة في التخزين ذي الطبقتين"""
+    with _metrics_lock:
+        namespaces = {
+            namespace: {
+                **counters,
+                'hit_ratio': round(counters['hits'] / (counters['hits'] + counters['misses']), 3),
+            }
+            for namespace, counters in _metrics.items()
+        }
+    backend = caches['default']
+    metrics = {'backend': type(backend).__name__, 'namespaces': namespaces}
+    if hasattr(backend, 'stats'):
+        metrics['tiers'] = backend.stats()
+    return metrics
+
+
+def reset_cache_metrics():
+    with _metrics_lock:
+        _metrics.clear()
@@ -0,0 +1,139 @@
+"""
+واجهة تخزين مؤقت بطبقتين - منصة نائبك.كوم
+طبقة محلية داخل العملية بمدة قصيرة أمام طبقة مشتركة (Redis) بين العمال
+"""
+
+import threading
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+
+class TieredCache(BaseCache):
+    """
+    القراءة من الطبقة المحلية ثم المشتركة (مع نسخ القيمة محلياً لمدة LOCAL_TIMEOUT)،
+    والكتابة والحذف في الطبقتين
+
+    العمليات الذرية (add, incr, decr) تتم في الطبقة المشتركة فقط حتى تبقى الأقفال والعدادات
+    موحدة بين العمال، وكذلك المفاتيح التي تبدأ بأحد SHARED_ONLY_PREFIXES (أرقام الإصدارات).
+    حذف مفتاح من عامل آخر لا يصل للنسخ المحلية، لذا تبقى مدتها قصيرة
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.local_alias = options.get('LOCAL', 'local')
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.shared_only_prefixes = tuple(options.get('SHARED_ONLY_PREFIXES', ()))
+        self.lock = threading.Lock()
+        self.hits = {'local': 0, 'shared': 0}
+        self.misses = 0
+
+    @cached_property
+    def local(self):
+        return caches[self.local_alias]
+
+    @cached_property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return not key.startswith(self.shared_only_prefixes)
+
+    def local_timeout_for(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return self.local_timeout if timeout is None else min(self.local_timeout, timeout)
+
+    def record(self, tier, count=1):
+        with self.lock:
+            if tier is None:
+                self.misses += count
+            else:
+                self.hits[tier] += count
+
+    def stats(self):
+        """عدد القراءات من كل طبقة والقراءات الفائتة (داخل العملية)"""
+        with self.lock:
+            return {'local_hits': self.hits['local'], 'shared_hits': self.hits['shared'], 'misses': self.misses}
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        if self.is_local(key):
+            value = self.local.get(key, missing, version=version)
+            if value is not missing:
+                self.record('local')
+                return value
+
+        value = self.shared.get(key, missing, version=version)
+        if value is missing:
+            self.record(None)
+            return default
+
+        self.record('shared')
+        if self.is_local(key):
+            self.local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.local.get_many([key for key in keys if self.is_local(key)], version=version)
+        self.record('local', len(found))
+
+        remaining = [key for key in keys if key not in found]
+        if remaining:
+            shared = self.shared.get_many(remaining, version=version)
+            self.record('shared', len(shared))
+            self.record(None, len(remaining) - len(shared))
+            local = {key: value for key, value in shared.items() if self.is_local(key)}
+            if local:
+                self.local.set_many(local, self.local_timeout, version=version)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if self.is_local(key):
+            self.local.set(key, value, self.local_timeout_for(timeout), version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        local = {key: value for key, value in data.items() if self.is_local(key) and key not in failed}
+        if local:
+            self.local.set_many(local, self.local_timeout_for(timeout), version=version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.add(key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.local.delete_many(keys, version=version)
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return (self.is_local(key) and self.local.has_key(key, version=version)) or \
+            self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.local.close(**kwargs)
+        self.shared.close(**kwargs)
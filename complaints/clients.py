@@ -0,0 +1,251 @@
+"""
+عملاء الخدمات الأخرى - منصة نائبك.كوم
+طلبات HTTP لخدمات المصادقة والمحتوى والإحصائيات والإشعارات عبر جلسات مشتركة لكل خادم،
+مع مهلة اتصال وقراءة، وإعادة محاولة محدودة، وقاطع دائرة، وقياس زمن كل طلب
+"""
+
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+# عنوان كل خدمة في الإعدادات
+SERVICE_URL_SETTINGS = {
+    'auth': 'AUTH_SERVICE_URL',
+    'content': 'CONTENT_SERVICE_URL',
+    'statistics': 'STATISTICS_SERVICE_URL',
+    'notifications': 'NOTIFICATIONS_SERVICE_URL',
+}
+
+# ردود مؤقتة تستحق إعادة المحاولة
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+# الطلبات الآمنة للتكرار دون مفتاح عدم تكرار
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_clients = {}
+
+
+class ServiceError(requests.RequestException):
+    """فشل طلب لخدمة أخرى بعد استنفاد المحاولات"""
+
+
+class CircuitOpenError(ServiceError):
+    """الدائرة مفتوحة: الخدمة متعطلة مؤخراً فيُرفض الطلب دون إرساله"""
+
+
+def get_session(base_url):
+    """جلسة مشتركة لكل خادم (keep-alive) بين الطلبات والخيوط"""
+    host = urlsplit(base_url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.SERVICE_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[host] = session
+    return session
+
+
+class CircuitBreaker:
+    """
+    قاطع دائرة بسيط: يُفتح بعد N فشل متتالٍ، ويسمح بطلب تجريبي واحد بعد مدة الانتظار
+    (نصف مفتوح)؛ نجاحه يغلق الدائرة وفشله يعيد فتحها
+    """
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+    def release_trial(self):
+        """إنهاء الطلب التجريبي دون نتيجة (خطأ غير متوقع) حتى يُسمح بطلب تجريبي آخر"""
+        with self.lock:
+            self.trial_running = False
+
+
+class ServiceMetrics:
+    """عدادات زمن الطلبات لكل خدمة (داخل العملية)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms, attempts, ok):
+        with self.lock:
+            self.calls += 1
+            self.retries += attempts - 1
+            self.failures += 0 if ok else 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'failures': self.failures,
+                'retries': self.retries,
+                'rejected': self.rejected,
+                'avg_ms': round(self.total_ms / self.calls, 2) if self.calls else 0,
+                'max_ms': round(self.max_ms, 2),
+            }
+
+
+class ServiceClient:
+    """عميل خدمة واحدة (العنوان يُقرأ من الإعدادات عند كل طلب)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.breaker = CircuitBreaker(settings.SERVICE_BREAKER_THRESHOLD, settings.SERVICE_BREAKER_RESET_SECONDS)
+        self.metrics = ServiceMetrics()
+
+    @property
+    def base_url(self):
+        return getattr(settings, SERVICE_URL_SETTINGS[self.name]).rstrip('/')
+
+    def request(self, method, path, retries=None, **kwargs):
+        """
+        إرسال طلب وإرجاع الاستجابة الناجحة، أو رفع ServiceError
+
+        يُعاد الطلب عند أخطاء الاتصال والمهلة والردود 502/503/504 فقط إذا كان آمناً للتكرار
+        (GET وما شابه، أو يحمل Idempotency-Key)
+        """
+        method = method.upper()
+        if not self.breaker.allow():
+            with self.metrics.lock:
+                self.metrics.rejected += 1
+            raise CircuitOpenError(f'{self.name}: الخدمة غير متاحة مؤقتاً')
+
+        headers = kwargs.get('headers') or {}
+        if method not in IDEMPOTENT_METHODS and 'Idempotency-Key' not in headers:
+            retries = 0
+        elif retries is None:
+            retries = settings.SERVICE_RETRIES
+
+        try:
+            return self.send(method, path, retries, **kwargs)
+        finally:
+            # الطلب التجريبي انتهى بنتيجة أو بخطأ غير متوقع: لا يبقى محجوزاً فتُرفض كل الطلبات
+            self.breaker.release_trial()
+
+    def send(self, method, path, retries, **kwargs):
+        url = f'{self.base_url}{path}'
+        kwargs.setdefault('timeout', (settings.SERVICE_CONNECT_TIMEOUT, settings.SERVICE_TIMEOUT))
+        session = get_session(url)
+        started = time.perf_counter()
+        attempt = 0
+
+        while True:
+            attempt += 1
+            try:
+                response = session.request(method, url, **kwargs)
+                if response.status_code in RETRY_STATUSES:
+                    response.raise_for_status()
+            except requests.RequestException as error:
+                if attempt <= retries:
+                    time.sleep(self.retry_delay(attempt))
+                    continue
+                self.finish(method, path, started, attempt, ok=False)
+                raise ServiceError(f'{self.name}: {error}') from error
+
+            ok = response.status_code < 500
+            self.finish(method, path, started, attempt, ok=ok, status_code=response.status_code)
+            response.raise_for_status()
+            return response
+
+    def finish(self, method, path, started, attempts, ok, status_code=None):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.metrics.record(elapsed_ms, attempts, ok)
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        logger.debug(
+            'service=%s method=%s path=%s status=%s attempts=%d elapsed_ms=%.1f',
+            self.name, method, path, status_code, attempts, elapsed_ms
+        )
+
+    @staticmethod
+    def retry_delay(attempt):
+        """تأخير أسي مع عشوائية كاملة (full jitter)"""
+        return random.uniform(0, settings.SERVICE_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+
+def get_client(name):
+    """العميل المشترك لخدمة (auth, content, statistics, notifications)"""
+    client = _clients.get(name)
+    if client is None:
+        client = _clients.setdefault(name, ServiceClient(name))
+    return client
+
+
+def get_metrics():
+    """زمن الطلبات لكل خدمة منذ بدء العملية"""
+    return {name: client.metrics.snapshot() for name, client in _clients.items()}
+
+
+def reset_clients():
+    """إغلاق الجلسات وإعادة حالة العملاء (للاختبارات وبعد تغيير الإعدادات)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+    _clients.clear()
@@ -0,0 +1,93 @@
+"""
+الطلبات الشرطية - منصة نائبك.كوم
+ETag ضعيف و Last-Modified للشكاوى، والرد بـ 304 عندما تكون نسخة العميل حديثة
+"""
+
+import hashlib
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """ETag ضعيف (المحتوى نفسه بمعنى البيانات، لا بالبايت)"""
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"'
+
+
+def freshness_validators(pk, updated_at, last_history_at, last_attachment_at, attachments_count,
+                         category_updated_at=None):
+    """
+    (ETag, Last-Modified) للشكوى من موعد تحديثها وآخر سجل وآخر مرفق وموعد تحديث تصنيفها
+
+    عدد المرفقات يدخل في ETag حتى يتغير عند حذف مرفق قديم
+    """
+    etag = make_etag(
+        pk, updated_at.isoformat(), last_history_at, last_attachment_at, attachments_count, category_updated_at
+    )
+    last_modified = max(
+        value for value in (updated_at, last_history_at, last_attachment_at, category_updated_at) if value
+    )
+    return etag, last_modified
+
+
+def content_etag(url, data):
+    """
+    ETag من محتوى الاستجابة نفسها (صفحة القائمة كما تُرسل) دون استعلام إضافي
+
+    يتغير مع أي قيمة في الصفحة (العدد، التصنيف، عدد المرفقات...)، ويحسبه كل عامل بنفس النتيجة
+    """
+    return make_etag(url, json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True))
+
+
+def complaint_validators(queryset, pk):
+    """قراءة مصدر ETag باستعلام واحد دون تحميل السجل والمرفقات (None إذا لم توجد الشكوى)"""
+    try:
+        row = (
+            queryset.filter(pk=pk).with_freshness()
+            .values_list(
+                'updated_at', 'last_history_at', 'last_attachment_at', 'annotated_attachments_count',
+                'category_updated_at'
+            )
+            .first()
+        )
+    except (ValueError, ValidationError):
+        return None
+    return freshness_validators(pk, *row) if row else None
+
+
+def instance_validators(complaint):
+    """نفس مصدر ETag من شكوى محملة بـ with_freshness() (السجل والمرفقات المضمّنة قد تكون جزءاً منها)"""
+    return freshness_validators(
+        complaint.pk,
+        complaint.updated_at,
+        complaint.last_history_at,
+        complaint.last_attachment_at,
+        complaint.annotated_attachments_count,
+        complaint.category_updated_at,
+    )
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """استجابة 304 إذا طابقت If-None-Match أو If-Modified-Since نسخة العميل، وإلا None"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """إضافة ETag و Last-Modified، مع إلزام العميل بالتحقق قبل استخدام نسخته"""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # الاستجابة تختلف حسب المستخدم (نطاقه)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization', 'Cookie'])
+    return response
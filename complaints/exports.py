@@ -0,0 +1,277 @@
+"""
+تصدير الشكاوى - منصة نائبك.كوم
+كتابة ملفات التصدير تدريجياً دون تحميل جميع الصفوف في الذاكرة
+"""
+
+import csv
+import os
+import shutil
+import zipfile
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Complaint
+
+
+CSV_HEADER = [
+    'رقم المرجع', 'العنوان', 'المحتوى', 'الحالة', 'الأولوية',
+    'اسم المواطن', 'البريد الإلكتروني', 'النائب المُسند',
+    'تاريخ الإنشاء', 'تاريخ التحديث', 'تاريخ الحل'
+]
+
+# الأعمدة المقروءة من قاعدة البيانات بنفس ترتيب العناوين
+CSV_COLUMNS = (
+    'reference_number', 'title', 'content', 'status', 'priority',
+    'citizen_name', 'citizen_email', 'assigned_representative_name',
+    'created_at', 'updated_at', 'resolved_at'
+)
+
+# علامة ترتيب البايت حتى يتعرف Excel على الترميز العربي
+UTF8_BOM = '\ufeff'
+
+# امتدادات مضغوطة أصلاً: تُخزّن كما هي (ZIP_STORED) بدلاً من إعادة ضغطها
+STORED_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.pdf', '.docx', '.zip'})
+
+# حجم القطعة عند نسخ المرفقات إلى الأرشيف
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class Echo:
+    """ملف وهمي يُرجع ما يُكتب فيه بدلاً من تخزينه (لاستخدامه مع csv.writer)"""
+
+    def write(self, value):
+        return value
+
+
+def format_datetime(value, empty=''):
+    """تنسيق التاريخ كـ YYYY-MM-DD HH:MM دون strftime لكل صف"""
+    if value is None:
+        return empty
+    return value.isoformat(' ', 'minutes')[:16]
+
+
+def complaint_csv_rows(queryset, chunk_size=None):
+    """صفوف ملف CSV (العناوين ثم صف لكل شكوى) مقروءة على دفعات عبر iterator"""
+    chunk_size = chunk_size or settings.COMPLAINTS_EXPORT_CHUNK_SIZE
+    status_labels = dict(Complaint.COMPLAINT_STATUS)
+    priority_labels = dict(Complaint.PRIORITY_CHOICES)
+
+    yield CSV_HEADER
+
+    rows = queryset.values_list(*CSV_COLUMNS).iterator(chunk_size=chunk_size)
+    for (reference_number, title, content, status, priority, citizen_name, citizen_email,
+         representative_name, created_at, updated_at, resolved_at) in rows:
+        yield [
+            reference_number,
+            title,
+            content,
+            status_labels.get(status, status),
+            priority_labels.get(priority, priority),
+            citizen_name,
+            citizen_email,
+            representative_name or 'غير مُسند',
+            format_datetime(created_at),
+            format_datetime(updated_at),
+            format_datetime(resolved_at, 'لم يتم الحل'),
+        ]
+
+
+def iter_complaints_csv(queryset, chunk_size=None):
+    """نص CSV مقسم إلى أجزاء (سطر لكل جزء) للكتابة التدريجية أو StreamingHttpResponse"""
+    writer = csv.writer(Echo())
+    for row in complaint_csv_rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+class ZipStreamBuffer:
+    """
+    مخرج غير قابل للتنقل (بدون seek/tell) يجمع ما يكتبه ZipFile حتى يُسحب
+
+    ZipFile يكتب في هذه الحالة واصفات البيانات بعد كل ملف فلا يحتاج للرجوع للخلف
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def attachment_compress_type(name):
+    """الصور وملفات PDF و docx مضغوطة أصلاً فلا فائدة من ضغطها مجدداً"""
+    extension = os.path.splitext(name)[1].lower()
+    return zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def generate_complaint_details(complaint):
+    """إنشاء ملف نصي بتفاصيل الشكوى"""
+    
+    details = f"""
+تفاصيل الشكوى - {complaint.reference_number}
+=====================================
+
+العنوان: {complaint.title}
+الحالة: {complaint.get_status_display()}
+الأولوية: {complaint.get_priority_display()}
+
+بيانات المواطن:
+- الاسم: {complaint.citizen_name}
+- البريد الإلكتروني: {complaint.citizen_email}
+
+المحتوى:
+{complaint.content}
+
+رابط يوتيوب: {complaint.youtube_link or 'لا يوجد'}
+
+النائب المُسند: {complaint.assigned_representative_name or 'غير مُسند'}
+تاريخ الإسناد: {complaint.assigned_at.strftime('%Y-%m-%d %H:%M') if complaint.assigned_at else 'لم يتم الإسناد'}
+
+رد الأدمن:
+{complaint.admin_response or 'لا يوجد رد'}
+
+رد النائب:
+{complaint.representative_response or 'لا يوجد رد'}
+
+الحل:
+{complaint.resolution or 'لم يتم تقديم حل'}
+
+تاريخ الإنشاء: {complaint.created_at.strftime('%Y-%m-%d %H:%M')}
+تاريخ آخر تحديث: {complaint.updated_at.strftime('%Y-%m-%d %H:%M')}
+تاريخ الحل: {complaint.resolved_at.strftime('%Y-%m-%d %H:%M') if complaint.resolved_at else 'لم يتم الحل'}
+
+عدد المرفقات: {complaint.attachments_count}
+"""
+    
+    return details
+
+
+def complaint_folder_name(complaint):
+    return f'complaint_{complaint.reference_number}_{complaint.citizen_name}'
+
+
+def new_zip_info(name, compress_type=zipfile.ZIP_DEFLATED, modified_at=None):
+    info = zipfile.ZipInfo(name, date_time=timezone.localtime(modified_at).timetuple()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def write_attachment(zip_file, folder, attachment):
+    """نسخ المرفق من التخزين إلى الأرشيف دون قراءته كاملاً (يُتجاهل المرفق المفقود)"""
+    try:
+        source = attachment.file.open('rb')
+    except (FileNotFoundError, OSError):
+        return False
+
+    info = new_zip_info(
+        f'{folder}/attachments/{attachment.original_name}',
+        attachment_compress_type(attachment.original_name),
+        attachment.uploaded_at
+    )
+    info.file_size = attachment.file_size or 0
+
+    with source, zip_file.open(info, 'w') as entry:
+        shutil.copyfileobj(source, entry, COPY_BUFFER_SIZE)
+    return True
+
+
+def iter_complaints_zip_parts(zip_file, queryset, include_attachments=True, chunk_size=None):
+    """
+    كتابة محتوى الأرشيف في zip_file مع إرجاع عدد الشكاوى المكتملة بعد كل شكوى
+
+    ملف CSV يُكتب تدريجياً، والمرفقات تُجلب مسبقاً على دفعات (استعلام لكل دفعة)
+    """
+    chunk_size = chunk_size or settings.COMPLAINTS_EXPORT_CHUNK_SIZE
+
+    # ملف CSV يُكتب بحجم غير معروف مسبقاً (force_zip64)، مع التوقف بعد كل دفعة لتفريغ المخرج
+    with zip_file.open(new_zip_info('complaints_list.csv'), 'w', force_zip64=True) as entry:
+        for count, line in enumerate(iter_complaints_csv(queryset, chunk_size), start=1):
+            entry.write(line.encode('utf-8'))
+            if count % chunk_size == 0:
+                yield 0
+    yield 0
+
+    if not include_attachments:
+        return
+
+    complaints = queryset.prefetch_related('attachments').iterator(chunk_size=chunk_size)
+    for done, complaint in enumerate(complaints, start=1):
+        folder = complaint_folder_name(complaint)
+        zip_file.writestr(new_zip_info(f'{folder}/details.txt'), generate_complaint_details(complaint))
+
+        for attachment in complaint.attachments.all():
+            write_attachment(zip_file, folder, attachment)
+
+        yield done
+
+
+def write_complaints_zip(fileobj, queryset, include_attachments=True, chunk_size=None, progress=None):
+    """
+    كتابة أرشيف الشكاوى في ملف مفتوح للكتابة (ملف تخزين، أو أي كائن به write)
+
+    progress (اختياري) يُستدعى بعدد الشكاوى المكتملة
+    """
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for done in iter_complaints_zip_parts(zip_file, queryset, include_attachments, chunk_size):
+            if progress is not None:
+                progress(done)
+
+
+def iter_complaints_zip(queryset, include_attachments=True, chunk_size=None):
+    """أرشيف الشكاوى كقطع bytes متتالية (لـ StreamingHttpResponse)"""
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for _done in iter_complaints_zip_parts(zip_file, queryset, include_attachments, chunk_size):
+            data = buffer.drain()
+            if data:
+                yield data
+    # الفهرس المركزي يُكتب عند إغلاق الأرشيف
+    yield buffer.drain()
+
+
+def open_export_file(storage, name):
+    """فتح ملف للكتابة في التخزين (FileSystemStorage لا ينشئ المجلدات عند الفتح)"""
+    try:
+        directory = os.path.dirname(storage.path(name))
+    except NotImplementedError:
+        pass
+    else:
+        os.makedirs(directory, exist_ok=True)
+    return storage.open(name, 'wb')
+
+
+def plan_export_ranges(queryset, shard_size, until):
+    """
+    حدود أجزاء التصدير على created_at بحيث يحمل كل جزء نحو shard_size شكوى
+
+    الفترات نصف مفتوحة [start, end) والأخيرة تنتهي عند until، فيبقى محتوى كل جزء
+    ثابتاً عند إعادة المحاولة حتى لو أُضيفت شكاوى جديدة بعد بدء التصدير
+    """
+    dates = queryset.filter(created_at__lt=until).order_by('created_at').values_list('created_at', flat=True)
+    boundaries = []
+    start = None
+
+    while True:
+        remaining = dates if start is None else dates.filter(created_at__gte=start)
+        boundary = remaining[shard_size:shard_size + 1].first()
+        if boundary is None:
+            break
+        if boundary == start:
+            # شكاوى كثيرة بنفس التوقيت: الحد التالي هو أول توقيت مختلف
+            boundary = dates.filter(created_at__gt=start).first()
+            if boundary is None:
+                break
+        boundaries.append(boundary)
+        start = boundary
+
+    starts = [None] + boundaries
+    ends = boundaries + [until]
+    return list(zip(starts, ends))
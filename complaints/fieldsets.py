@@ -0,0 +1,171 @@
+"""
+الحقول المختارة والتسلسل السريع للقوائم - منصة نائبك.كوم
+?fields=id,title,status يحدد حقول كل صف، والصفوف تُبنى مباشرة من values() بدلاً من
+Serializer لكل صف، بنفس مخرجات Serializer القائمة (نفس الحقول وترتيبها وصيغها)
+"""
+
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import Complaint, ComplaintHistory
+from .pagination import KeysetPagination
+from .serializers import ComplaintHistorySerializer, ComplaintListSerializer
+
+
+# حقل لا يظهر في الصف (مثل category_name للشكوى بدون تصنيف، كما يتخطاه Serializer)
+OMIT = object()
+
+
+def _identity(value):
+    return value
+
+
+class ValuesSerializer:
+    """
+    تسلسل صفوف values() بنفس مخرجات serializer_class
+
+    الحقول العادية تُقرأ من عمود مصدرها (مع تحويل التاريخ والمعرف كما في Serializer)،
+    والحقول المحسوبة تُعرّف في computed: الاسم -> (الأعمدة المطلوبة، دالة (row, now))
+    """
+
+    serializer_class = None
+    computed = {}
+
+    def __init__(self, fields=None):
+        serializer_fields = self.serializer_class().fields
+        names = list(serializer_fields)
+        if fields is not None:
+            unknown = sorted(name for name in fields if name not in serializer_fields)
+            if unknown:
+                raise ValidationError({'fields': f'حقول غير معروفة: {", ".join(unknown)}'})
+            names = [name for name in names if name in fields]
+
+        self.names = names
+        self.builders = []
+        columns = {}
+        for name in names:
+            if name in self.computed:
+                required, build = self.computed[name]
+                columns.update(dict.fromkeys(required))
+                self.builders.append((name, build))
+            else:
+                field = serializer_fields[name]
+                columns[field.source] = None
+                self.builders.append((name, self.column_reader(field)))
+        self.columns = tuple(columns)
+
+    @staticmethod
+    def column_reader(field):
+        """قراءة العمود وتحويله كما يفعل حقل Serializer (None تبقى None)"""
+        if isinstance(field, serializers.DateTimeField):
+            convert = field.to_representation
+        elif isinstance(field, serializers.UUIDField):
+            convert = str
+        else:
+            convert = _identity
+        column = field.source
+
+        def read(row, now):
+            value = row[column]
+            return None if value is None else convert(value)
+        return read
+
+    def prepare(self, queryset):
+        """تجهيز الاستعلام للأعمدة المطلوبة (مثل الاستعلامات الفرعية)"""
+        return queryset
+
+    def to_representation(self, rows):
+        now = timezone.now()
+        builders = self.builders
+        data = []
+        for row in rows:
+            item = {}
+            for name, build in builders:
+                value = build(row, now)
+                if value is not OMIT:
+                    item[name] = value
+            data.append(item)
+        return data
+
+
+def choice_label(column, choices):
+    """اسم الاختيار المعروض من خريطة محسوبة مسبقاً (مثل get_<field>_display)"""
+    labels = {value: str(label) for value, label in choices}
+    return (column,), lambda row, now: labels.get(row[column], row[column])
+
+
+def _category_name(row, now):
+    name = row['category__name']
+    return OMIT if name is None else name
+
+
+def _is_overdue(row, now):
+    if row['status'] == 'overdue':
+        return True
+    if row['status'] == 'on_hold' and row['hold_until']:
+        return now > row['hold_until']
+    return False
+
+
+class ComplaintValuesSerializer(ValuesSerializer):
+    """قائمة الشكاوى (ComplaintListSerializer)"""
+
+    serializer_class = ComplaintListSerializer
+    computed = {
+        'status_display': choice_label('status', Complaint.COMPLAINT_STATUS),
+        'priority_display': choice_label('priority', Complaint.PRIORITY_CHOICES),
+        'category_name': (('category__name',), _category_name),
+        'attachments_count': (
+            ('annotated_attachments_count',), lambda row, now: row['annotated_attachments_count']
+        ),
+        'days_since_created': (('created_at',), lambda row, now: (now - row['created_at']).days),
+        'is_overdue': (('status', 'hold_until'), _is_overdue),
+    }
+
+    def prepare(self, queryset):
+        if 'attachments_count' in self.names:
+            return queryset.with_attachments_count()
+        return queryset
+
+
+class ComplaintHistoryValuesSerializer(ValuesSerializer):
+    """قائمة سجل الشكاوى (ComplaintHistorySerializer)"""
+
+    serializer_class = ComplaintHistorySerializer
+    computed = {
+        'action_display': choice_label('action', ComplaintHistory.ACTION_TYPES),
+    }
+
+
+class ValuesListMixin:
+    """
+    إجراء list عبر ValuesSerializer: استعلام values() بالأعمدة المطلوبة فقط مع الترقيم،
+    و ?fields= لاختيار الحقول
+    """
+
+    values_serializer_class = None
+    fields_query_param = 'fields'
+
+    def get_requested_fields(self, request):
+        value = request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.values_serializer_class(self.get_requested_fields(request))
+        queryset = serializer.prepare(self.filter_queryset(self.get_queryset()))
+
+        columns = list(serializer.columns)
+        if isinstance(self.paginator, KeysetPagination):
+            # مؤشر الصفحة يُبنى من أعمدة الترتيب
+            ordering = self.paginator.get_ordering(request, queryset, self)
+            columns.extend(field.lstrip('-') for field in ordering)
+        rows = queryset.values(*dict.fromkeys(columns))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(rows))
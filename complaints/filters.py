@@ -0,0 +1,36 @@
+"""
+فلاتر واجهات خدمة الشكاوى - منصة نائبك.كوم
+"""
+
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
+
+from .search import get_search_backend, is_reference_fragment, is_reference_number
+
+
+class ComplaintSearchFilter(SearchFilter):
+    """
+    بحث الشكاوى عبر محرك البحث النصي لقاعدة البيانات
+
+    رقم المرجع الكامل يُبحث عنه مباشرة على فهرس reference_number، وجزء رقم المرجع يُطابق
+    أيضاً بـ icontains بجانب النص. في حال عدم توفر محرك للقاعدة الحالية يُستخدم SearchFilter
+    الافتراضي (search_fields)
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        term = ' '.join(terms)
+        if is_reference_number(term):
+            return queryset.filter(reference_number=term.strip().upper())
+
+        backend = get_search_backend(queryset.db)
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+
+        extra = None
+        if is_reference_fragment(term):
+            extra = Q(reference_number__icontains=term.strip())
+        return backend.search(queryset, term, extra)
@@ -0,0 +1,89 @@
+"""
+أمر قياس أداء موزع الصندوق الصادر: عدد الأحداث في الثانية مقابل خدمة وهمية محلية
+
+يُنشئ الأحداث داخل معاملة يتم التراجع عنها في النهاية
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from complaints.notifications import build_notification
+from complaints.models import Complaint
+from complaints.outbox import DESTINATIONS, dispatch_pending, publish
+
+
+class StubServiceHandler(BaseHTTPRequestHandler):
+    """خدمة وهمية ترد بنجاح على أي طلب بعد تأخير ثابت"""
+
+    latency = 0
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.latency)
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'قياس عدد الأحداث المرسلة في الثانية عبر موزع الصندوق الصادر مقابل خدمة وهمية محلية'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--latency-ms', type=float, default=20)
+        parser.add_argument('--recipients', type=int, default=200)
+
+    def handle(self, *args, **options):
+        StubServiceHandler.latency = options['latency_ms'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubServiceHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+
+        try:
+            with override_settings(NOTIFICATIONS_SERVICE_URL=url, STATISTICS_SERVICE_URL=url), \
+                    transaction.atomic():
+                self.populate(options['events'], options['recipients'])
+
+                started = time.perf_counter()
+                result = dispatch_pending(batch_size=options['batch_size'])
+                elapsed = time.perf_counter() - started
+
+                self.stdout.write(f'{"destination":<15} {"delivered":>10} {"failed":>8}')
+                delivered = 0
+                for name, counts in result['destinations'].items():
+                    delivered += counts['delivered_count']
+                    self.stdout.write(f'{name:<15} {counts["delivered_count"]:>10} {counts["failed_count"]:>8}')
+                self.stdout.write(
+                    f'{delivered} حدث في {elapsed:.2f} ثانية ({delivered / elapsed:.0f} حدث/ثانية)'
+                )
+
+                transaction.set_rollback(True)
+        finally:
+            server.shutdown()
+
+    def populate(self, events, recipients):
+        """إشعارات لعدد من المستلمين، وحدث نقاط لكل عشرة إشعارات"""
+        complaint = Complaint(title='شكوى', reference_number='COMP-BENCH')
+        scores = events // 11
+        publish('notifications', 'complaint_update', [
+            build_notification(complaint, 'accepted', index % recipients)
+            for index in range(events - scores)
+        ])
+        publish('statistics', 'score_awarded', [
+            {'representative_id': index % recipients, 'points': 1, 'reason': 'complaint_resolved'}
+            for index in range(scores)
+        ])
+        self.stdout.write(f'تم إنشاء {events} حدث لـ {len(DESTINATIONS)} خدمة')
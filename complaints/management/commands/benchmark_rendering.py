@@ -0,0 +1,108 @@
+"""
+أمر قياس عرض استجابات JSON: الحجم المرسل وزمن العرض (p50/p99) للقائمة والتفاصيل والإحصائيات
+قبل (JSONRenderer بدون ضغط) وبعد (FastJSONRenderer مع gzip/brotli)
+
+يُنشئ البيانات داخل معاملة يتم التراجع عنها في النهاية
+"""
+
+import statistics
+import tempfile
+import time
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from complaints import middleware
+from complaints.models import Complaint, ComplaintAttachment, ComplaintCategory, ComplaintHistory
+from complaints.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = 'قياس حجم وزمن عرض استجابات JSON قبل وبعد العرض السريع والضغط'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--complaints', type=int, default=200)
+        parser.add_argument('--history', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson غير مثبتة: FastJSONRenderer يستخدم العرض الافتراضي'))
+        if middleware.brotli is None:
+            self.stdout.write(self.style.WARNING('brotli غير مثبتة: القياس بـ gzip فقط'))
+
+        with override_settings(ALLOWED_HOSTS=['*'], MEDIA_ROOT=tempfile.mkdtemp()), transaction.atomic():
+            payloads = self.build_payloads(options)
+
+            self.stdout.write(f'{"payload":<8} {"variant":<14} {"bytes":>9} {"p50 ms":>8} {"p99 ms":>8}')
+            for name, data in payloads.items():
+                for variant, bytes_count, p50, p99 in self.measure(data, options['iterations']):
+                    self.stdout.write(f'{name:<8} {variant:<14} {bytes_count:>9} {p50:>8.3f} {p99:>8.3f}')
+
+            transaction.set_rollback(True)
+
+    def build_payloads(self, options):
+        """بيانات الاستجابات الثلاث كما تُرجعها الواجهات (قبل العرض)"""
+        user = get_user_model().objects.create_user(username='benchmark-admin', password='pass12345')
+        category = ComplaintCategory.objects.create(name='تصنيف القياس')
+        complaints = Complaint.objects.bulk_create([
+            Complaint(
+                title=f'شكوى بخصوص انقطاع المياه في الحي رقم {index}',
+                content='انقطعت المياه عن الحي منذ ثلاثة أيام دون إشعار مسبق من الشركة. ' * 20,
+                citizen_id=index % 50,
+                citizen_name='أحمد محمد علي',
+                citizen_email='ahmed@example.com',
+                category=category,
+                reference_number=f'COMP-BENCH-{index}',
+            )
+            for index in range(options['complaints'])
+        ])
+        detail = complaints[0]
+        ComplaintHistory.objects.bulk_create([
+            ComplaintHistory(
+                complaint=detail,
+                action='status_changed',
+                description='تم تغيير حالة الشكوى بعد مراجعة النائب',
+                performed_by_id=user.id,
+                performed_by_name=user.username,
+                additional_data={'notes': 'ملاحظات المراجعة'},
+            )
+            for _index in range(options['history'])
+        ])
+        for index in range(3):
+            ComplaintAttachment.objects.create(
+                complaint=detail,
+                file=SimpleUploadedFile(f'file{index}.pdf', b'%PDF-1.4 benchmark'),
+                original_name=f'file{index}.pdf',
+            )
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return {
+            'list': client.get(f'/api/v1/complaints/?page_size={options["page_size"]}').data,
+            'detail': client.get(f'/api/v1/complaints/{detail.id}/').data,
+            'stats': client.get('/api/v1/complaints/stats/').data,
+        }
+
+    def measure(self, data, iterations):
+        """(الطريقة، الحجم، p50، p99) لكل طريقة عرض"""
+        variants = [('stdlib', JSONRenderer(), None), ('fast', FastJSONRenderer(), None),
+                    ('fast+gzip', FastJSONRenderer(), 'gzip')]
+        if middleware.brotli is not None:
+            variants.append(('fast+br', FastJSONRenderer(), 'br'))
+
+        for variant, renderer, encoding in variants:
+            timings = []
+            for _iteration in range(iterations):
+                started = time.perf_counter()
+                content = renderer.render(data)
+                if encoding is not None:
+                    content = middleware.compress(content, encoding)
+                timings.append((time.perf_counter() - started) * 1000)
+            percentiles = statistics.quantiles(timings, n=100)
+            yield variant, len(content), percentiles[49], percentiles[98]
@@ -0,0 +1,109 @@
+"""
+أمر قياس أداء البحث: SearchFilter الافتراضي (LIKE) مقابل محرك البحث النصي
+
+يُنشئ بيانات وهمية داخل معاملة يتم التراجع عنها في النهاية
+"""
+
+import random
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from complaints.models import Complaint
+from complaints.search import get_search_backend
+
+
+WORDS = [
+    'انقطاع', 'المياه', 'الكهرباء', 'الصرف', 'الصحي', 'حفرة', 'الطريق', 'المدرسة',
+    'مستشفى', 'القمامة', 'الإنارة', 'المرور', 'التموين', 'الخبز', 'الغاز', 'المواصلات',
+    'الشارع', 'القرية', 'المركز', 'الوحدة', 'الصحية', 'تأخير', 'صيانة', 'شكوى',
+    'عاجلة', 'منذ', 'أسبوع', 'يومين', 'شهر', 'السكان', 'الأهالي', 'المحافظة',
+]
+LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+NAMES = ['أحمد', 'محمد', 'محمود', 'فاطمة', 'مريم', 'إبراهيم', 'يوسف', 'عائشة', 'مصطفى', 'هدى']
+QUERIES = ['المياه', 'مستشفي الوحده', 'الصرف الصحي', 'ابراهيم', 'صيانة الإنارة', 'غير موجود']
+SEARCH_FIELDS = ['title', 'content', 'reference_number', 'citizen_name']
+
+
+class Command(BaseCommand):
+    help = 'مقارنة زمن البحث بين SearchFilter الافتراضي ومحرك البحث النصي على بيانات وهمية'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            raise CommandError('لا يوجد محرك بحث لقاعدة البيانات الحالية')
+
+        with transaction.atomic():
+            self.populate(backend, options['rows'], options['batch_size'])
+
+            self.stdout.write(f'{"query":<20} {"like p50 ms":>12} {"index p50 ms":>13} {"matches":>9}')
+            for term in QUERIES:
+                like_times, like_count = self.measure(
+                    lambda: self.like_queryset(term), options['repeat'], options['page_size']
+                )
+                index_times, _index_count = self.measure(
+                    lambda: backend.search(Complaint.objects.all(), term), options['repeat'], options['page_size']
+                )
+                self.stdout.write(
+                    f'{term:<20} {statistics.median(like_times):>12.2f} '
+                    f'{statistics.median(index_times):>13.2f} {like_count:>9}'
+                )
+
+            transaction.set_rollback(True)
+
+    def populate(self, backend, rows, batch_size):
+        random.seed(42)
+        # مفردات واسعة (كلمات مولدة) مع كلمات شائعة حتى تكون نسب المطابقة واقعية
+        vocabulary = [''.join(random.choices(LETTERS, k=random.randint(3, 7))) for _word in range(20000)]
+        today = timezone.now().strftime('%Y%m%d')
+        started = time.perf_counter()
+
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for index in range(offset, min(offset + batch_size, rows)):
+                complaint_id = uuid.uuid4()
+                batch.append(Complaint(
+                    id=complaint_id,
+                    citizen_id=random.randint(1, 50000),
+                    citizen_name=f'{random.choice(NAMES)} {random.choice(NAMES)}',
+                    citizen_email='bench@example.com',
+                    title=' '.join(random.choices(WORDS, k=2) + random.choices(vocabulary, k=3)),
+                    content=' '.join(random.choices(WORDS, k=3) + random.choices(vocabulary, k=30)),
+                    reference_number=f'COMP-{today}-{index:08X}',
+                ))
+            Complaint.objects.bulk_create(batch)
+            backend.index_many(batch, 'default')
+
+        self.stdout.write(f'تم إنشاء {rows} شكوى في {time.perf_counter() - started:.1f} ثانية')
+
+    def like_queryset(self, term):
+        """نفس شروط SearchFilter: كل كلمة يجب أن تظهر في أحد الحقول (icontains)"""
+        queryset = Complaint.objects.all()
+        for word in term.split():
+            condition = Q()
+            for field in SEARCH_FIELDS:
+                condition |= Q(**{f'{field}__icontains': word})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def measure(self, build_queryset, repeat, page_size):
+        """زمن صفحة القائمة كما تنفذها الواجهة: COUNT ثم أول صفحة"""
+        timings = []
+        count = 0
+        for _attempt in range(repeat):
+            started = time.perf_counter()
+            queryset = build_queryset()
+            count = queryset.count()
+            list(queryset.order_by('-created_at', '-id')[:page_size])
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings, count
@@ -0,0 +1,40 @@
+"""
+أمر إعادة بناء عدادات إحصائيات الشكاوى والتحقق منها
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from complaints.cache import bump_all_versions
+from complaints.stats import diff_counter_buckets, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء جدول عدادات الشكاوى أو التحقق من تطابقه مع جدول الشكاوى'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='التحقق فقط من الانحراف دون تعديل العدادات',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            drift = diff_counter_buckets()
+
+            for bucket, (stored, live) in sorted(drift.items()):
+                status, priority, category_id, representative_id = bucket
+                self.stdout.write(
+                    f'{status}/{priority} category={category_id} representative={representative_id}: '
+                    f'stored={stored} live={live}'
+                )
+
+            if drift:
+                raise CommandError(f'عدد الخانات غير المتطابقة: {len(drift)}')
+
+            self.stdout.write(self.style.SUCCESS('العدادات متطابقة مع جدول الشكاوى'))
+            return
+
+        buckets_count = rebuild_counters()
+        bump_all_versions()
+        self.stdout.write(self.style.SUCCESS(f'تمت إعادة بناء العدادات ({buckets_count} خانة)'))
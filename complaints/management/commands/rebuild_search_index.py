@@ -0,0 +1,43 @@
+"""
+أمر إعادة بناء فهرس البحث للشكاوى
+"""
+
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+
+from complaints.models import Complaint
+from complaints.search import SEARCH_FIELDS, get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء فهرس البحث النصي لجميع الشكاوى (بعد الترحيل أو تغيير إعداد البحث)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        backend = get_search_backend(using)
+        if backend is None:
+            raise CommandError('لا يوجد محرك بحث لقاعدة البيانات الحالية')
+
+        backend.reset(using)
+        chunk_size = options['chunk_size']
+        complaints = (
+            Complaint.objects.using(using)
+            .only('pk', *SEARCH_FIELDS)
+            .order_by('pk')
+            .iterator(chunk_size=chunk_size)
+        )
+
+        # فهرسة كل دفعة باستعلام واحد بدلاً من استعلام لكل شكوى
+        indexed = 0
+        while True:
+            batch = list(islice(complaints, chunk_size))
+            if not batch:
+                break
+            backend.index_many(batch, using)
+            indexed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'تمت فهرسة {indexed} شكوى'))
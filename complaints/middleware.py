@@ -0,0 +1,99 @@
+"""
+ضغط الاستجابات - منصة نائبك.كوم
+ضغط استجابات JSON الأكبر من حد معين بـ brotli (إن كانت مثبتة ويقبلها العميل) أو gzip
+"""
+
+import re
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - بدونها يُستخدم gzip
+    brotli = None
+
+
+# JSON فقط: صفحات HTML تحمل رمز CSRF مع مدخلات المستخدم، وضغطها يعرضها لهجوم BREACH
+COMPRESSIBLE_TYPES = ('application/json',)
+
+ACCEPT_ENCODING_RE = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$')
+
+
+def accepted_encodings(header):
+    """الترميزات التي يقبلها العميل (q=0 تعني الرفض)"""
+    accepted = set()
+    for part in header.split(','):
+        match = ACCEPT_ENCODING_RE.match(part)
+        if not match:
+            continue
+        encoding, quality = match.groups()
+        try:
+            if quality is not None and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(encoding.lower())
+    return accepted
+
+
+def choose_encoding(header):
+    """brotli أولاً (أصغر للنصوص العربية) ثم gzip، أو None"""
+    accepted = accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return compress_string(content)
+
+
+class CompressionMiddleware:
+    """
+    ضغط الاستجابات الكاملة (غير المتدفقة) من نوع JSON عند تجاوز COMPRESSION_MIN_BYTES
+
+    الاستجابات المتدفقة (التصدير والملفات) لا تُضغط: الأرشيف مضغوط أصلاً.
+    صفحات HTML (لوحة الإدارة) تبقى بدون ضغط لأنها تحمل رمز CSRF
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+
+        # المحتوى المضغوط يختلف بالبايت: ETag قوي يصبح ضعيفاً كما في GZipMiddleware
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:24
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    ComplaintStatCounter = apps.get_model('complaints', 'ComplaintStatCounter')
+
+    rows = (
+        Complaint.objects.order_by()
+        .values('status', 'priority', 'category_id', 'assigned_representative_id')
+        .annotate(total=Count('pk'))
+    )
+    buckets = {}
+    for row in rows:
+        bucket = (
+            row['status'],
+            row['priority'],
+            row['category_id'] or 0,
+            row['assigned_representative_id'] or 0,
+        )
+        buckets[bucket] = buckets.get(bucket, 0) + row['total']
+
+    ComplaintStatCounter.objects.bulk_create([
+        ComplaintStatCounter(
+            status=status,
+            priority=priority,
+            category_id=category_id,
+            representative_id=representative_id,
+            count=count,
+        )
+        for (status, priority, category_id, representative_id), count in buckets.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintStatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20, verbose_name='حالة الشكوى')),
+                ('priority', models.CharField(max_length=10, verbose_name='أولوية الشكوى')),
+                ('category_id', models.PositiveIntegerField(default=0, verbose_name='معرف التصنيف')),
+                ('representative_id', models.PositiveIntegerField(default=0, verbose_name='معرف النائب')),
+                ('count', models.IntegerField(default=0, verbose_name='عدد الشكاوى')),
+            ],
+            options={
+                'verbose_name': 'عداد شكاوى',
+                'verbose_name_plural': 'عدادات الشكاوى',
+                'indexes': [models.Index(fields=['representative_id'], name='complaints__represe_703731_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='complaintstatcounter',
+            constraint=models.UniqueConstraint(fields=('status', 'priority', 'category_id', 'representative_id'), name='unique_complaint_stat_bucket'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0002_complaintstatcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['created_at', 'id'], name='complaints__created_29e4e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['citizen_id', 'created_at', 'id'], name='complaints__citizen_ec42be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['assigned_representative_id', 'created_at', 'id'], name='complaints__assigne_4f85e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaintattachment',
+            index=models.Index(fields=['complaint', 'uploaded_at', 'id'], name='complaints__complai_373879_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaintattachment',
+            index=models.Index(fields=['uploaded_at', 'id'], name='complaints__uploade_deec1f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complainthistory',
+            index=models.Index(fields=['complaint', 'performed_at', 'id'], name='complaints__complai_0dc607_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complainthistory',
+            index=models.Index(fields=['performed_at', 'id'], name='complaints__perform_35373a_idx'),
+        ),
+    ]
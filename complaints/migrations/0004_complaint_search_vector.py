@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:29
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+GIN_INDEX_NAME = 'complaints_search_vector_gin'
+
+
+def create_gin_index(apps, schema_editor):
+    # فهرس GIN متاح في PostgreSQL فقط
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('complaints', 'Complaint')._meta.db_table
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {GIN_INDEX_NAME} ON {schema_editor.quote_name(table)} '
+        f'USING gin (search_vector)'
+    )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='فهرس البحث'),
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, OperationalError
+
+
+def create_fts_table(apps, schema_editor):
+    # جدول ظل FTS5 متاح في SQLite فقط (ويتطلب دعم FTS5 في مكتبة sqlite)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    from complaints.search import SQLiteFTSBackend
+
+    backend = SQLiteFTSBackend()
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            backend.create_table(cursor)
+        except OperationalError:
+            return
+
+    Complaint = apps.get_model('complaints', 'Complaint')
+    complaints = list(Complaint.objects.only('pk', 'title', 'content', 'citizen_name'))
+    if complaints:
+        backend.index_many(complaints, schema_editor.connection.alias)
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    from complaints.search import SQLiteFTSBackend
+
+    schema_editor.execute(f'DROP TABLE IF EXISTS {SQLiteFTSBackend.table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0004_complaint_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0005_complaint_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='معرف المهمة')),
+                ('requested_by_id', models.PositiveIntegerField(verbose_name='معرف طالب التصدير')),
+                ('filters', models.JSONField(blank=True, default=dict, verbose_name='معايير التصفية')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('running', 'قيد التنفيذ'), ('completed', 'مكتملة'), ('failed', 'فشلت')], default='pending', max_length=20, verbose_name='حالة المهمة')),
+                ('manifest_path', models.CharField(blank=True, max_length=500, verbose_name='مسار ملف الفهرس')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الاكتمال')),
+            ],
+            options={
+                'verbose_name': 'مهمة تصدير',
+                'verbose_name_plural': 'مهام التصدير',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ComplaintExportShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='رقم الجزء')),
+                ('range_start', models.DateTimeField(blank=True, null=True, verbose_name='بداية الفترة')),
+                ('range_end', models.DateTimeField(blank=True, null=True, verbose_name='نهاية الفترة (غير مشمولة)')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('running', 'قيد التنفيذ'), ('completed', 'مكتملة'), ('failed', 'فشلت')], default='pending', max_length=20, verbose_name='حالة الجزء')),
+                ('file_path', models.CharField(blank=True, max_length=500, verbose_name='مسار ملف الجزء')),
+                ('complaints_count', models.PositiveIntegerField(default=0, verbose_name='عدد الشكاوى')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='عدد المحاولات')),
+                ('error', models.TextField(blank=True, verbose_name='آخر خطأ')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الاكتمال')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='complaints.complaintexportjob', verbose_name='مهمة التصدير')),
+            ],
+            options={
+                'verbose_name': 'جزء تصدير',
+                'verbose_name_plural': 'أجزاء التصدير',
+                'ordering': ['job', 'index'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='complaintexportshard',
+            constraint=models.UniqueConstraint(fields=('job', 'index'), name='unique_export_shard_index'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0006_export_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='complaint',
+            name='status',
+            field=models.CharField(choices=[('pending', 'في الانتظار'), ('assigned', 'مُوجهة لنائب'), ('accepted', 'مقبولة'), ('rejected', 'مرفوضة'), ('on_hold', 'معلقة للدراسة'), ('overdue', 'متأخرة'), ('resolved', 'محلولة'), ('closed', 'مغلقة')], default='pending', max_length=20, verbose_name='حالة الشكوى'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['status', 'hold_until'], name='complaints__status_f33cf2_idx'),
+        ),
+    ]
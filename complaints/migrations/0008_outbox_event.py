@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:16
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0007_overdue_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='معرف الحدث')),
+                ('destination', models.CharField(choices=[('notifications', 'خدمة الإشعارات'), ('statistics', 'خدمة الإحصائيات')], max_length=30, verbose_name='الخدمة المستقبلة')),
+                ('event_type', models.CharField(max_length=50, verbose_name='نوع الحدث')),
+                ('payload', models.JSONField(verbose_name='محتوى الحدث')),
+                ('status', models.CharField(choices=[('pending', 'بانتظار الإرسال'), ('delivered', 'تم الإرسال'), ('failed', 'فشل')], default='pending', max_length=20, verbose_name='حالة الإرسال')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='عدد المحاولات')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='موعد المحاولة التالية')),
+                ('last_error', models.TextField(blank=True, verbose_name='آخر خطأ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الإرسال')),
+            ],
+            options={
+                'verbose_name': 'حدث صادر',
+                'verbose_name_plural': 'الأحداث الصادرة',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['destination', 'status', 'available_at'], name='complaints__destina_99c626_idx')],
+            },
+        ),
+    ]
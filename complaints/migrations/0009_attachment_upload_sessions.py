@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0008_outbox_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentUploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='معرف الجلسة')),
+                ('created_by_id', models.PositiveIntegerField(verbose_name='معرف منشئ الجلسة')),
+                ('files', models.JSONField(default=list, verbose_name='الملفات')),
+                ('status', models.CharField(choices=[('pending', 'بانتظار الرفع'), ('finalized', 'مكتملة'), ('expired', 'منتهية')], default='pending', max_length=20, verbose_name='حالة الجلسة')),
+                ('expires_at', models.DateTimeField(verbose_name='موعد الانتهاء')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('finalized_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الإنهاء')),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='complaints.complaint', verbose_name='الشكوى')),
+            ],
+            options={
+                'verbose_name': 'جلسة رفع مرفقات',
+                'verbose_name_plural': 'جلسات رفع المرفقات',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='complaints__status_9a0baa_idx')],
+            },
+        ),
+    ]
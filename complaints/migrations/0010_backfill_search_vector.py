@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def backfill_search_vector(apps, schema_editor):
+    # ملء search_vector للشكاوى الموجودة قبل 0004 باستعلام UPDATE واحد (PostgreSQL فقط)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    from complaints.search import PostgresSearchBackend
+
+    Complaint = apps.get_model('complaints', 'Complaint')
+    Complaint.objects.using(schema_editor.connection.alias).filter(search_vector__isnull=True).update(
+        search_vector=PostgresSearchBackend().column_vector()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0009_attachment_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0010_backfill_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaintcategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='تاريخ آخر تحديث'),
+        ),
+    ]
@@ -5,18 +5,61 @@
 
 import uuid
 import os
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction, IntegrityError
+from django.db.models.signals import pre_delete
+from django.db.models.functions import Coalesce
 from django.core.validators import MaxLengthValidator, FileExtensionValidator
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 
+from .cache import bump_all_versions, bump_scope_versions
+from .search import SEARCH_FIELDS, index_complaint, remove_complaint
+
 
 def complaint_attachment_path(instance, filename):
     """تحديد مسار تخزين مرفقات الشكاوى"""
     return f'complaints/{instance.complaint.id}/attachments/{filename}'
 
 
+class ComplaintQuerySet(models.QuerySet):
+    """استعلامات الشكاوى"""
+    
+    def with_attachments_count(self):
+        """إضافة عدد المرفقات كاستعلام فرعي في نفس الاستعلام (بدلاً من COUNT لكل صف)"""
+        attachments = (
+            ComplaintAttachment.objects.filter(complaint=models.OuterRef('pk'))
+            .order_by()
+            .values('complaint')
+            .annotate(total=models.Count('pk'))
+            .values('total')
+        )
+        return self.annotate(
+            annotated_attachments_count=Coalesce(
+                models.Subquery(attachments), 0
+            )
+        )
+    
+    def with_freshness(self):
+        """إضافة آخر موعد للسجل والمرفقات وعددها وموعد تحديث التصنيف (مصدر ETag)"""
+        latest_history = (
+            ComplaintHistory.objects.filter(complaint=models.OuterRef('pk'))
+            .order_by('-performed_at')
+            .values('performed_at')[:1]
+        )
+        latest_attachment = (
+            ComplaintAttachment.objects.filter(complaint=models.OuterRef('pk'))
+            .order_by('-uploaded_at')
+            .values('uploaded_at')[:1]
+        )
+        return self.with_attachments_count().annotate(
+            last_history_at=models.Subquery(latest_history),
+            last_attachment_at=models.Subquery(latest_attachment),
+            category_updated_at=models.F('category__updated_at'),
+        )
+
+
 class Complaint(models.Model):
     """نموذج الشكوى الأساسي"""
     
@@ -26,6 +69,7 @@ class Complaint(models.Model):
         ('accepted', 'مقبولة'),
         ('rejected', 'مرفوضة'),
         ('on_hold', 'معلقة للدراسة'),
+        ('overdue', 'متأخرة'),
         ('resolved', 'محلولة'),
         ('closed', 'مغلقة'),
     ]
@@ -193,6 +237,15 @@ class Complaint(models.Model):
         help_text='رسالة الشكر التي ستظهر في قسم الإنجازات'
     )
     
+    # فهرس البحث النصي الكامل (PostgreSQL) - يُحدّث تلقائياً عند الحفظ
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='فهرس البحث'
+    )
+    
+    objects = ComplaintQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'شكوى'
         verbose_name_plural = 'الشكاوى'
@@ -204,11 +257,37 @@ class Complaint(models.Model):
             models.Index(fields=['created_at']),
             models.Index(fields=['priority']),
             models.Index(fields=['reference_number']),
+            # فهارس مركبة لترقيم الصفحات بالمؤشر (created_at, id) لكل نطاق
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['citizen_id', 'created_at', 'id']),
+            models.Index(fields=['assigned_representative_id', 'created_at', 'id']),
+            # الشكاوى المعلقة حسب موعد انتهاء التعليق
+            models.Index(fields=['status', 'hold_until']),
         ]
     
+    # الحقول التي تحدد خانة الشكوى في جدول العدادات
+    STAT_BUCKET_FIELDS = ('status', 'priority', 'category_id', 'assigned_representative_id')
+    
     def __str__(self):
         return f'{self.title} - {self.citizen_name}'
     
+    @property
+    def stat_bucket(self):
+        """خانة الشكوى في جدول العدادات (الحالة، الأولوية، التصنيف، النائب)"""
+        return ComplaintStatCounter.normalize_bucket(
+            getattr(self, field) for field in self.STAT_BUCKET_FIELDS
+        )
+    
+    def _stored_stat_bucket(self):
+        """قراءة الخانة المخزنة حالياً في قاعدة البيانات مع قفل الصف"""
+        row = (
+            Complaint.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list(*self.STAT_BUCKET_FIELDS)
+            .first()
+        )
+        return ComplaintStatCounter.normalize_bucket(row) if row else None
+    
     def save(self, *args, **kwargs):
         # إنشاء رقم مرجعي تلقائي
         if not self.reference_number:
@@ -222,11 +301,47 @@ class Complaint(models.Model):
         if self.status == 'on_hold' and not self.hold_until:
             self.hold_until = timezone.now() + timedelta(days=3)
         
-        super().save(*args, **kwargs)
+        # تحديث جدول العدادات في نفس المعاملة
+        update_fields = kwargs.get('update_fields')
+        tracks_bucket = update_fields is None or bool(
+            {'status', 'priority', 'category', 'category_id', 'assigned_representative_id'} & set(update_fields)
+        )
+        
+        with transaction.atomic():
+            old_bucket = None
+            if tracks_bucket and not self._state.adding:
+                old_bucket = self._stored_stat_bucket()
+            
+            super().save(*args, **kwargs)
+            
+            if tracks_bucket:
+                ComplaintStatCounter.move(old_bucket, self.stat_bucket)
+            
+            if update_fields is None or set(SEARCH_FIELDS) & set(update_fields):
+                index_complaint(self, using=self._state.db)
+        
+        # النائب السابق يفقد الشكوى من نطاقه عند إعادة الإسناد
+        self.bump_cache_versions(old_bucket[3] if old_bucket else None)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            old_bucket = self._stored_stat_bucket()
+            remove_complaint(self, using=self._state.db)
+            result = super().delete(*args, **kwargs)
+            ComplaintStatCounter.move(old_bucket, None)
+        
+        self.bump_cache_versions()
+        return result
+    
+    def bump_cache_versions(self, *representative_ids):
+        """إبطال القوائم والتفاصيل والإحصائيات المخزنة لنطاقات أصحاب الشكوى"""
+        bump_scope_versions([self.citizen_id], [self.assigned_representative_id, *representative_ids])
     
     @property
     def is_overdue(self):
         """التحقق من انتهاء فترة التعليق"""
+        if self.status == 'overdue':
+            return True
         if self.status == 'on_hold' and self.hold_until:
             return timezone.now() > self.hold_until
         return False
@@ -238,7 +353,15 @@ class Complaint(models.Model):
     
     @property
     def attachments_count(self):
-        """عدد المرفقات"""
+        """عدد المرفقات (من الاستعلام المُجمّع أو الجلب المسبق إن وُجدا)"""
+        annotated = getattr(self, 'annotated_attachments_count', None)
+        if annotated is not None:
+            return annotated
+        
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'attachments' in prefetched:
+            return len(prefetched['attachments'])
+        
         return self.attachments.count()
 
 
@@ -299,6 +422,10 @@ class ComplaintAttachment(models.Model):
         verbose_name = 'مرفق شكوى'
         verbose_name_plural = 'مرفقات الشكاوى'
         ordering = ['uploaded_at']
+        indexes = [
+            models.Index(fields=['complaint', 'uploaded_at', 'id']),
+            models.Index(fields=['uploaded_at', 'id']),
+        ]
     
     def __str__(self):
         return f'{self.original_name} - {self.complaint.title}'
@@ -323,6 +450,12 @@ class ComplaintAttachment(models.Model):
                 self.file_size = self.file.size
         
         super().save(*args, **kwargs)
+        self.complaint.bump_cache_versions()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.complaint.bump_cache_versions()
+        return result
     
     @property
     def file_size_mb(self):
@@ -390,6 +523,10 @@ class ComplaintHistory(models.Model):
         verbose_name = 'سجل الشكوى'
         verbose_name_plural = 'سجلات الشكاوى'
         ordering = ['-performed_at']
+        indexes = [
+            models.Index(fields=['complaint', 'performed_at', 'id']),
+            models.Index(fields=['performed_at', 'id']),
+        ]
     
     def __str__(self):
         return f'{self.get_action_display()} - {self.complaint.title}'
@@ -426,6 +563,11 @@ class ComplaintCategory(models.Model):
         verbose_name='تاريخ الإنشاء'
     )
     
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='تاريخ آخر تحديث'
+    )
+    
     class Meta:
         verbose_name = 'تصنيف الشكوى'
         verbose_name_plural = 'تصنيفات الشكاوى'
@@ -433,6 +575,16 @@ class ComplaintCategory(models.Model):
     
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # اسم التصنيف يظهر في القوائم والتفاصيل والإحصائيات لكل النطاقات
+        bump_all_versions()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        bump_all_versions()
+        return result
 
 
 class ComplaintTemplate(models.Model):
@@ -477,6 +629,427 @@ class ComplaintTemplate(models.Model):
         return self.title
 
 
+class ComplaintStatCounter(models.Model):
+    """
+    عدادات الشكاوى المحدثة تدريجياً لكل (حالة × أولوية × تصنيف × نائب)
+    
+    القيمة 0 في category_id أو representative_id تعني "بدون تصنيف" أو "غير مُسندة"
+    """
+    
+    status = models.CharField(
+        max_length=20,
+        verbose_name='حالة الشكوى'
+    )
+    
+    priority = models.CharField(
+        max_length=10,
+        verbose_name='أولوية الشكوى'
+    )
+    
+    category_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='معرف التصنيف'
+    )
+    
+    representative_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='معرف النائب'
+    )
+    
+    count = models.IntegerField(
+        default=0,
+        verbose_name='عدد الشكاوى'
+    )
+    
+    class Meta:
+        verbose_name = 'عداد شكاوى'
+        verbose_name_plural = 'عدادات الشكاوى'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['status', 'priority', 'category_id', 'representative_id'],
+                name='unique_complaint_stat_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['representative_id']),
+        ]
+    
+    def __str__(self):
+        return f'{self.status}/{self.priority}/{self.category_id}/{self.representative_id}: {self.count}'
+    
+    @staticmethod
+    def normalize_bucket(values):
+        """تحويل قيم الخانة إلى مفتاح ثابت (0 بدلاً من NULL)"""
+        status, priority, category_id, representative_id = values
+        return (status, priority, category_id or 0, representative_id or 0)
+    
+    @classmethod
+    def move(cls, old_bucket, new_bucket):
+        """نقل شكوى من خانة إلى أخرى (None للإنشاء أو الحذف)"""
+        if old_bucket == new_bucket:
+            return
+        
+        deltas = {}
+        if old_bucket is not None:
+            deltas[old_bucket] = deltas.get(old_bucket, 0) - 1
+        if new_bucket is not None:
+            deltas[new_bucket] = deltas.get(new_bucket, 0) + 1
+        
+        cls.apply_deltas(deltas)
+    
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """تطبيق فروقات على عدة خانات (مرتبة لتجنب الـ deadlock)"""
+        for bucket in sorted(deltas):
+            delta = deltas[bucket]
+            if not delta:
+                continue
+            
+            status, priority, category_id, representative_id = bucket
+            lookup = {
+                'status': status,
+                'priority': priority,
+                'category_id': category_id,
+                'representative_id': representative_id,
+            }
+            
+            if cls.objects.filter(**lookup).update(count=models.F('count') + delta):
+                continue
+            
+            try:
+                with transaction.atomic():
+                    cls.objects.create(count=delta, **lookup)
+            except IntegrityError:
+                cls.objects.filter(**lookup).update(count=models.F('count') + delta)
+    
+    @classmethod
+    def merge_category(cls, category_id):
+        """نقل خانات تصنيف إلى "بدون تصنيف" (0) عند حذفه"""
+        rows = list(
+            cls.objects.select_for_update()
+            .filter(category_id=category_id)
+            .values_list('status', 'priority', 'representative_id', 'count')
+        )
+        if not rows:
+            return
+        
+        cls.objects.filter(category_id=category_id).delete()
+        
+        deltas = {}
+        for status, priority, representative_id, count in rows:
+            bucket = (status, priority, 0, representative_id)
+            deltas[bucket] = deltas.get(bucket, 0) + count
+        cls.apply_deltas(deltas)
+
+
+
+class ComplaintExportJob(models.Model):
+    """مهمة تصدير أرشيف مقسمة إلى أجزاء (شرائح زمنية) تُعالج بالتوازي"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'في الانتظار'),
+        ('running', 'قيد التنفيذ'),
+        ('completed', 'مكتملة'),
+        ('failed', 'فشلت'),
+    ]
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name='معرف المهمة'
+    )
+    
+    requested_by_id = models.PositiveIntegerField(
+        verbose_name='معرف طالب التصدير'
+    )
+    
+    filters = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='معايير التصفية'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='حالة المهمة'
+    )
+    
+    manifest_path = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name='مسار ملف الفهرس'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='تاريخ الإنشاء'
+    )
+    
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='تاريخ الاكتمال'
+    )
+    
+    class Meta:
+        verbose_name = 'مهمة تصدير'
+        verbose_name_plural = 'مهام التصدير'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f'{self.id} ({self.get_status_display()})'
+
+
+class ComplaintExportShard(models.Model):
+    """
+    جزء من مهمة التصدير: الشكاوى في الفترة [range_start, range_end)
+    
+    الجزء المكتمل لا يُعاد تصديره عند إعادة المحاولة
+    """
+    
+    STATUS_CHOICES = ComplaintExportJob.STATUS_CHOICES
+    
+    job = models.ForeignKey(
+        ComplaintExportJob,
+        on_delete=models.CASCADE,
+        related_name='shards',
+        verbose_name='مهمة التصدير'
+    )
+    
+    index = models.PositiveIntegerField(
+        verbose_name='رقم الجزء'
+    )
+    
+    range_start = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='بداية الفترة'
+    )
+    
+    range_end = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='نهاية الفترة (غير مشمولة)'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='حالة الجزء'
+    )
+    
+    file_path = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name='مسار ملف الجزء'
+    )
+    
+    complaints_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='عدد الشكاوى'
+    )
+    
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='عدد المحاولات'
+    )
+    
+    error = models.TextField(
+        blank=True,
+        verbose_name='آخر خطأ'
+    )
+    
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='تاريخ الاكتمال'
+    )
+    
+    class Meta:
+        verbose_name = 'جزء تصدير'
+        verbose_name_plural = 'أجزاء التصدير'
+        ordering = ['job', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'index'], name='unique_export_shard_index'),
+        ]
+    
+    def __str__(self):
+        return f'{self.job_id} #{self.index} ({self.get_status_display()})'
+    
+    def filter_queryset(self, queryset):
+        """تقييد الاستعلام بفترة الجزء"""
+        if self.range_start is not None:
+            queryset = queryset.filter(created_at__gte=self.range_start)
+        if self.range_end is not None:
+            queryset = queryset.filter(created_at__lt=self.range_end)
+        return queryset
+
+
+class OutboxEvent(models.Model):
+    """
+    حدث بانتظار الإرسال لخدمة أخرى (الإشعارات، الإحصائيات)
+    
+    يُكتب في نفس معاملة تغيير الشكوى، ويرسله الموزع على دفعات لاحقاً (مرة على الأقل).
+    event_id يُرسل كمفتاح عدم تكرار حتى تتجاهل الخدمة الحدث المكرر عند إعادة المحاولة
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'بانتظار الإرسال'),
+        ('delivered', 'تم الإرسال'),
+        ('failed', 'فشل'),
+    ]
+    
+    DESTINATION_CHOICES = [
+        ('notifications', 'خدمة الإشعارات'),
+        ('statistics', 'خدمة الإحصائيات'),
+    ]
+    
+    event_id = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+        verbose_name='معرف الحدث'
+    )
+    
+    destination = models.CharField(
+        max_length=30,
+        choices=DESTINATION_CHOICES,
+        verbose_name='الخدمة المستقبلة'
+    )
+    
+    event_type = models.CharField(
+        max_length=50,
+        verbose_name='نوع الحدث'
+    )
+    
+    payload = models.JSONField(
+        verbose_name='محتوى الحدث'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='حالة الإرسال'
+    )
+    
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='عدد المحاولات'
+    )
+    
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='موعد المحاولة التالية'
+    )
+    
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='آخر خطأ'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='تاريخ الإنشاء'
+    )
+    
+    delivered_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='تاريخ الإرسال'
+    )
+    
+    class Meta:
+        verbose_name = 'حدث صادر'
+        verbose_name_plural = 'الأحداث الصادرة'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['destination', 'status', 'available_at']),
+        ]
+    
+    def __str__(self):
+        return f'{self.event_type} -> {self.destination} ({self.get_status_display()})'
+
+
+class AttachmentUploadSession(models.Model):
+    """
+    جلسة رفع مرفقات مباشرة إلى التخزين
+    
+    الجلسة تحجز مسارات الملفات وتُعطي العميل روابط رفع موقعة، ثم يُنشئ إنهاؤها
+    (finalize) صفوف ComplaintAttachment للملفات المرفوعة دون مرورها بخادم التطبيق
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'بانتظار الرفع'),
+        ('finalized', 'مكتملة'),
+        ('expired', 'منتهية'),
+    ]
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name='معرف الجلسة'
+    )
+    
+    complaint = models.ForeignKey(
+        Complaint,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='الشكوى'
+    )
+    
+    created_by_id = models.PositiveIntegerField(
+        verbose_name='معرف منشئ الجلسة'
+    )
+    
+    # لكل ملف: الاسم الأصلي ومسار التخزين والحجم والنوع المعلنان والوصف
+    files = models.JSONField(
+        default=list,
+        verbose_name='الملفات'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='حالة الجلسة'
+    )
+    
+    expires_at = models.DateTimeField(
+        verbose_name='موعد الانتهاء'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='تاريخ الإنشاء'
+    )
+    
+    finalized_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='تاريخ الإنهاء'
+    )
+    
+    class Meta:
+        verbose_name = 'جلسة رفع مرفقات'
+        verbose_name_plural = 'جلسات رفع المرفقات'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+    
+    def __str__(self):
+        return f'{self.id} ({self.get_status_display()})'
+    
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
 # إضافة تصنيف للشكوى
 Complaint.add_to_class(
     'category',
@@ -488,3 +1061,15 @@ Complaint.add_to_class(
         verbose_name='التصنيف'
     )
 )
+
+
+def merge_category_counters(sender, instance, **kwargs):
+    """
+    حذف التصنيف يجعل شكاواه بدون تصنيف بتحديث جماعي (SET_NULL) لا يمر بـ Complaint.save
+
+    تُنقل خاناتها في العدادات إلى التصنيف 0 في نفس معاملة الحذف (ويشمل ذلك الحذف الجماعي من لوحة الإدارة)
+    """
+    ComplaintStatCounter.merge_category(instance.pk)
+
+
+pre_delete.connect(merge_category_counters, sender=ComplaintCategory)
@@ -0,0 +1,111 @@
+"""
+الإشعارات - منصة نائبك.كوم
+محتوى إشعارات الشكاوى، وإرسالها لخدمة الإشعارات عبر الصندوق الصادر مجمّعة لكل مستلم
+"""
+
+import uuid
+
+from .clients import get_client
+from .outbox import publish
+
+
+# المستلم حسب نوع الإشعار: النائب المُسند أو المواطن صاحب الشكوى
+NOTIFICATION_RECIPIENTS = {
+    'assigned': 'assigned_representative_id',
+    'accepted': 'citizen_id',
+    'rejected': 'citizen_id',
+    'on_hold': 'citizen_id',
+    'resolved': 'citizen_id',
+    'response_added': 'citizen_id',
+    'overdue_reminder': 'assigned_representative_id',
+}
+
+
+def build_notification(complaint, action, user_id):
+    """تحديد نوع الإشعار ومحتواه"""
+    
+    return {
+        'user_id': user_id,
+        'title': get_notification_title(action, complaint),
+        'message': get_notification_message(action, complaint),
+        'type': 'complaint_update',
+        'data': {
+            'complaint_id': str(complaint.id),
+            'action': action,
+            'reference_number': complaint.reference_number
+        }
+    }
+
+
+def get_notification_title(action, complaint):
+    """الحصول على عنوان الإشعار"""
+    
+    titles = {
+        'assigned': 'تم إسناد شكوى جديدة إليك',
+        'accepted': 'تم قبول شكواك',
+        'rejected': 'تم رفض شكواك',
+        'on_hold': 'تم تعليق شكواك مؤقتاً',
+        'resolved': 'تم حل شكواك',
+        'response_added': 'تم إضافة رد على شكواك',
+        'overdue_reminder': 'تذكير: انتهت فترة تعليق شكوى مُسندة إليك'
+    }
+    
+    return titles.get(action, 'تحديث على شكواك')
+
+
+def get_notification_message(action, complaint):
+    """الحصول على محتوى الإشعار"""
+    
+    messages = {
+        'assigned': f'تم إسناد الشكوى "{complaint.title}" إليك للمراجعة والرد عليها.',
+        'accepted': f'تم قبول شكواك "{complaint.title}" وسيتم العمل على حلها قريباً.',
+        'rejected': f'تم رفض شكواك "{complaint.title}". يمكنك مراجعة السبب في تفاصيل الشكوى.',
+        'on_hold': f'تم تعليق شكواك "{complaint.title}" مؤقتاً لمدة 3 أيام للدراسة.',
+        'resolved': f'تم حل شكواك "{complaint.title}". يمكنك مراجعة الحل في تفاصيل الشكوى.',
+        'response_added': f'تم إضافة رد جديد على شكواك "{complaint.title}".',
+        'overdue_reminder': f'انتهت فترة تعليق الشكوى "{complaint.title}". يرجى اتخاذ إجراء بشأنها.'
+    }
+    
+    return messages.get(action, f'تم تحديث شكواك "{complaint.title}".')
+
+
+def queue_notifications(action, complaints, using='default'):
+    """
+    كتابة إشعارات الشكاوى في الصندوق الصادر (داخل معاملة التغيير)
+
+    complaints كائنات بها id و title و reference_number وحقل المستلم.
+    الإجراءات بدون إشعار، والشكاوى بدون مستلم، تُتجاهل
+    """
+    recipient_field = NOTIFICATION_RECIPIENTS.get(action)
+    if recipient_field is None:
+        return []
+
+    payloads = []
+    for complaint in complaints:
+        recipient_id = getattr(complaint, recipient_field)
+        if recipient_id is not None:
+            payloads.append(build_notification(complaint, action, recipient_id))
+    return publish('notifications', 'complaint_update', payloads, using=using)
+
+
+def coalesce_by_recipient(events):
+    """تجميع الإشعارات لكل مستلم في طلب الدفعة"""
+    recipients = {}
+    for event in events:
+        recipients.setdefault(event.payload['user_id'], []).append(
+            {'event_id': str(event.event_id), **event.payload}
+        )
+    return [
+        {'user_id': recipient_id, 'notifications': notifications}
+        for recipient_id, notifications in recipients.items()
+    ]
+
+
+def send_notifications(events):
+    """إرسال دفعة لخدمة الإشعارات في طلب واحد (الخدمة تتجاهل event_id المكرر)"""
+    batch_key = uuid.uuid5(uuid.NAMESPACE_URL, ','.join(str(event.event_id) for event in events))
+    get_client('notifications').post(
+        '/api/v1/send-batch/',
+        json={'recipients': coalesce_by_recipient(events)},
+        headers={'Idempotency-Key': str(batch_key)},
+    )
@@ -0,0 +1,160 @@
+"""
+الأحداث الصادرة - منصة نائبك.كوم
+صندوق صادر عام للخدمات الأخرى: الحدث يُكتب في معاملة التغيير، والموزع يرسله على دفعات
+مع حد للطلبات المتزامنة لكل خدمة، ويعيد المحاولة حتى يصل (مرة على الأقل)
+"""
+
+import logging
+import random
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+# الخدمة المستقبلة: دالة الإرسال (تستقبل دفعة أحداث وترفع استثناء عند الفشل)،
+# وإعدادا عدد الدفعات المتزامنة وحجم الدفعة لها
+Destination = namedtuple('Destination', ['sender', 'concurrency_setting', 'batch_size_setting'])
+
+DESTINATIONS = {
+    'notifications': Destination(
+        'complaints.notifications.send_notifications', 'NOTIFICATIONS_CONCURRENCY', 'NOTIFICATIONS_BATCH_SIZE'
+    ),
+    'statistics': Destination(
+        'complaints.scores.send_score_updates', 'STATISTICS_CONCURRENCY', 'STATISTICS_BATCH_SIZE'
+    ),
+}
+
+# مفتاح يمنع جدولة أكثر من موزع خلال نافذة التجميع
+DISPATCH_SCHEDULED_KEY = 'complaints:outbox:dispatch-scheduled'
+
+def publish(destination, event_type, payloads, using='default'):
+    """
+    كتابة أحداث في الصندوق الصادر (داخل معاملة التغيير) ثم جدولة الموزع بعد نجاحها
+
+    payloads قائمة بمحتوى كل حدث، وتُرجع الأحداث المنشأة
+    """
+    events = [
+        OutboxEvent(destination=destination, event_type=event_type, payload=payload)
+        for payload in payloads
+    ]
+    if events:
+        OutboxEvent.objects.using(using).bulk_create(events)
+        transaction.on_commit(schedule_dispatch, using=using)
+    return events
+
+
+def schedule_dispatch(eta=None):
+    """
+    جدولة موزع واحد بعد نافذة التجميع (الأحداث خلال النافذة تُرسل معاً)
+
+    eta (اختياري) موعد لاحق، مثل موعد إعادة محاولة دفعة فاشلة
+    """
+    # tasks تستورد هذه الوحدة عبر transitions
+    from .tasks import dispatch_outbox_events
+
+    delay = settings.OUTBOX_COALESCE_SECONDS
+    if eta is not None:
+        delay = max(delay, (eta - timezone.now()).total_seconds())
+    if not cache.add(DISPATCH_SCHEDULED_KEY, 1, timeout=delay):
+        return
+    try:
+        dispatch_outbox_events.apply_async(countdown=delay)
+    except Exception:
+        # الأحداث محفوظة في الجدول: يرسلها الموزع الدوري (dispatch-outbox-events في
+        # CELERY_BEAT_SCHEDULE) بعد عودة طابور الرسائل، فلا يفشل الطلب بعد نجاح معاملته
+        logger.warning('Failed to schedule outbox dispatch', exc_info=True)
+        cache.delete(DISPATCH_SCHEDULED_KEY)
+
+
+def retry_delay(attempts):
+    """تأخير أسي مع عشوائية قبل المحاولة التالية"""
+    delay = min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def claim_batch(destination, now, batch_size):
+    """حجز دفعة مستحقة بتأجيل available_at حتى لا يرسلها موزع آخر بالتوازي"""
+    due = OutboxEvent.objects.filter(destination=destination, status='pending', available_at__lte=now)
+    lease_until = max(now, timezone.now()) + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        events = list(due.select_for_update(skip_locked=True)[:batch_size])
+        if events:
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(available_at=lease_until)
+    return events
+
+
+def mark_delivered(events):
+    OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+        status='delivered', delivered_at=timezone.now(), attempts=F('attempts') + 1
+    )
+
+
+def mark_failed(events, now, error):
+    """تأجيل الدفعة بتأخير أسي، وتعليمها فاشلة بعد آخر محاولة"""
+    attempts = max(event.attempts for event in events) + 1
+    batch = OutboxEvent.objects.filter(id__in=[event.id for event in events])
+    batch.update(
+        attempts=F('attempts') + 1,
+        available_at=now + retry_delay(attempts),
+        last_error=str(error),
+    )
+    batch.filter(attempts__gte=settings.OUTBOX_MAX_ATTEMPTS).update(status='failed')
+
+
+def dispatch_pending(now=None, destinations=None, batch_size=None):
+    """
+    إرسال الأحداث المستحقة لكل خدمة على دفعات حتى ينتهي المستحق منها
+
+    لكل خدمة حتى N دفعات متزامنة (الإرسال فقط في الخيوط، وتحديث الصفوف في الخيط الرئيسي).
+    فشل دفعة يوقف الخدمة في هذا التشغيل دون التأثير على باقي الخدمات
+    """
+    now = now or timezone.now()
+    names = list(destinations or DESTINATIONS)
+    senders = {name: import_string(DESTINATIONS[name].sender) for name in names}
+    limits = {name: getattr(settings, DESTINATIONS[name].concurrency_setting) for name in names}
+    batch_sizes = {name: batch_size or getattr(settings, DESTINATIONS[name].batch_size_setting) for name in names}
+    results = {name: {'delivered_count': 0, 'failed_count': 0} for name in names}
+
+    active = set(names)
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=sum(limits.values())) as pool:
+        while True:
+            for name in names:
+                while name in active and sum(1 for busy, _events in in_flight.values() if busy == name) < limits[name]:
+                    events = claim_batch(name, now, batch_sizes[name])
+                    if not events:
+                        active.discard(name)
+                        break
+                    in_flight[pool.submit(senders[name], events)] = (name, events)
+
+            if not in_flight:
+                break
+
+            done, _pending = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, events = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    mark_delivered(events)
+                    results[name]['delivered_count'] += len(events)
+                else:
+                    mark_failed(events, now, error)
+                    results[name]['failed_count'] += len(events)
+                    # الخدمة متعطلة: باقي دفعاتها تنتظر المحاولة التالية
+                    active.discard(name)
+
+    next_at = (
+        OutboxEvent.objects.filter(status='pending', destination__in=names)
+        .order_by('available_at').values_list('available_at', flat=True).first()
+    )
+    return {'destinations': results, 'next_at': next_at}
@@ -0,0 +1,221 @@
+"""
+ترقيم الصفحات بالمؤشر (Keyset) لخدمة الشكاوى - منصة نائبك.كوم
+
+كل صفحة تُجلب بشرط على مفتاح الترتيب المركب (مثل created_at, id) بدلاً من OFFSET،
+فتكون الصفحة مسحاً محدوداً على الفهرس المركب مهما كان عمقها
+"""
+
+import base64
+import json
+from collections import OrderedDict
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .search import SEARCH_RANK
+
+
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class KeysetPagination(BasePagination):
+    """
+    ترقيم بالمؤشر على مفتاح مركب (حقل الترتيب + المعرف)
+
+    المؤشر نص مُرمّز (base64) يحمل قيم مفتاح آخر/أول صف في الصفحة واتجاه التصفح.
+    يمكن للعميل إلغاء حساب العدد الكلي بتمرير ?count=false
+    """
+
+    ordering = ('-created_at', '-id')
+    # ترتيب الصلة الذي يضيفه البحث النصي (يُرتب به عند عدم طلب ترتيب صريح)
+    rank_annotation = None
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'المؤشر غير صالح.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+
+        self.count = queryset.count() if self.should_count(request) else None
+
+        reverse = False
+        if cursor is not None:
+            values, reverse = cursor
+            queryset = queryset.filter(self.build_keyset_filter(values, reverse))
+
+        order_by = self.reversed_ordering() if reverse else self.ordering
+        rows = list(queryset.order_by(*order_by)[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def should_count(self, request):
+        """هل يطلب العميل العدد الكلي؟ (مفعّل افتراضياً)"""
+        value = request.query_params.get(self.count_query_param, '')
+        return value.strip().lower() not in FALSE_VALUES
+
+    def get_ordering(self, request, queryset, view):
+        """
+        مفتاح الترتيب: الحقل المطلوب عبر OrderingFilter (إن وجد) ثم المعرف كفاصل ثابت
+
+        نتائج البحث المرتبة بالصلة (rank_annotation) تُرتب بها ما لم يطلب العميل ترتيباً صريحاً.
+        يجب أن تكون حقول الترتيب حقولاً محلية غير قابلة لأن تكون NULL
+        """
+        pk_name = queryset.model._meta.pk.name
+        for backend in getattr(view, 'filter_backends', []):
+            if not issubclass(backend, OrderingFilter):
+                continue
+
+            ranked = self.rank_annotation in queryset.query.annotations
+            if ranked and not request.query_params.get(backend.ordering_param):
+                return (f'-{self.rank_annotation}', f'-{pk_name}')
+
+            requested = backend().get_ordering(request, queryset, view)
+            if requested and requested[0] != self.ordering[0]:
+                field = requested[0]
+                tiebreaker = f'-{pk_name}' if field.startswith('-') else pk_name
+                return (field, tiebreaker)
+
+        return tuple(self.ordering)
+
+    def reversed_ordering(self):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+
+    def build_keyset_filter(self, values, reverse):
+        """بناء شرط (a < v1) OR (a = v1 AND b < v2) حسب اتجاه كل حقل"""
+        condition = Q()
+        equal = {}
+
+        for field, value in zip(self.ordering, values):
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+
+        return condition
+
+    def get_row_values(self, row):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if isinstance(row, dict):
+                value = row[name]
+            else:
+                value = getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return values
+
+    def encode_cursor(self, row, reverse):
+        payload = json.dumps({'v': self.get_row_values(row), 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            values = payload['v']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def build_cursor_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.build_cursor_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.build_cursor_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class ComplaintPagination(KeysetPagination):
+    """ترقيم قائمة الشكاوى على (created_at, id)"""
+
+    ordering = ('-created_at', '-id')
+    rank_annotation = SEARCH_RANK
+
+
+class ComplaintHistoryPagination(KeysetPagination):
+    """ترقيم سجل الشكاوى على (performed_at, id)"""
+
+    ordering = ('-performed_at', '-id')
+
+
+class ComplaintAttachmentPagination(KeysetPagination):
+    """ترقيم المرفقات على (uploaded_at, id)"""
+
+    ordering = ('uploaded_at', 'id')
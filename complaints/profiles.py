@@ -0,0 +1,194 @@
+"""
+بيانات المواطنين - منصة نائبك.كوم
+تخزين مؤقت لبيانات المواطن من خدمة المصادقة: مدة صلاحية لكل مدخل، وتخزين "غير موجود"،
+وإرجاع القيمة القديمة مع تحديثها في الخلفية، وجلب مجمّع لعدة مواطنين
+"""
+
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+import requests
+
+from .cache import bump_scope_versions, record_cache_access
+from .clients import get_client
+from .models import Complaint
+from .search import index_complaint
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KEY = 'complaints:citizen:{}'
+REFRESH_LOCK_KEY = 'complaints:citizen:{}:refreshing'
+
+
+def profile_key(citizen_id):
+    return PROFILE_KEY.format(citizen_id)
+
+
+def _entry(profile):
+    """
+    مدخل التخزين: البيانات (None للمواطن غير الموجود) وموعد انتهاء صلاحيتها
+
+    المدخل يبقى في التخزين بعد انتهاء الصلاحية لمدة CITIZEN_PROFILE_STALE_SECONDS
+    ليُرجع قديماً أثناء تحديثه
+    """
+    ttl = settings.CITIZEN_PROFILE_TTL if profile is not None else settings.CITIZEN_PROFILE_NEGATIVE_TTL
+    return {'profile': profile, 'fresh_until': time.time() + ttl}, ttl + settings.CITIZEN_PROFILE_STALE_SECONDS
+
+
+def store_profiles(profiles):
+    """تخزين نتائج الجلب (dict من المعرف إلى البيانات أو None)"""
+    entries = {}
+    for citizen_id, profile in profiles.items():
+        entry, timeout = _entry(profile)
+        entries.setdefault(timeout, {})[profile_key(citizen_id)] = entry
+    for timeout, values in entries.items():
+        cache.set_many(values, timeout=timeout)
+
+
+def fetch_profile(citizen_id):
+    """جلب مواطن واحد من خدمة المصادقة (None إذا لم يكن موجوداً)"""
+    try:
+        # بدون إعادة محاولة: طلب المستخدم ينتظر الرد
+        return get_client('auth').get(f'/api/v1/users/{citizen_id}/', retries=0).json()
+    except requests.HTTPError as error:
+        if error.response is not None and error.response.status_code == 404:
+            return None
+        raise
+
+
+def fetch_profiles(citizen_ids):
+    """جلب عدة مواطنين بطلب لكل دفعة؛ المعرفات غير المُرجعة تُعتبر غير موجودة"""
+    batch_size = settings.CITIZEN_PROFILE_BATCH_SIZE
+    profiles = {}
+    for start in range(0, len(citizen_ids), batch_size):
+        batch = citizen_ids[start:start + batch_size]
+        response = get_client('auth').get(
+            '/api/v1/users/', params={'ids': ','.join(str(citizen_id) for citizen_id in batch)}
+        )
+        found = {user['id']: user for user in response.json()['results']}
+        for citizen_id in batch:
+            profiles[citizen_id] = found.get(citizen_id)
+    return profiles
+
+
+def schedule_refresh(citizen_ids):
+    """تحديث المدخلات القديمة في الخلفية (مرة واحدة لكل مواطن حتى ينتهي التحديث)"""
+    # tasks تستورد هذه الوحدة
+    from .tasks import refresh_citizen_profiles
+
+    citizen_ids = [
+        citizen_id for citizen_id in citizen_ids
+        if cache.add(REFRESH_LOCK_KEY.format(citizen_id), 1, timeout=settings.CITIZEN_PROFILE_NEGATIVE_TTL)
+    ]
+    if not citizen_ids:
+        return
+    try:
+        refresh_citizen_profiles.delay(citizen_ids)
+    except Exception:
+        # القيمة القديمة تبقى صالحة للاستخدام حتى المحاولة التالية
+        logger.warning('Failed to schedule citizen profile refresh', exc_info=True)
+        cache.delete_many([REFRESH_LOCK_KEY.format(citizen_id) for citizen_id in citizen_ids])
+
+
+def get_citizen_profile(citizen_id):
+    """
+    بيانات المواطن (dict)، أو None إذا لم يكن موجوداً أو تعذر الوصول للخدمة
+
+    المدخل القديم يُرجع فوراً ويُحدث في الخلفية؛ وعند تعطل الخدمة يُستخدم القديم إن وُجد
+    """
+    entry = cache.get(profile_key(citizen_id))
+    record_cache_access('citizen_profiles', entry is not None)
+    if entry is not None:
+        if entry['fresh_until'] <= time.time():
+            schedule_refresh([citizen_id])
+        return entry['profile']
+
+    try:
+        profile = fetch_profile(citizen_id)
+    except (requests.RequestException, ValueError):
+        return None
+    store_profiles({citizen_id: profile})
+    return profile
+
+
+def get_many(citizen_ids, refresh_stale=True):
+    """
+    بيانات عدة مواطنين: dict من المعرف إلى البيانات (أو None)
+
+    المخزن يُقرأ بطلب واحد، والناقص يُجلب على دفعات من خدمة المصادقة.
+    refresh_stale=False يعيد جلب القديم مباشرة بدلاً من تحديثه في الخلفية (للمهام الخلفية)
+    """
+    citizen_ids = list(dict.fromkeys(citizen_ids))
+    entries = cache.get_many([profile_key(citizen_id) for citizen_id in citizen_ids])
+    now = time.time()
+
+    profiles = {}
+    missing = []
+    stale = []
+    for citizen_id in citizen_ids:
+        entry = entries.get(profile_key(citizen_id))
+        record_cache_access('citizen_profiles', entry is not None)
+        if entry is None or (not refresh_stale and entry['fresh_until'] <= now):
+            missing.append(citizen_id)
+            continue
+        if entry['fresh_until'] <= now:
+            stale.append(citizen_id)
+        profiles[citizen_id] = entry['profile']
+
+    if missing:
+        fetched = fetch_profiles(missing)
+        store_profiles(fetched)
+        profiles.update(fetched)
+    if stale:
+        schedule_refresh(stale)
+
+    return profiles
+
+
+def refresh_profiles(citizen_ids):
+    """إعادة جلب مدخلات المواطنين وتخزينها (يُستدعى من مهمة التحديث في الخلفية)"""
+    try:
+        profiles = fetch_profiles(list(citizen_ids))
+        store_profiles(profiles)
+        return profiles
+    finally:
+        cache.delete_many([REFRESH_LOCK_KEY.format(citizen_id) for citizen_id in citizen_ids])
+
+
+def sync_citizen_details(queryset=None, chunk_size=None):
+    """
+    تحديث الاسم والبريد المنسوخين في الشكاوى من بيانات المواطنين (على دفعات من المواطنين)
+
+    تُحدث الشكاوى التي تغيرت بياناتها فقط، وتُرجع عدد الشكاوى المحدثة
+    """
+    queryset = Complaint.objects.all() if queryset is None else queryset
+    chunk_size = chunk_size or settings.CITIZEN_PROFILE_BATCH_SIZE
+    citizen_ids = list(queryset.order_by('citizen_id').values_list('citizen_id', flat=True).distinct())
+
+    updated_count = 0
+    for start in range(0, len(citizen_ids), chunk_size):
+        profiles = get_many(citizen_ids[start:start + chunk_size], refresh_stale=False)
+        profiles = {citizen_id: profile for citizen_id, profile in profiles.items() if profile}
+
+        changed = []
+        for complaint in queryset.filter(citizen_id__in=profiles):
+            profile = profiles[complaint.citizen_id]
+            name = profile.get('name', complaint.citizen_name)
+            email = profile.get('email', complaint.citizen_email)
+            if (name, email) != (complaint.citizen_name, complaint.citizen_email):
+                complaint.citizen_name, complaint.citizen_email = name, email
+                changed.append(complaint)
+
+        if changed:
+            Complaint.objects.bulk_update(changed, ['citizen_name', 'citizen_email'])
+            for complaint in changed:
+                index_complaint(complaint)
+            bump_scope_versions(
+                {complaint.citizen_id for complaint in changed},
+                {complaint.assigned_representative_id for complaint in changed},
+            )
+            updated_count += len(changed)
+
+    return updated_count
@@ -0,0 +1,40 @@
+"""
+عرض JSON السريع - منصة نائبك.كوم
+JSONRenderer عبر orjson (إن كانت مثبتة) بنفس مخرجات JSONRenderer الافتراضي
+للمعرفات والتواريخ والنصوص العربية، مع الرجوع للافتراضي عند عدم توفرها
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson اختيارية
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    نفس JSONRenderer بصيغته المختصرة (بدون مسافات، والعربية دون ترميز \\u)
+
+    UUID و datetime (مع Z بدلاً من +00:00) تُكتب مباشرة في orjson، وباقي الأنواع
+    (Decimal والنصوص المترجمة وغيرها) عبر JSONEncoder الخاص بـ DRF. الطلبات بمسافات
+    بادئة (indent) أو بإعدادات غير الافتراضية تستخدم JSONRenderer الافتراضي
+    """
+
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=JSONEncoder().default, option=self.options)
+
+        # نفس ترميز JSONRenderer لفاصلي الأسطر حتى يبقى الناتج صالحاً في JavaScript
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,89 @@
+"""
+الاحتفاظ بالمرفقات - منصة نائبك.كوم
+حذف المرفقات القديمة على دفعات عبر واجهة التخزين (محلي أو بعيد)
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .cache import bump_all_versions
+from .models import ComplaintAttachment
+
+
+logger = logging.getLogger(__name__)
+
+
+def expired_attachments(now=None, retention_days=None):
+    """مرفقات الشكاوى المحلولة منذ أكثر من مدة الاحتفاظ"""
+    now = now or timezone.now()
+    retention_days = retention_days or settings.COMPLAINTS_ATTACHMENT_RETENTION_DAYS
+    return ComplaintAttachment.objects.filter(
+        complaint__status='resolved',
+        complaint__resolved_at__lt=now - timezone.timedelta(days=retention_days)
+    )
+
+
+def _delete_blob(storage, name):
+    """حذف ملف من التخزين، وإرجاع False عند الفشل حتى يبقى صفه لمحاولة لاحقة"""
+    try:
+        storage.delete(name)
+    except Exception:
+        logger.exception('Failed to delete attachment blob %s', name)
+        return False
+    return True
+
+
+def cleanup_attachments(queryset, chunk_size=None, max_deletes=None, dry_run=False,
+                        storage=None, workers=None):
+    """
+    حذف المرفقات المطابقة على دفعات مرتبة بالمعرف
+
+    لكل دفعة: حذف الملفات بالتوازي عبر storage.delete (بدون .path)، ثم حذف الصفوف
+    بـ DELETE ... WHERE id IN واحد. الصف الذي فشل حذف ملفه يبقى ليُعاد في التشغيل التالي.
+    max_deletes يحد عدد المرفقات في التشغيل الواحد، و dry_run يحسب فقط دون حذف
+    """
+    chunk_size = chunk_size or settings.COMPLAINTS_CLEANUP_CHUNK_SIZE
+    storage = storage or default_storage
+    workers = workers or settings.COMPLAINTS_STORAGE_DELETE_WORKERS
+
+    matches = queryset.order_by('id').values_list('id', 'file', 'file_size')
+    deleted_count = 0
+    failed_count = 0
+    bytes_reclaimed = 0
+    last_id = None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while max_deletes is None or deleted_count < max_deletes:
+            limit = chunk_size if max_deletes is None else min(chunk_size, max_deletes - deleted_count)
+            page = matches if last_id is None else matches.filter(id__gt=last_id)
+            rows = list(page[:limit])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            if dry_run:
+                deleted = rows
+            else:
+                # المرفق بدون ملف لا يحتاج حذفاً من التخزين
+                results = pool.map(lambda row: not row[1] or _delete_blob(storage, row[1]), rows)
+                deleted = [row for row, ok in zip(rows, results) if ok]
+                failed_count += len(rows) - len(deleted)
+                if deleted:
+                    # لا علاقات أو إشارات على المرفقات، فيُنفذ Django حذفاً مباشراً باستعلام واحد
+                    ComplaintAttachment.objects.filter(id__in=[row[0] for row in deleted]).delete()
+
+            deleted_count += len(deleted)
+            bytes_reclaimed += sum(row[2] or 0 for row in deleted)
+
+    if deleted_count and not dry_run:
+        bump_all_versions()
+
+    return {
+        'deleted_count': deleted_count,
+        'failed_count': failed_count,
+        'bytes_reclaimed': bytes_reclaimed,
+        'dry_run': dry_run,
+    }
@@ -0,0 +1,29 @@
+"""
+نقاط النواب - منصة نائبك.كوم
+أحداث منح النقاط لخدمة الإحصائيات عبر الصندوق الصادر
+"""
+
+from .clients import get_client
+from .outbox import publish
+
+
+def publish_score_award(representative_id, points, thank_you_message, complaint_id=None, using='default'):
+    """كتابة حدث منح النقاط للنائب (داخل معاملة حل الشكوى)"""
+    return publish('statistics', 'score_awarded', [{
+        'representative_id': representative_id,
+        'points': points,
+        'reason': 'complaint_resolved',
+        'thank_you_message': thank_you_message,
+        'complaint_id': str(complaint_id) if complaint_id else None,
+    }], using=using)
+
+
+def send_score_updates(events):
+    """إرسال أحداث النقاط (طلب لكل حدث بمفتاح عدم التكرار Idempotency-Key)"""
+    client = get_client('statistics')
+    for event in events:
+        client.post(
+            '/api/v1/update-score/',
+            json=event.payload,
+            headers={'Idempotency-Key': str(event.event_id)},
+        )
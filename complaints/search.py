@@ -0,0 +1,247 @@
+"""
+البحث في الشكاوى - منصة نائبك.كوم
+توحيد النص العربي وفهرسة البحث النصي الكامل حسب نوع قاعدة البيانات
+"""
+
+import re
+import uuid
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, Func, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Lower
+
+
+# التشكيل (تنوين الفتح .. السكون) والألف الخنجرية والتطويل
+TASHKEEL_RE = re.compile('[\u064B-\u0652\u0670\u0640]')
+
+ARABIC_LETTERS = {
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+}
+ARABIC_LETTER_MAP = str.maketrans(ARABIC_LETTERS)
+
+# رقم المرجع بصيغة COMP-YYYYMMDD-XXXXXXXX (انظر Complaint.save)
+REFERENCE_NUMBER_RE = re.compile(r'^COMP-\d{8}-[0-9A-F]{8}$', re.IGNORECASE)
+
+# جزء من رقم المرجع: كلمة واحدة من حروف لاتينية وأرقام وشرطات تحتوي رقماً
+REFERENCE_FRAGMENT_RE = re.compile(r'^[A-Z-]*\d[0-9A-Z-]*$', re.IGNORECASE)
+
+# اسم ترتيب الصلة المضاف لنتائج البحث (يرتب به الترقيم عند عدم طلب ترتيب آخر)
+SEARCH_RANK = 'search_rank'
+
+# الحقول المفهرسة مع أوزانها: العنوان > المحتوى > اسم المواطن
+SEARCH_FIELD_WEIGHTS = (
+    ('title', 'A'),
+    ('content', 'B'),
+    ('citizen_name', 'C'),
+)
+SEARCH_FIELDS = tuple(field for field, _weight in SEARCH_FIELD_WEIGHTS)
+
+
+def normalize_arabic(text):
+    """توحيد النص العربي: حذف التشكيل والتطويل وتوحيد أشكال الألف والياء والتاء المربوطة"""
+    if not text:
+        return ''
+    text = TASHKEEL_RE.sub('', text)
+    return text.translate(ARABIC_LETTER_MAP).lower()
+
+
+def is_reference_number(term):
+    """هل نص البحث رقم مرجع كامل؟"""
+    return bool(REFERENCE_NUMBER_RE.match(term.strip()))
+
+
+def is_reference_fragment(term):
+    """هل نص البحث قد يكون جزءاً من رقم مرجع (مثل 20240301 أو 1A2B)؟"""
+    return bool(REFERENCE_FRAGMENT_RE.match(term.strip()))
+
+
+def normalized_column(field):
+    """نفس normalize_arabic على عمود في PostgreSQL (للفهرسة المجمّعة باستعلام واحد)"""
+    without_tashkeel = Func(
+        Coalesce(F(field), Value('')), Value(TASHKEEL_RE.pattern), Value(''), Value('g'),
+        function='REGEXP_REPLACE', output_field=TextField()
+    )
+    return Lower(Func(
+        without_tashkeel, Value(''.join(ARABIC_LETTERS)), Value(''.join(ARABIC_LETTERS.values())),
+        function='TRANSLATE', output_field=TextField()
+    ))
+
+
+class PostgresSearchBackend:
+    """بحث نصي كامل عبر عمود tsvector موزون مع فهرس GIN"""
+
+    vendor = 'postgresql'
+
+    def weighted_vector(self, expressions):
+        vector = None
+        for (_field, weight), expression in zip(SEARCH_FIELD_WEIGHTS, expressions):
+            part = SearchVector(expression, weight=weight, config=settings.COMPLAINTS_SEARCH_CONFIG)
+            vector = part if vector is None else vector + part
+        return vector
+
+    def build_vector(self, complaint):
+        """المتجه من قيم الشكوى بعد توحيدها في Python"""
+        return self.weighted_vector(Value(normalize_arabic(getattr(complaint, field))) for field in SEARCH_FIELDS)
+
+    def column_vector(self):
+        """نفس المتجه محسوباً من أعمدة الصف في قاعدة البيانات"""
+        return self.weighted_vector(normalized_column(field) for field in SEARCH_FIELDS)
+
+    def index(self, complaint, using):
+        type(complaint)._default_manager.using(using).filter(pk=complaint.pk).update(
+            search_vector=self.build_vector(complaint)
+        )
+
+    def index_many(self, complaints, using):
+        """فهرسة دفعة بـ UPDATE واحد من أعمدة الصفوف"""
+        if not complaints:
+            return
+        type(complaints[0])._default_manager.using(using).filter(
+            pk__in=[complaint.pk for complaint in complaints]
+        ).update(search_vector=self.column_vector())
+
+    def remove(self, complaint, using):
+        # الصف نفسه يحمل العمود فيُحذف معه
+        pass
+
+    def reset(self, using):
+        pass
+
+    def is_available(self, using):
+        return True
+
+    def search(self, queryset, term, extra=None):
+        """
+        الشكاوى المطابقة مع ترتيب صلتها (SEARCH_RANK) حسب أوزان الحقول
+
+        extra شرط إضافي تُقبل به الشكوى حتى دون مطابقة النص (مثل جزء رقم المرجع)
+        """
+        query = SearchQuery(
+            normalize_arabic(term),
+            config=settings.COMPLAINTS_SEARCH_CONFIG,
+            search_type='plain'
+        )
+        condition = Q(search_vector=query)
+        if extra is not None:
+            condition |= extra
+        return queryset.annotate(**{SEARCH_RANK: SearchRank(F('search_vector'), query)}).filter(condition)
+
+
+class SQLiteFTSBackend:
+    """
+    بحث عبر جدول ظل FTS5 بمُقسِّم trigram (لبيئات التطوير والحافة على SQLite)
+
+    الجدول يحمل النص الموحّد لكل شكوى ويُحدّث من Complaint.save و delete.
+    الكلمات الأقصر من 3 أحرف لا يخدمها فهرس trigram فتُطابق بمسح جدول الظل فقط
+    """
+
+    vendor = 'sqlite'
+    table = 'complaints_complaint_fts'
+    min_trigram_length = 3
+
+    def __init__(self):
+        self._available = {}
+
+    def create_table(self, cursor):
+        columns = ', '.join(SEARCH_FIELDS)
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+            f"USING fts5(complaint_id UNINDEXED, {columns}, tokenize='trigram')"
+        )
+
+    def is_available(self, using):
+        if not settings.COMPLAINTS_SQLITE_FTS:
+            return False
+
+        if using not in self._available:
+            connection = connections[using]
+            with connection.cursor() as cursor:
+                self._available[using] = self.table in connection.introspection.table_names(cursor)
+        return self._available[using]
+
+    @staticmethod
+    def rowid_for(pk):
+        """rowid ثابت مشتق من UUID (60 بت) حتى يكون الحذف والاستبدال بحثاً على المفتاح لا مسحاً"""
+        return int(uuid.UUID(str(pk)).hex[:15], 16)
+
+    def _row(self, complaint):
+        complaint_id = uuid.UUID(str(complaint.pk))
+        return [self.rowid_for(complaint_id), complaint_id.hex] + [
+            normalize_arabic(getattr(complaint, field)) for field in SEARCH_FIELDS
+        ]
+
+    def index(self, complaint, using):
+        self.index_many([complaint], using)
+
+    def index_many(self, complaints, using):
+        rows = [self._row(complaint) for complaint in complaints]
+        columns = ', '.join(('rowid', 'complaint_id') + SEARCH_FIELDS)
+        placeholders = ', '.join(['%s'] * (len(SEARCH_FIELDS) + 2))
+
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [[row[0]] for row in rows])
+            cursor.executemany(f'INSERT INTO {self.table} ({columns}) VALUES ({placeholders})', rows)
+
+    def remove(self, complaint, using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [self.rowid_for(complaint.pk)])
+
+    def reset(self, using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, queryset, term, extra=None):
+        terms = normalize_arabic(term).split()
+        if not terms:
+            return queryset
+
+        if all(len(word) >= self.min_trigram_length for word in terms):
+            match = ' AND '.join('"{}"'.format(word.replace('"', '""')) for word in terms)
+            sql = f'SELECT complaint_id FROM {self.table} WHERE {self.table} MATCH %s'
+            params = [match]
+        else:
+            any_field = ' OR '.join(f'instr({field}, %s) > 0' for field in SEARCH_FIELDS)
+            sql = f'SELECT complaint_id FROM {self.table} WHERE ' + ' AND '.join(
+                f'({any_field})' for _word in terms
+            )
+            params = [word for word in terms for _field in SEARCH_FIELDS]
+
+        condition = Q(pk__in=RawSQL(sql, params))
+        if extra is not None:
+            condition |= extra
+        return queryset.filter(condition)
+
+
+SEARCH_BACKENDS = {
+    PostgresSearchBackend.vendor: PostgresSearchBackend(),
+    SQLiteFTSBackend.vendor: SQLiteFTSBackend(),
+}
+
+
+def get_search_backend(using='default'):
+    """محرك البحث المناسب لقاعدة البيانات (None يعني استخدام SearchFilter الافتراضي)"""
+    backend = SEARCH_BACKENDS.get(connections[using].vendor)
+    if backend is None or not backend.is_available(using):
+        return None
+    return backend
+
+
+def index_complaint(complaint, using='default'):
+    """تحديث فهرس البحث لشكوى بعد حفظها"""
+    backend = get_search_backend(using)
+    if backend is not None:
+        backend.index(complaint, using)
+
+
+def remove_complaint(complaint, using='default'):
+    """حذف الشكوى من فهرس البحث"""
+    backend = get_search_backend(using)
+    if backend is not None:
+        backend.remove(complaint, using)
@@ -2,12 +2,22 @@
 Serializers لخدمة الشكاوى - منصة نائبك.كوم
 """
 
+import os
+from urllib.parse import urlencode
 from rest_framework import serializers
 from django.conf import settings
+from django.db.models import Prefetch
+from django.urls import reverse
+from django.utils import timezone
 from .models import (
-    Complaint, ComplaintAttachment, ComplaintHistory, 
+    AttachmentUploadSession, Complaint, ComplaintAttachment, ComplaintHistory, 
     ComplaintCategory, ComplaintTemplate
 )
+from .pagination import ComplaintAttachmentPagination, ComplaintHistoryPagination
+from .transitions import (
+    BULK_TRANSITIONS, HOLD_DURATION, STATUS_HISTORY_ACTIONS, SystemActor, TransitionConflict,
+    compare_and_swap, is_status_change_allowed
+)
 
 
 class ComplaintAttachmentSerializer(serializers.ModelSerializer):
@@ -100,12 +110,26 @@ class ComplaintListSerializer(serializers.ModelSerializer):
 
 
 class ComplaintDetailSerializer(serializers.ModelSerializer):
-    """Serializer لتفاصيل الشكوى الكاملة"""
+    """
+    Serializer لتفاصيل الشكوى الكاملة
+    
+    السجل (الأحدث أولاً) والمرفقات مضمّنة بحد COMPLAINT_DETAIL_EMBED_LIMIT مع رابط مؤشر
+    لبقيتها في قائمتها (history_next و attachments_next)، إلا العلاقات المطلوبة كاملة
+    في context['expand']
+    """
+    
+    # العلاقة: (Serializer العنصر، ترقيم قائمتها، اسم مسار القائمة)
+    EMBEDDED_RELATIONS = {
+        'history': (ComplaintHistorySerializer, ComplaintHistoryPagination, 'history-list'),
+        'attachments': (ComplaintAttachmentSerializer, ComplaintAttachmentPagination, 'attachment-list'),
+    }
     
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     priority_display = serializers.CharField(source='get_priority_display', read_only=True)
-    attachments = ComplaintAttachmentSerializer(many=True, read_only=True)
-    history = ComplaintHistorySerializer(many=True, read_only=True)
+    attachments = serializers.SerializerMethodField()
+    attachments_next = serializers.SerializerMethodField()
+    history = serializers.SerializerMethodField()
+    history_next = serializers.SerializerMethodField()
     attachments_count = serializers.ReadOnlyField()
     days_since_created = serializers.ReadOnlyField()
     is_overdue = serializers.ReadOnlyField()
@@ -120,13 +144,81 @@ class ComplaintDetailSerializer(serializers.ModelSerializer):
             'assigned_by_admin_id', 'admin_response', 'representative_response',
             'resolution', 'resolved_at', 'created_at', 'updated_at', 'hold_until',
             'is_public', 'reference_number', 'points_awarded', 'thank_you_message',
-            'category', 'category_name', 'attachments', 'history', 'attachments_count',
-            'days_since_created', 'is_overdue'
+            'category', 'category_name', 'attachments', 'attachments_next', 'history',
+            'history_next', 'attachments_count', 'days_since_created', 'is_overdue'
         ]
         read_only_fields = [
             'id', 'reference_number', 'created_at', 'updated_at', 'attachments',
             'history', 'attachments_count', 'days_since_created', 'is_overdue'
         ]
+    
+    @classmethod
+    def embedded_queryset(cls, relation, expanded, manager=None):
+        """عناصر العلاقة بترتيب قائمتها: كاملة، أو الحد + 1 (لمعرفة وجود المزيد)"""
+        pagination_class = cls.EMBEDDED_RELATIONS[relation][1]
+        if manager is None:
+            manager = Complaint._meta.get_field(relation).related_model.objects
+        queryset = manager.order_by(*pagination_class.ordering)
+        if not expanded:
+            queryset = queryset[:settings.COMPLAINT_DETAIL_EMBED_LIMIT + 1]
+        return queryset
+    
+    @classmethod
+    def embedded_prefetches(cls, expand=()):
+        """Prefetch لكل علاقة مضمّنة (استعلام واحد لكل علاقة مهما كان حجمها)"""
+        return [
+            Prefetch(
+                relation,
+                queryset=cls.embedded_queryset(relation, relation in expand),
+                to_attr=f'embedded_{relation}',
+            )
+            for relation in cls.EMBEDDED_RELATIONS
+        ]
+    
+    def embedded_rows(self, instance, relation):
+        """(العناصر المضمّنة، هل توجد عناصر أخرى)"""
+        expanded = relation in self.context.get('expand', ())
+        attr = f'embedded_{relation}'
+        if not hasattr(instance, attr):
+            setattr(instance, attr, list(self.embedded_queryset(relation, expanded, getattr(instance, relation))))
+        rows = getattr(instance, attr)
+        
+        limit = settings.COMPLAINT_DETAIL_EMBED_LIMIT
+        if expanded or len(rows) <= limit:
+            return rows, False
+        return rows[:limit], True
+    
+    def serialize_relation(self, instance, relation):
+        rows, _has_more = self.embedded_rows(instance, relation)
+        serializer_class = self.EMBEDDED_RELATIONS[relation][0]
+        return serializer_class(rows, many=True, context=self.context).data
+    
+    def relation_next_link(self, instance, relation):
+        """رابط صفحة قائمة العلاقة التالية لآخر عنصر مضمّن (None إذا ضُمّنت كلها)"""
+        rows, has_more = self.embedded_rows(instance, relation)
+        if not has_more:
+            return None
+        
+        _serializer_class, pagination_class, url_name = self.EMBEDDED_RELATIONS[relation]
+        query = urlencode({
+            'complaint_id': instance.pk,
+            'cursor': pagination_class().encode_cursor(rows[-1], reverse=False),
+        })
+        url = f'{reverse(url_name)}?{query}'
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+    
+    def get_attachments(self, obj):
+        return self.serialize_relation(obj, 'attachments')
+    
+    def get_attachments_next(self, obj):
+        return self.relation_next_link(obj, 'attachments')
+    
+    def get_history(self, obj):
+        return self.serialize_relation(obj, 'history')
+    
+    def get_history_next(self, obj):
+        return self.relation_next_link(obj, 'history')
 
 
 class ComplaintCreateSerializer(serializers.ModelSerializer):
@@ -215,35 +307,49 @@ class ComplaintUpdateSerializer(serializers.ModelSerializer):
         ]
     
     def update(self, instance, validated_data):
-        """تحديث الشكوى مع تسجيل التغييرات في التاريخ"""
-        old_status = instance.status
-        new_status = validated_data.get('status', old_status)
+        """
+        تحديث الشكوى شرطياً (الأعمدة المتغيرة فقط) مع تسجيل تغيير الحالة في التاريخ
         
-        # تحديث الشكوى
-        complaint = super().update(instance, validated_data)
+        تغيير الحالة يجب أن يكون من الانتقالات المسموحة، ويفشل بـ 409 إذا تغيرت الشكوى أثناء الطلب
+        """
+        changes = {
+            field: value for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        }
+        if not changes:
+            return instance
+        
+        now = timezone.now()
+        old_status = instance.status
+        new_status = changes.get('status', old_status)
+        expected = {}
+        action = None
+        description = ''
         
-        # تسجيل التغيير في التاريخ إذا تغيرت الحالة
-        if old_status != new_status:
-            action_map = {
-                'assigned': 'assigned',
-                'accepted': 'accepted',
-                'rejected': 'rejected',
-                'on_hold': 'on_hold',
-                'resolved': 'resolved',
-                'closed': 'closed'
-            }
+        if new_status != old_status:
+            if not is_status_change_allowed(old_status, new_status):
+                raise serializers.ValidationError({
+                    'status': f'لا يمكن تغيير الحالة من "{instance.get_status_display()}" إلى "{new_status}".'
+                })
             
-            action = action_map.get(new_status, 'status_changed')
+            expected['status'] = old_status
+            if new_status == 'resolved' and not instance.resolved_at:
+                changes['resolved_at'] = now
+            if new_status == 'on_hold' and not instance.hold_until:
+                changes['hold_until'] = now + HOLD_DURATION
             
-            ComplaintHistory.objects.create(
-                complaint=complaint,
-                action=action,
-                description=f'تم تغيير حالة الشكوى من "{complaint.get_status_display()}" إلى "{complaint.get_status_display()}"',
-                performed_by_id=self.context['request'].user.id if 'request' in self.context else 0,
-                performed_by_name=self.context['request'].user.username if 'request' in self.context else 'النظام'
-            )
+            statuses = dict(Complaint.COMPLAINT_STATUS)
+            action = STATUS_HISTORY_ACTIONS.get(new_status, 'status_changed')
+            description = f'تم تغيير حالة الشكوى من "{statuses[old_status]}" إلى "{statuses[new_status]}"'
         
-        return complaint
+        changes['updated_at'] = now
+        request = self.context.get('request')
+        actor = request.user if request is not None else SystemActor()
+        
+        if not compare_and_swap(instance, changes, actor, expected, action, description):
+            raise TransitionConflict()
+        
+        return instance
 
 
 class ComplaintAssignSerializer(serializers.Serializer):
@@ -260,6 +366,37 @@ class ComplaintAssignSerializer(serializers.Serializer):
         return value
 
 
+class ComplaintBulkTransitionSerializer(serializers.Serializer):
+    """Serializer لتطبيق انتقال حالة على عدة شكاوى دفعة واحدة"""
+    
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=500
+    )
+    transition = serializers.ChoiceField(choices=BULK_TRANSITIONS)
+    representative_id = serializers.IntegerField(required=False, min_value=1)
+    representative_name = serializers.CharField(max_length=255, required=False)
+    notes = serializers.CharField(max_length=500, required=False, allow_blank=True)
+    reason = serializers.CharField(max_length=2000, required=False, allow_blank=True)
+    
+    def validate(self, attrs):
+        """الإسناد يتطلب بيانات النائب"""
+        if attrs['transition'] == 'assign':
+            missing = [
+                field for field in ('representative_id', 'representative_name')
+                if field not in attrs
+            ]
+            if missing:
+                raise serializers.ValidationError(
+                    {field: 'هذا الحقل مطلوب عند الإسناد.' for field in missing}
+                )
+        
+        # إزالة المعرفات المكررة مع الحفاظ على الترتيب
+        attrs['ids'] = list(dict.fromkeys(attrs['ids']))
+        return attrs
+
+
 class ComplaintResponseSerializer(serializers.Serializer):
     """Serializer للرد على الشكوى"""
     
@@ -285,9 +422,12 @@ class ComplaintStatsSerializer(serializers.Serializer):
     resolved_complaints = serializers.IntegerField()
     rejected_complaints = serializers.IntegerField()
     overdue_complaints = serializers.IntegerField()
+    complaints_by_status = serializers.DictField()
     complaints_by_category = serializers.DictField()
     complaints_by_priority = serializers.DictField()
-    recent_complaints = ComplaintListSerializer(many=True)
+    recent_complaints = serializers.ListField()
+    cached = serializers.BooleanField()
+    cache_age_seconds = serializers.IntegerField()
 
 
 class ComplaintExportSerializer(serializers.Serializer):
@@ -303,3 +443,57 @@ class ComplaintExportSerializer(serializers.Serializer):
     )
     category = serializers.IntegerField(required=False)
     include_attachments = serializers.BooleanField(default=True)
+
+
+class UploadFileSerializer(serializers.Serializer):
+    """Serializer لملف معلن في جلسة رفع مباشر"""
+    
+    name = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    content_type = serializers.ChoiceField(choices=settings.ALLOWED_ATTACHMENT_TYPES)
+    description = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    
+    def validate_name(self, value):
+        """التحقق من امتداد الملف (نفس امتدادات حقل المرفق)"""
+        extension = os.path.splitext(value)[1].lstrip('.').lower()
+        allowed = ComplaintAttachment._meta.get_field('file').validators[0].allowed_extensions
+        if extension not in allowed:
+            raise serializers.ValidationError(
+                'نوع الملف غير مدعوم. الأنواع المدعومة: صور (JPG, PNG, GIF), PDF, Word (DOC, DOCX)'
+            )
+        return value
+    
+    def validate_size(self, value):
+        """التحقق من حجم الملف"""
+        if value > settings.MAX_ATTACHMENT_SIZE:
+            raise serializers.ValidationError(
+                f'حجم الملف كبير جداً. الحد الأقصى هو {settings.MAX_ATTACHMENT_SIZE / (1024*1024):.1f} ميجابايت.'
+            )
+        return value
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    """Serializer لبدء جلسة رفع مباشر"""
+    
+    files = UploadFileSerializer(many=True, allow_empty=False, max_length=settings.MAX_ATTACHMENTS_PER_COMPLAINT)
+
+
+class AttachmentUploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer لجلسة الرفع (بدون مسارات التخزين الداخلية)"""
+    
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    files = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AttachmentUploadSession
+        fields = [
+            'id', 'complaint', 'status', 'status_display', 'files',
+            'expires_at', 'created_at', 'finalized_at'
+        ]
+        read_only_fields = fields
+    
+    def get_files(self, obj):
+        return [
+            {key: file[key] for key in ('name', 'size', 'content_type', 'description')}
+            for file in obj.files
+        ]
@@ -0,0 +1,233 @@
+"""
+محرك إحصائيات الشكاوى - منصة نائبك.كوم
+يقرأ العدادات من جدول ComplaintStatCounter (أو يحسبها في استعلام تجميعي واحد)
+ويخزن النتيجة مؤقتاً لكل نطاق مستخدم
+"""
+
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .cache import record_cache_access, scoped_key
+from .models import Complaint, ComplaintCategory, ComplaintStatCounter
+from .serializers import ComplaintListSerializer
+
+
+RECENT_COMPLAINTS_LIMIT = 10
+
+
+def overdue_condition(now):
+    """الشكاوى المتأخرة: المُعلَّمة متأخرة، أو المعلقة التي انتهت فترتها ولم تُعالج بعد"""
+    return Q(status='overdue') | Q(status='on_hold', hold_until__lt=now)
+
+
+def _empty_stats():
+    """قواميس العدادات الفارغة لجميع الحالات والأولويات"""
+    by_status = {value: 0 for value, _label in Complaint.COMPLAINT_STATUS}
+    by_priority = {value: 0 for value, _label in Complaint.PRIORITY_CHOICES}
+    return by_status, by_priority
+
+
+def _stats_aggregations(now):
+    """بناء عدادات التجميع الشرطي لجميع الحالات والأولويات والشكاوى المتأخرة"""
+    aggregations = {'total': Count('pk')}
+
+    for value, _label in Complaint.COMPLAINT_STATUS:
+        aggregations[f'status_{value}'] = Count('pk', filter=Q(status=value))
+
+    for value, _label in Complaint.PRIORITY_CHOICES:
+        aggregations[f'priority_{value}'] = Count('pk', filter=Q(priority=value))
+
+    aggregations['overdue'] = Count('pk', filter=overdue_condition(now))
+    return aggregations
+
+
+def compute_complaint_stats(queryset, now=None):
+    """حساب عدادات الشكاوى في مرور واحد على الجدول (GROUP BY التصنيف مع عدادات شرطية)"""
+    now = now or timezone.now()
+
+    rows = (
+        queryset.order_by()
+        .values('category__name')
+        .annotate(**_stats_aggregations(now))
+    )
+
+    by_status, by_priority = _empty_stats()
+    by_category = {}
+    total = 0
+    overdue = 0
+
+    for row in rows:
+        total += row['total']
+        overdue += row['overdue']
+        by_category[row['category__name']] = row['total']
+
+        for value in by_status:
+            by_status[value] += row[f'status_{value}']
+        for value in by_priority:
+            by_priority[value] += row[f'priority_{value}']
+
+    return {
+        'total_complaints': total,
+        'pending_complaints': by_status['pending'],
+        'assigned_complaints': by_status['assigned'],
+        'resolved_complaints': by_status['resolved'],
+        'rejected_complaints': by_status['rejected'],
+        'overdue_complaints': overdue,
+        'complaints_by_status': by_status,
+        'complaints_by_category': by_category,
+        'complaints_by_priority': {
+            value: count for value, count in by_priority.items() if count
+        },
+    }
+
+
+def compute_counter_stats(representative_id=None, now=None):
+    """
+    حساب الإحصائيات من جدول العدادات - O(عدد الخانات) بدلاً من مسح جدول الشكاوى
+
+    الشكاوى المتأخرة تعتمد على الوقت الحالي فتُحسب باستعلام منفصل على الفهرس
+    """
+    now = now or timezone.now()
+
+    counters = ComplaintStatCounter.objects.filter(count__gt=0)
+    overdue_queryset = Complaint.objects.filter(overdue_condition(now))
+    if representative_id is not None:
+        counters = counters.filter(representative_id=representative_id)
+        overdue_queryset = overdue_queryset.filter(assigned_representative_id=representative_id)
+
+    category_name = ComplaintCategory.objects.filter(pk=OuterRef('category_id')).values('name')[:1]
+    rows = counters.annotate(category_name=Subquery(category_name)).values_list(
+        'status', 'priority', 'category_name', 'count'
+    )
+
+    by_status, by_priority = _empty_stats()
+    by_category = {}
+    total = 0
+
+    for status, priority, name, count in rows:
+        total += count
+        by_status[status] = by_status.get(status, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
+        by_category[name] = by_category.get(name, 0) + count
+
+    return {
+        'total_complaints': total,
+        'pending_complaints': by_status['pending'],
+        'assigned_complaints': by_status['assigned'],
+        'resolved_complaints': by_status['resolved'],
+        'rejected_complaints': by_status['rejected'],
+        'overdue_complaints': overdue_queryset.order_by().count(),
+        'complaints_by_status': by_status,
+        'complaints_by_category': by_category,
+        'complaints_by_priority': {
+            value: count for value, count in by_priority.items() if count
+        },
+    }
+
+
+def _compute_scope_stats(queryset, scope):
+    """اختيار مصدر العدادات حسب النطاق (المواطن غير ممثل في خانات العدادات)"""
+    kind, _sep, user_id = scope.partition(':')
+
+    if kind == 'admin':
+        return compute_counter_stats()
+
+    if kind == 'representative':
+        return compute_counter_stats(representative_id=int(user_id))
+
+    return compute_complaint_stats(queryset)
+
+
+def live_counter_buckets():
+    """حساب العدادات الفعلية من جدول الشكاوى مباشرة"""
+    rows = (
+        Complaint.objects.order_by()
+        .values_list(*Complaint.STAT_BUCKET_FIELDS)
+        .annotate(total=Count('pk'))
+    )
+
+    buckets = {}
+    for row in rows:
+        bucket = ComplaintStatCounter.normalize_bucket(row[:-1])
+        buckets[bucket] = buckets.get(bucket, 0) + row[-1]
+    return buckets
+
+
+def stored_counter_buckets():
+    """العدادات المخزنة حالياً في جدول ComplaintStatCounter"""
+    return {
+        (status, priority, category_id, representative_id): count
+        for status, priority, category_id, representative_id, count in
+        ComplaintStatCounter.objects.filter(count__gt=0).values_list(
+            'status', 'priority', 'category_id', 'representative_id', 'count'
+        )
+    }
+
+
+def diff_counter_buckets():
+    """مقارنة العدادات المخزنة بالفعلية: {الخانة: (المخزن، الفعلي)} للخانات المختلفة فقط"""
+    live = live_counter_buckets()
+    stored = stored_counter_buckets()
+
+    return {
+        bucket: (stored.get(bucket, 0), live.get(bucket, 0))
+        for bucket in set(live) | set(stored)
+        if stored.get(bucket, 0) != live.get(bucket, 0)
+    }
+
+
+def rebuild_counters():
+    """إعادة بناء جدول العدادات بالكامل من جدول الشكاوى"""
+    with transaction.atomic():
+        # قفل صفوف الشكاوى يمنع الكتابات المتزامنة أثناء إعادة البناء
+        list(Complaint.objects.select_for_update().values_list('pk', flat=True))
+        buckets = live_counter_buckets()
+
+        ComplaintStatCounter.objects.all().delete()
+        ComplaintStatCounter.objects.bulk_create([
+            ComplaintStatCounter(
+                status=status,
+                priority=priority,
+                category_id=category_id,
+                representative_id=representative_id,
+                count=count,
+            )
+            for (status, priority, category_id, representative_id), count in buckets.items()
+        ])
+
+    return len(buckets)
+
+
+def get_complaint_stats(queryset, scope):
+    """
+    إرجاع إحصائيات النطاق من التخزين المؤقت أو حسابها من جديد
+
+    يعيد (الإحصائيات، هل هي من التخزين المؤقت، عمرها بالثواني). تُخزن مع أي تخزين مؤقت:
+    مدتها قصيرة (STATS_CACHE_TIMEOUT) وعمرها يُرسل للعميل، بخلاف استجابات CACHE_RESPONSES
+    """
+    cache_key = scoped_key('stats', scope)
+    entry = cache.get(cache_key)
+    record_cache_access('stats', entry is not None)
+
+    if entry is not None:
+        age = max(0, int(time.time() - entry['generated_at']))
+        return entry['stats'], True, age
+
+    stats = _compute_scope_stats(queryset, scope)
+    recent = (
+        queryset.select_related('category')
+        .with_attachments_count()
+        .order_by('-created_at')[:RECENT_COMPLAINTS_LIMIT]
+    )
+    stats['recent_complaints'] = list(ComplaintListSerializer(recent, many=True).data)
+
+    cache.set(
+        cache_key,
+        {'stats': stats, 'generated_at': time.time()},
+        settings.STATS_CACHE_TIMEOUT
+    )
+    return stats, False, 0
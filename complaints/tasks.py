@@ -2,153 +2,228 @@
 المهام غير المتزامنة لخدمة الشكاوى - منصة نائبك.كوم
 """
 
-import os
-import zipfile
-import tempfile
+import json
 from datetime import datetime
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
 from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
-from celery import shared_task
+from celery import chord, shared_task
 import requests
 
-from .models import Complaint, ComplaintAttachment
+from .models import Complaint, ComplaintExportJob, ComplaintExportShard
+from .exports import (
+    iter_complaints_csv, open_export_file, plan_export_ranges, write_complaints_zip
+)
+from .notifications import build_notification
+from .outbox import DISPATCH_SCHEDULED_KEY, dispatch_pending, publish, schedule_dispatch
+from .profiles import refresh_profiles, sync_citizen_details
+from .retention import cleanup_attachments, expired_attachments
+from .scores import publish_score_award
+from .transitions import claim_overdue_holds
+from .uploads import expire_upload_sessions
 
 
-@shared_task
-def create_complaints_export(user_id, filters):
-    """إنشاء ملف مضغوط يحتوي على الشكاوى والمرفقات"""
+# عدد الشكاوى بين كل تحديث لحالة مهمة التصدير
+EXPORT_PROGRESS_EVERY = 100
+
+
+def build_export_queryset(filters):
+    """الشكاوى المطابقة لمعايير التصدير مرتبة زمنياً"""
+    
+    queryset = Complaint.objects.defer('search_vector')
+    
+    if filters.get('date_from'):
+        queryset = queryset.filter(created_at__gte=filters['date_from'])
+    
+    if filters.get('date_to'):
+        queryset = queryset.filter(created_at__lte=filters['date_to'])
+    
+    if filters.get('status'):
+        queryset = queryset.filter(status__in=filters['status'])
+    
+    if filters.get('category'):
+        queryset = queryset.filter(category_id=filters['category'])
+    
+    return queryset.order_by('created_at', 'id')
+
+
+@shared_task(bind=True)
+def create_complaints_export(self, user_id, filters):
+    """إنشاء ملف مضغوط يحتوي على الشكاوى والمرفقات (يُكتب مباشرة في التخزين دون نسخة مؤقتة)"""
     
     try:
-        # تصفية الشكاوى حسب المعايير المحددة
-        queryset = Complaint.objects.all()
+        queryset = build_export_queryset(filters)
+        total = queryset.count()
+        export_path = f'exports/complaints_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
         
-        if filters.get('date_from'):
-            queryset = queryset.filter(created_at__gte=filters['date_from'])
+        def report_progress(done):
+            # تحديث حالة المهمة كل دفعة فقط لتقليل الكتابة في Result Backend
+            if self.request.id and (done % EXPORT_PROGRESS_EVERY == 0 or done == total):
+                self.update_state(state='PROGRESS', meta={'done': done, 'total': total})
         
-        if filters.get('date_to'):
-            queryset = queryset.filter(created_at__lte=filters['date_to'])
-        
-        if filters.get('status'):
-            queryset = queryset.filter(status__in=filters['status'])
+        with open_export_file(default_storage, export_path) as export_file:
+            write_complaints_zip(
+                export_file,
+                queryset,
+                include_attachments=filters.get('include_attachments', True),
+                progress=report_progress
+            )
         
-        if filters.get('category'):
-            queryset = queryset.filter(category_id=filters['category'])
+        # إرسال إشعار للمستخدم بجاهزية الملف
+        send_export_notification(user_id, export_path)
         
-        # إنشاء مجلد مؤقت
-        with tempfile.TemporaryDirectory() as temp_dir:
-            zip_path = os.path.join(temp_dir, f'complaints_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip')
-            
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                
-                # إضافة ملف CSV بتفاصيل الشكاوى
-                csv_content = generate_complaints_csv(queryset)
-                zip_file.writestr('complaints_list.csv', csv_content)
-                
-                # إضافة المرفقات إذا طُلب ذلك
-                if filters.get('include_attachments', True):
-                    for complaint in queryset:
-                        complaint_folder = f'complaint_{complaint.reference_number}_{complaint.citizen_name}'
-                        
-                        # إضافة تفاصيل الشكوى كملف نصي
-                        complaint_details = generate_complaint_details(complaint)
-                        zip_file.writestr(f'{complaint_folder}/details.txt', complaint_details)
-                        
-                        # إضافة المرفقات
-                        for attachment in complaint.attachments.all():
-                            if os.path.exists(attachment.file.path):
-                                zip_file.write(
-                                    attachment.file.path,
-                                    f'{complaint_folder}/attachments/{attachment.original_name}'
-                                )
-            
-            # رفع الملف المضغوط إلى التخزين السحابي
-            # TODO: رفع إلى Google Cloud Storage
-            
-            # إرسال إشعار للمستخدم بجاهزية الملف
-            send_export_notification(user_id, zip_path)
-            
-            return {'status': 'success', 'file_path': zip_path}
+        return {'status': 'success', 'file_path': export_path, 'total': total}
     
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
 
-def generate_complaints_csv(queryset):
-    """إنشاء ملف CSV بتفاصيل الشكاوى"""
+@shared_task
+def create_sharded_complaints_export(user_id, filters):
+    """تصدير أرشيف كبير على أجزاء زمنية تُعالج بالتوازي (group) ثم خطوة فهرس (chord)"""
     
-    import csv
-    import io
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # كتابة العناوين
-    writer.writerow([
-        'رقم المرجع', 'العنوان', 'المحتوى', 'الحالة', 'الأولوية',
-        'اسم المواطن', 'البريد الإلكتروني', 'النائب المُسند',
-        'تاريخ الإنشاء', 'تاريخ التحديث', 'تاريخ الحل'
-    ])
-    
-    # كتابة البيانات
-    for complaint in queryset:
-        writer.writerow([
-            complaint.reference_number,
-            complaint.title,
-            complaint.content,
-            complaint.get_status_display(),
-            complaint.get_priority_display(),
-            complaint.citizen_name,
-            complaint.citizen_email,
-            complaint.assigned_representative_name or 'غير مُسند',
-            complaint.created_at.strftime('%Y-%m-%d %H:%M'),
-            complaint.updated_at.strftime('%Y-%m-%d %H:%M'),
-            complaint.resolved_at.strftime('%Y-%m-%d %H:%M') if complaint.resolved_at else 'لم يتم الحل'
+    try:
+        queryset = build_export_queryset(filters)
+        job = ComplaintExportJob.objects.create(requested_by_id=user_id, filters=filters)
+        
+        ranges = plan_export_ranges(queryset, settings.COMPLAINTS_EXPORT_SHARD_SIZE, job.created_at)
+        ComplaintExportShard.objects.bulk_create([
+            ComplaintExportShard(job=job, index=index, range_start=start, range_end=end)
+            for index, (start, end) in enumerate(ranges)
         ])
+        
+        dispatch_export_job(job)
+        
+        return {'status': 'success', 'job_id': str(job.id), 'shards': len(ranges)}
     
-    return output.getvalue()
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
 
 
-def generate_complaint_details(complaint):
-    """إنشاء ملف نصي بتفاصيل الشكوى"""
+@shared_task
+def resume_complaints_export(job_id):
+    """إعادة محاولة مهمة تصدير: تُعاد الأجزاء غير المكتملة فقط"""
     
-    details = f"""
-تفاصيل الشكوى - {complaint.reference_number}
-=====================================
-
-العنوان: {complaint.title}
-الحالة: {complaint.get_status_display()}
-الأولوية: {complaint.get_priority_display()}
-
-بيانات المواطن:
-- الاسم: {complaint.citizen_name}
-- البريد الإلكتروني: {complaint.citizen_email}
+    try:
+        job = ComplaintExportJob.objects.get(id=job_id)
+    except ComplaintExportJob.DoesNotExist:
+        return {'status': 'error', 'message': 'مهمة التصدير غير موجودة'}
+    
+    if job.status == 'completed':
+        return {'status': 'success', 'manifest_path': job.manifest_path}
+    
+    shards = dispatch_export_job(job)
+    return {'status': 'success', 'job_id': str(job.id), 'shards': shards}
 
-المحتوى:
-{complaint.content}
 
-رابط يوتيوب: {complaint.youtube_link or 'لا يوجد'}
+def dispatch_export_job(job):
+    """جدولة الأجزاء غير المكتملة ثم خطوة الفهرس بعد انتهائها جميعاً"""
+    
+    shard_ids = list(job.shards.exclude(status='completed').values_list('id', flat=True))
+    
+    job.status = 'running'
+    job.save(update_fields=['status'])
+    
+    finalize = finalize_complaints_export.s(str(job.id))
+    if shard_ids:
+        chord(export_complaints_shard.s(shard_id) for shard_id in shard_ids)(finalize)
+    else:
+        finalize.delay([])
+    
+    return len(shard_ids)
 
-النائب المُسند: {complaint.assigned_representative_name or 'غير مُسند'}
-تاريخ الإسناد: {complaint.assigned_at.strftime('%Y-%m-%d %H:%M') if complaint.assigned_at else 'لم يتم الإسناد'}
 
-رد الأدمن:
-{complaint.admin_response or 'لا يوجد رد'}
+@shared_task
+def export_complaints_shard(shard_id):
+    """تصدير جزء واحد كأرشيف مستقل (الجزء المكتمل لا يُعاد)"""
+    
+    shard = ComplaintExportShard.objects.select_related('job').get(id=shard_id)
+    if shard.status == 'completed':
+        return {'status': 'success', 'index': shard.index, 'skipped': True}
+    
+    ComplaintExportShard.objects.filter(id=shard_id).update(
+        status='running', attempts=F('attempts') + 1
+    )
+    
+    try:
+        job = shard.job
+        queryset = shard.filter_queryset(build_export_queryset(job.filters))
+        file_path = f'exports/{job.id}/part-{shard.index:04d}.zip'
+        
+        complaints_count = queryset.count()
+        with open_export_file(default_storage, file_path) as export_file:
+            write_complaints_zip(
+                export_file,
+                queryset,
+                include_attachments=job.filters.get('include_attachments', True)
+            )
+    
+    except Exception as e:
+        ComplaintExportShard.objects.filter(id=shard_id).update(status='failed', error=str(e))
+        return {'status': 'error', 'index': shard.index, 'message': str(e)}
+    
+    ComplaintExportShard.objects.filter(id=shard_id).update(
+        status='completed',
+        file_path=file_path,
+        complaints_count=complaints_count,
+        error='',
+        completed_at=timezone.now()
+    )
+    return {'status': 'success', 'index': shard.index, 'skipped': False}
 
-رد النائب:
-{complaint.representative_response or 'لا يوجد رد'}
 
-الحل:
-{complaint.resolution or 'لم يتم تقديم حل'}
+@shared_task
+def finalize_complaints_export(results, job_id):
+    """كتابة ملف فهرس (manifest.json) يسرد أجزاء الأرشيف بعد اكتمالها"""
+    
+    job = ComplaintExportJob.objects.get(id=job_id)
+    shards = list(job.shards.all())
+    
+    failed = [shard.index for shard in shards if shard.status != 'completed']
+    if failed:
+        job.status = 'failed'
+        job.save(update_fields=['status'])
+        return {'status': 'error', 'failed_shards': failed}
+    
+    manifest = {
+        'job_id': str(job.id),
+        'created_at': job.created_at.isoformat(),
+        'filters': job.filters,
+        'total': sum(shard.complaints_count for shard in shards),
+        'parts': [
+            {
+                'index': shard.index,
+                'file_path': shard.file_path,
+                'complaints_count': shard.complaints_count,
+                'range_start': shard.range_start.isoformat() if shard.range_start else None,
+                'range_end': shard.range_end.isoformat() if shard.range_end else None,
+            }
+            for shard in shards
+        ],
+    }
+    
+    manifest_path = f'exports/{job.id}/manifest.json'
+    with open_export_file(default_storage, manifest_path) as manifest_file:
+        manifest_file.write(json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    
+    job.status = 'completed'
+    job.manifest_path = manifest_path
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'manifest_path', 'completed_at'])
+    
+    send_export_notification(job.requested_by_id, manifest_path)
+    
+    return {'status': 'success', 'manifest_path': manifest_path, 'total': manifest['total']}
 
-تاريخ الإنشاء: {complaint.created_at.strftime('%Y-%m-%d %H:%M')}
-تاريخ آخر تحديث: {complaint.updated_at.strftime('%Y-%m-%d %H:%M')}
-تاريخ الحل: {complaint.resolved_at.strftime('%Y-%m-%d %H:%M') if complaint.resolved_at else 'لم يتم الحل'}
 
-عدد المرفقات: {complaint.attachments.count()}
-"""
+def generate_complaints_csv(queryset):
+    """إنشاء ملف CSV بتفاصيل الشكاوى"""
     
-    return details
+    return ''.join(iter_complaints_csv(queryset))
 
 
 def send_export_notification(user_id, file_path):
@@ -161,26 +236,13 @@ def send_export_notification(user_id, file_path):
 
 @shared_task
 def notify_complaint_update(complaint_id, action, user_id):
-    """إرسال إشعار عند تحديث الشكوى"""
+    """إضافة إشعار تحديث الشكوى إلى الصندوق الصادر (التوصيل على دفعات عبر dispatch_outbox_events)"""
     
     try:
-        complaint = Complaint.objects.get(id=complaint_id)
-        
-        # تحديد نوع الإشعار ومحتواه
-        notification_data = {
-            'user_id': user_id,
-            'title': get_notification_title(action, complaint),
-            'message': get_notification_message(action, complaint),
-            'type': 'complaint_update',
-            'data': {
-                'complaint_id': complaint_id,
-                'action': action,
-                'reference_number': complaint.reference_number
-            }
-        }
+        complaint = Complaint.objects.only('id', 'title', 'reference_number').get(id=complaint_id)
         
-        # إرسال الإشعار عبر خدمة الإشعارات
-        send_notification_to_service(notification_data)
+        with transaction.atomic():
+            publish('notifications', 'complaint_update', [build_notification(complaint, action, user_id)])
         
         return {'status': 'success'}
     
@@ -190,124 +252,99 @@ def notify_complaint_update(complaint_id, action, user_id):
         return {'status': 'error', 'message': str(e)}
 
 
-def get_notification_title(action, complaint):
-    """الحصول على عنوان الإشعار"""
+@shared_task
+def dispatch_outbox_events():
+    """إرسال الأحداث المستحقة من الصندوق الصادر لكل خدمة على دفعات"""
     
-    titles = {
-        'assigned': 'تم إسناد شكوى جديدة إليك',
-        'accepted': 'تم قبول شكواك',
-        'rejected': 'تم رفض شكواك',
-        'on_hold': 'تم تعليق شكواك مؤقتاً',
-        'resolved': 'تم حل شكواك',
-        'response_added': 'تم إضافة رد على شكواك'
-    }
+    # الأحداث الجديدة بعد هذه اللحظة تجدول موزعاً جديداً
+    cache.delete(DISPATCH_SCHEDULED_KEY)
     
-    return titles.get(action, 'تحديث على شكواك')
+    result = dispatch_pending()
+    if result['next_at'] is not None:
+        schedule_dispatch(eta=result['next_at'])
+    
+    return {'status': 'success', 'destinations': result['destinations']}
 
 
-def get_notification_message(action, complaint):
-    """الحصول على محتوى الإشعار"""
+@shared_task
+def update_representative_score(representative_id, points, thank_you_message):
+    """تحديث نقاط النائب في خدمة الإحصائيات (عبر الصندوق الصادر)"""
     
-    messages = {
-        'assigned': f'تم إسناد الشكوى "{complaint.title}" إليك للمراجعة والرد عليها.',
-        'accepted': f'تم قبول شكواك "{complaint.title}" وسيتم العمل على حلها قريباً.',
-        'rejected': f'تم رفض شكواك "{complaint.title}". يمكنك مراجعة السبب في تفاصيل الشكوى.',
-        'on_hold': f'تم تعليق شكواك "{complaint.title}" مؤقتاً لمدة 3 أيام للدراسة.',
-        'resolved': f'تم حل شكواك "{complaint.title}". يمكنك مراجعة الحل في تفاصيل الشكوى.',
-        'response_added': f'تم إضافة رد جديد على شكواك "{complaint.title}".'
-    }
+    try:
+        with transaction.atomic():
+            publish_score_award(representative_id, points, thank_you_message)
+        
+        return {'status': 'success', 'message': 'تم تحديث النقاط بنجاح'}
     
-    return messages.get(action, f'تم تحديث شكواك "{complaint.title}".')
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
 
 
-def send_notification_to_service(notification_data):
-    """إرسال الإشعار إلى خدمة الإشعارات"""
+@shared_task
+def cleanup_old_attachments(dry_run=False, max_deletes=None):
+    """تنظيف المرفقات القديمة على دفعات (مهمة دورية)"""
     
     try:
-        # TODO: تكامل مع خدمة الإشعارات
-        # notifications_service_url = settings.NOTIFICATIONS_SERVICE_URL
-        # response = requests.post(f'{notifications_service_url}/api/v1/send/', json=notification_data)
-        # return response.json()
-        pass
+        # حذف المرفقات الأقدم من مدة الاحتفاظ (6 أشهر افتراضياً) للشكاوى المحلولة
+        if max_deletes is None:
+            max_deletes = settings.COMPLAINTS_CLEANUP_MAX_DELETES or None
+        
+        result = cleanup_attachments(expired_attachments(), max_deletes=max_deletes, dry_run=dry_run)
+        
+        return {'status': 'success', **result}
+    
     except Exception as e:
-        # تسجيل الخطأ
-        print(f'خطأ في إرسال الإشعار: {e}')
+        return {'status': 'error', 'message': str(e)}
 
 
 @shared_task
-def update_representative_score(representative_id, points, thank_you_message):
-    """تحديث نقاط النائب في خدمة الإحصائيات"""
+def expire_attachment_upload_sessions():
+    """إنهاء جلسات الرفع غير المكتملة وحذف ملفاتها المتروكة (مهمة دورية)"""
     
     try:
-        # TODO: تكامل مع خدمة الإحصائيات
-        # statistics_service_url = settings.STATISTICS_SERVICE_URL
-        # 
-        # data = {
-        #     'representative_id': representative_id,
-        #     'points': points,
-        #     'reason': 'complaint_resolved',
-        #     'thank_you_message': thank_you_message
-        # }
-        # 
-        # response = requests.post(f'{statistics_service_url}/api/v1/update-score/', json=data)
-        # return response.json()
+        expired_count = expire_upload_sessions()
         
-        return {'status': 'success', 'message': 'تم تحديث النقاط بنجاح'}
+        return {'status': 'success', 'expired_count': expired_count}
     
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
 
 @shared_task
-def cleanup_old_attachments():
-    """تنظيف المرفقات القديمة (مهمة دورية)"""
+def send_overdue_reminders():
+    """
+    إرسال تذكيرات للشكاوى المتأخرة (مطالبة مجمّعة، والتذكيرات تُكتب في الصندوق الصادر)
+
+    مهمة دورية قصيرة الفاصل (HOLD_EXPIRY_INTERVAL_SECONDS في CELERY_BEAT_SCHEDULE): تقرأ
+    الشكاوى المستحقة فقط عبر فهرس (status, hold_until)، فلا حاجة لمؤقت لكل تعليق ولا لإلغائه
+    عند إعادة التعليق أو إنهائه
+    """
     
     try:
-        # حذف المرفقات الأقدم من 6 أشهر للشكاوى المحلولة
-        old_date = timezone.now() - timezone.timedelta(days=180)
-        
-        old_attachments = ComplaintAttachment.objects.filter(
-            complaint__status='resolved',
-            complaint__resolved_at__lt=old_date
-        )
+        # نقل الشكاوى المعلقة المنتهية إلى "متأخرة" مع تذكيرات النواب في نفس المعاملة
+        complaint_ids = claim_overdue_holds()
         
-        deleted_count = 0
-        for attachment in old_attachments:
-            if os.path.exists(attachment.file.path):
-                os.remove(attachment.file.path)
-            attachment.delete()
-            deleted_count += 1
-        
-        return {'status': 'success', 'deleted_count': deleted_count}
+        return {'status': 'success', 'processed_count': len(complaint_ids)}
     
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
 
 @shared_task
-def send_overdue_reminders():
-    """إرسال تذكيرات للشكاوى المتأخرة"""
+def refresh_citizen_profiles(citizen_ids):
+    """تحديث بيانات مواطنين قديمة في التخزين المؤقت (تُجدول عند قراءة مدخل قديم)"""
+    profiles = refresh_profiles(citizen_ids)
+    return {'status': 'success', 'refreshed_count': len(profiles)}
+
+
+@shared_task
+def refresh_citizen_details():
+    """تحديث اسم وبريد المواطن المنسوخين في الشكاوى من خدمة المصادقة (مهمة دورية)"""
     
     try:
-        # البحث عن الشكاوى المعلقة التي انتهت مدة التعليق
-        overdue_complaints = Complaint.objects.filter(
-            status='on_hold',
-            hold_until__lt=timezone.now()
-        )
-        
-        for complaint in overdue_complaints:
-            # إرسال تذكير للنائب
-            notify_complaint_update.delay(
-                complaint.id,
-                'overdue_reminder',
-                complaint.assigned_representative_id
-            )
-            
-            # تحديث حالة الشكوى إلى "متأخرة"
-            complaint.status = 'overdue'
-            complaint.save()
+        updated_count = sync_citizen_details()
         
-        return {'status': 'success', 'processed_count': overdue_complaints.count()}
+        return {'status': 'success', 'updated_count': updated_count}
     
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
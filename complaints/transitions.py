@@ -0,0 +1,486 @@
+"""
+انتقالات حالة الشكوى - منصة نائبك.كوم
+جدول الانتقالات المسموحة، والتحديث الشرطي (compare-and-swap) لشكوى واحدة،
+وتطبيق الانتقالات على مجموعة شكاوى باستعلامات مجمّعة
+"""
+
+from datetime import timedelta
+from django.db import connections, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .cache import bump_scope_versions
+from .models import Complaint, ComplaintHistory, ComplaintStatCounter
+from .notifications import NOTIFICATION_RECIPIENTS, queue_notifications
+
+
+# مدة التعليق (3 أيام كما هو محدد في البرومبت)
+HOLD_DURATION = timedelta(days=3)
+
+# نتائج الانتقال لكل شكوى
+RESULT_UPDATED = 'updated'
+RESULT_NOT_FOUND = 'not_found'
+RESULT_INVALID_STATUS = 'invalid_status'
+RESULT_FORBIDDEN = 'forbidden'
+RESULT_CONFLICT = 'conflict'
+
+# عمود الرد حسب نوع المستجيب
+RESPONSE_FIELDS = {
+    'admin': 'admin_response',
+    'representative': 'representative_response',
+}
+
+
+class TransitionConflict(APIException):
+    """تعارض: تغيرت الشكوى بين قراءتها وتحديثها"""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'تم تعديل الشكوى من مستخدم آخر. يرجى إعادة المحاولة.'
+    default_code = 'conflict'
+
+
+class SystemActor:
+    """المنفذ عند التحديث من خارج طلب مستخدم (المهام الدورية مثلاً)"""
+
+    id = 0
+    username = 'النظام'
+
+
+class Transition:
+    """
+    انتقال من مجموعة حالات مسموحة إلى حالة جديدة
+
+    values تُرجع الأعمدة التي يغيرها الانتقال (إضافة للحالة)، و describe نص السجل،
+    و expected شروط إضافية على الصف عند التحديث الشرطي
+    """
+
+    def __init__(self, name, sources, target, action, values=None, describe=None,
+                 expected=None, representative_only=False):
+        self.name = name
+        self.sources = tuple(sources)
+        self.target = target
+        self.action = action
+        self.representative_only = representative_only
+        self._values = values
+        self._describe = describe
+        self._expected = expected
+
+    def values(self, params, actor, now):
+        values = {'status': self.target, 'updated_at': now}
+        if self._values is not None:
+            values.update(self._values(params, actor, now))
+        return values
+
+    def describe(self, params):
+        return self._describe(params)
+
+    def expected(self, complaint, actor, params):
+        """شروط الصف عند التحديث: الحالة الحالية (والنائب المُسند إن لزم)"""
+        expected = {'status': complaint.status}
+        if self.representative_only:
+            expected['assigned_representative_id'] = actor.id
+        if self._expected is not None:
+            expected.update(self._expected(params))
+        return expected
+
+    def history_data(self, params):
+        notes = params.get('notes')
+        return {'notes': notes} if notes is not None else None
+
+
+def _assign_values(params, actor, now):
+    return {
+        'assigned_representative_id': params['representative_id'],
+        'assigned_representative_name': params['representative_name'],
+        'assigned_at': now,
+        'assigned_by_admin_id': actor.id,
+    }
+
+
+def _reject_values(params, actor, now):
+    return {'representative_response': params.get('reason', '')}
+
+
+def _hold_values(params, actor, now):
+    return {
+        'hold_until': now + HOLD_DURATION,
+        'representative_response': params.get('reason', ''),
+    }
+
+
+def _resolve_values(params, actor, now):
+    values = {
+        'resolution': params['resolution'],
+        'resolved_at': now,
+        RESPONSE_FIELDS[params['response_type']]: params['response_text'],
+    }
+    if params.get('award_points'):
+        values['points_awarded'] = True
+        values['thank_you_message'] = params.get('thank_you_message', '')
+    return values
+
+
+def _resolve_expected(params):
+    # النقاط تُمنح مرة واحدة فقط حتى مع طلبات متزامنة
+    return {'points_awarded': False} if params.get('award_points') else {}
+
+
+TRANSITIONS = {
+    transition.name: transition
+    for transition in (
+        Transition(
+            'assign',
+            sources=('pending', 'assigned', 'rejected', 'on_hold', 'overdue'),
+            target='assigned',
+            action='assigned',
+            values=_assign_values,
+            describe=lambda params: f'تم إسناد الشكوى للنائب: {params["representative_name"]}',
+        ),
+        Transition(
+            'accept',
+            sources=('assigned', 'on_hold', 'overdue'),
+            target='accepted',
+            action='accepted',
+            describe=lambda params: 'تم قبول الشكوى من قبل النائب',
+            representative_only=True,
+        ),
+        Transition(
+            'reject',
+            sources=('assigned', 'accepted', 'on_hold', 'overdue'),
+            target='rejected',
+            action='rejected',
+            values=_reject_values,
+            describe=lambda params: f'تم رفض الشكوى من قبل النائب. السبب: {params.get("reason", "")}',
+            representative_only=True,
+        ),
+        Transition(
+            'hold',
+            sources=('assigned', 'accepted', 'overdue'),
+            target='on_hold',
+            action='on_hold',
+            values=_hold_values,
+            describe=lambda params: f'تم تعليق الشكوى لمدة 3 أيام. السبب: {params.get("reason", "")}',
+            representative_only=True,
+        ),
+        Transition(
+            'resolve',
+            sources=('pending', 'assigned', 'accepted', 'rejected', 'on_hold', 'overdue'),
+            target='resolved',
+            action='resolved',
+            values=_resolve_values,
+            describe=lambda params: f'تم حل الشكوى مع رد من {params["response_type"]}',
+            expected=_resolve_expected,
+        ),
+        Transition(
+            'expire',
+            sources=('on_hold',),
+            target='overdue',
+            action='status_changed',
+            describe=lambda params: 'انتهت فترة التعليق دون إجراء من النائب',
+        ),
+        Transition(
+            'close',
+            sources=('pending', 'assigned', 'accepted', 'rejected', 'on_hold', 'overdue', 'resolved'),
+            target='closed',
+            action='closed',
+            describe=lambda params: 'تم إغلاق الشكوى',
+        ),
+    )
+}
+
+# الانتقالات المتاحة عبر واجهة التنفيذ المجمّع
+BULK_TRANSITIONS = ('assign', 'accept', 'reject', 'hold', 'close')
+
+# الحالات التي يمكن الانتقال إليها من كل حالة (للتعديل المباشر للحالة)
+ALLOWED_STATUS_CHANGES = {}
+for _transition in TRANSITIONS.values():
+    for _source in _transition.sources:
+        ALLOWED_STATUS_CHANGES.setdefault(_source, set()).add(_transition.target)
+
+# نوع سجل التاريخ عند تغيير الحالة مباشرة
+STATUS_HISTORY_ACTIONS = {
+    transition.target: transition.action for transition in TRANSITIONS.values()
+}
+
+
+def is_status_change_allowed(old_status, new_status):
+    return new_status in ALLOWED_STATUS_CHANGES.get(old_status, ())
+
+
+def compare_and_swap(complaint, values, actor, expected=None, action=None, description='',
+                     additional_data=None):
+    """
+    تحديث شرطي لشكوى واحدة: UPDATE ... SET <values> WHERE id=? AND <expected>
+
+    يكتب الأعمدة المتغيرة فقط، ويضيف سجل التاريخ ويحدث العدادات في نفس المعاملة.
+    تُرجع True عند النجاح (مع تحديث الكائن في الذاكرة) و False عند التعارض
+    """
+    expected = dict(expected or {})
+    bucket_fields = Complaint.STAT_BUCKET_FIELDS
+    old_representative_id = complaint.assigned_representative_id
+    moves_bucket = any(field in values for field in bucket_fields)
+
+    # حقول الخانة التي يغيرها التحديث تدخل في الشرط حتى تكون قيمها السابقة معروفة
+    for field in bucket_fields:
+        if field in values and field not in expected:
+            expected[field] = getattr(complaint, field)
+
+    with transaction.atomic():
+        if not Complaint.objects.filter(pk=complaint.pk, **expected).update(**values):
+            return False
+
+        if action is not None:
+            ComplaintHistory.objects.create(
+                complaint_id=complaint.pk,
+                action=action,
+                description=description,
+                performed_by_id=actor.id,
+                performed_by_name=actor.username,
+                additional_data=additional_data,
+            )
+
+        if moves_bucket:
+            # الصف مقفل بعد التحديث: قيمه الحالية هي الخانة الجديدة
+            current = Complaint.objects.filter(pk=complaint.pk).values_list(*bucket_fields).get()
+            new_bucket = dict(zip(bucket_fields, current))
+            old_bucket = [expected.get(field, new_bucket[field]) for field in bucket_fields]
+            ComplaintStatCounter.apply_deltas(_bucket_deltas([old_bucket], new_bucket))
+
+        for field, value in values.items():
+            setattr(complaint, field, value)
+
+        if action is not None:
+            queue_notifications(action, [complaint])
+
+    complaint.bump_cache_versions(old_representative_id)
+    return True
+
+
+def transition_complaint(complaint, name, actor, params=None):
+    """
+    تطبيق انتقال على شكوى واحدة عبر compare_and_swap
+
+    تُرجع updated أو forbidden أو invalid_status أو conflict
+    """
+    transition = TRANSITIONS[name]
+    params = params or {}
+
+    if transition.representative_only and complaint.assigned_representative_id != actor.id:
+        return RESULT_FORBIDDEN
+
+    if complaint.status not in transition.sources:
+        return RESULT_INVALID_STATUS
+
+    swapped = compare_and_swap(
+        complaint,
+        transition.values(params, actor, timezone.now()),
+        actor,
+        expected=transition.expected(complaint, actor, params),
+        action=transition.action,
+        description=transition.describe(params),
+        additional_data=transition.history_data(params),
+    )
+    return RESULT_UPDATED if swapped else RESULT_CONFLICT
+
+
+def bulk_transition(queryset, ids, name, actor, params=None):
+    """
+    تطبيق انتقال على عدة شكاوى: قراءة واحدة مع قفل، UPDATE واحد، و bulk_create للسجل
+
+    queryset يحدد نطاق المستخدم (الشكاوى خارجه تُعتبر غير موجودة).
+    تُرجع dict من المعرف إلى النتيجة (updated, not_found, invalid_status, forbidden)
+    """
+    transition = TRANSITIONS[name]
+    params = params or {}
+    now = timezone.now()
+    values = transition.values(params, actor, now)
+    results = {complaint_id: RESULT_NOT_FOUND for complaint_id in ids}
+
+    with transaction.atomic():
+        rows = (
+            queryset.select_for_update()
+            .filter(pk__in=ids)
+            .order_by('pk')
+            .values_list('pk', *Complaint.STAT_BUCKET_FIELDS, 'citizen_id', 'title', 'reference_number')
+        )
+
+        eligible = {}
+        notified = []
+        for pk, current_status, priority, category_id, representative_id, *details in rows:
+            if current_status not in transition.sources:
+                results[pk] = RESULT_INVALID_STATUS
+            elif transition.representative_only and representative_id != actor.id:
+                results[pk] = RESULT_FORBIDDEN
+            else:
+                eligible[pk] = (current_status, priority, category_id, representative_id)
+                notified.append((pk, representative_id, *details))
+
+        if eligible:
+            Complaint.objects.filter(pk__in=list(eligible), status__in=transition.sources).update(**values)
+
+            description = transition.describe(params)
+            additional_data = transition.history_data(params)
+            ComplaintHistory.objects.bulk_create([
+                ComplaintHistory(
+                    complaint_id=pk,
+                    action=transition.action,
+                    description=description,
+                    performed_by_id=actor.id,
+                    performed_by_name=actor.username,
+                    performed_at=now,
+                    additional_data=additional_data,
+                )
+                for pk in eligible
+            ])
+
+            ComplaintStatCounter.apply_deltas(_bucket_deltas(eligible.values(), values))
+
+            if transition.action in NOTIFICATION_RECIPIENTS:
+                queue_notifications(transition.action, [
+                    Complaint(
+                        id=pk,
+                        citizen_id=citizen_id,
+                        assigned_representative_id=values.get('assigned_representative_id', representative_id),
+                        title=title,
+                        reference_number=reference_number,
+                    )
+                    for pk, representative_id, citizen_id, title, reference_number in notified
+                ])
+
+            for pk in eligible:
+                results[pk] = RESULT_UPDATED
+
+    if eligible:
+        bump_scope_versions(
+            [citizen_id for _pk, _representative_id, citizen_id, *_details in notified],
+            {representative_id for *_bucket, representative_id in eligible.values()}
+            | {values.get('assigned_representative_id')},
+        )
+
+    return results
+
+
+def _bucket_deltas(old_buckets, values):
+    """فروقات جدول العدادات لنقل الشكاوى من خاناتها القديمة إلى الجديدة"""
+    deltas = {}
+    for old in old_buckets:
+        new = [values.get(field, current) for field, current in zip(Complaint.STAT_BUCKET_FIELDS, old)]
+        old_key = ComplaintStatCounter.normalize_bucket(old)
+        new_key = ComplaintStatCounter.normalize_bucket(new)
+        if old_key != new_key:
+            deltas[old_key] = deltas.get(old_key, 0) - 1
+            deltas[new_key] = deltas.get(new_key, 0) + 1
+    return deltas
+
+
+def claim_overdue_holds(now=None, using='default'):
+    """نقل جميع الشكاوى المعلقة المنتهية إلى "متأخرة" (قراءة عبر فهرس status, hold_until)"""
+    return expire_holds(Complaint.objects.using(using).all(), now)
+
+
+def expire_holds(queryset, now=None):
+    """
+    نقل الشكاوى المعلقة المنتهية ضمن queryset إلى "متأخرة" بمطالبة واحدة، وإرجاع معرفاتها
+
+    السجل والعدادات في نفس المعاملة. الشكوى المُطالب بها لا تعود للاستعلام مرة أخرى،
+    فيمكن تشغيل المسح الدوري بالتوازي دون تكرار التذكيرات
+    """
+    transition = TRANSITIONS['expire']
+    source_status, = transition.sources
+    now = now or timezone.now()
+    actor = SystemActor()
+    using = queryset.db
+
+    with transaction.atomic(using=using):
+        rows = _claim_rows(
+            queryset.filter(status=source_status, hold_until__lte=now),
+            {'status': transition.target, 'updated_at': now},
+            ('id', 'priority', 'category_id', 'assigned_representative_id', 'title', 'reference_number',
+             'citizen_id'),
+        )
+        if not rows:
+            return []
+
+        description = transition.describe({})
+        ComplaintHistory.objects.using(using).bulk_create([
+            ComplaintHistory(
+                complaint_id=row[0],
+                action=transition.action,
+                description=description,
+                performed_by_id=actor.id,
+                performed_by_name=actor.username,
+                performed_at=now,
+            )
+            for row in rows
+        ])
+        # الخانة السابقة هي نفسها بالحالة المصدر (الأعمدة الأخرى لا يغيرها الانتقال)
+        ComplaintStatCounter.apply_deltas(_bucket_deltas(
+            [(source_status, priority, category_id, representative_id)
+             for _pk, priority, category_id, representative_id, *_details in rows],
+            {'status': transition.target}
+        ))
+
+        # تذكير النائب المُسند في نفس المعاملة
+        queue_notifications('overdue_reminder', [
+            Complaint(id=pk, assigned_representative_id=representative_id, title=title,
+                      reference_number=reference_number)
+            for pk, _priority, _category_id, representative_id, title, reference_number, _citizen_id in rows
+        ], using=using)
+
+    bump_scope_versions([row[-1] for row in rows], {row[3] for row in rows})
+    return [row[0] for row in rows]
+
+
+def _claim_rows(queryset, values, columns):
+    """
+    قفل الصفوف المطابقة وتحديثها بـ values، وإرجاع أعمدتها columns (ليست من حقول values)
+
+    الصفوف المقفلة لدى عامل آخر تُتخطى (SKIP LOCKED) فلا يطالب عاملان بنفس الشكوى.
+    على PostgreSQL تتم المطالبة بـ UPDATE ... RETURNING واحد، وعلى غيرها بقفل الصفوف ثم
+    تحديثها (على SQLite يتسلسل الكُتّاب، فيفشل تحديث المعاملة المتأخرة بدلاً من تكراره)
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        return _claim_rows_returning(queryset, values, columns, connection)
+
+    rows = list(
+        queryset.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+        .values_list(*columns)
+    )
+    if rows:
+        queryset.filter(pk__in=[row[0] for row in rows]).update(**values)
+    return rows
+
+
+def _claim_rows_returning(queryset, values, columns, connection):
+    """
+    UPDATE <table> SET ... WHERE pk IN (SELECT pk ... FOR UPDATE SKIP LOCKED) RETURNING <columns>
+    برحلة واحدة لقاعدة البيانات
+    """
+    meta = queryset.model._meta
+    quote = connection.ops.quote_name
+    claimed_sql, claimed_params = (
+        queryset.select_for_update(skip_locked=True).order_by().values('pk').query
+        .get_compiler(connection=connection).as_sql()
+    )
+
+    assignments = []
+    params = []
+    for name, value in values.items():
+        field = meta.get_field(name)
+        assignments.append(f'{quote(field.column)} = %s')
+        params.append(field.get_db_prep_save(value, connection))
+
+    fields = [meta.get_field(name) for name in columns]
+    sql = (
+        f'UPDATE {quote(meta.db_table)} SET {", ".join(assignments)} '
+        f'WHERE {quote(meta.pk.column)} IN ({claimed_sql}) '
+        f'RETURNING {", ".join(quote(field.column) for field in fields)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, *claimed_params])
+        return [
+            tuple(field.to_python(value) for field, value in zip(fields, row))
+            for row in cursor.fetchall()
+        ]
@@ -0,0 +1,285 @@
+"""
+رفع المرفقات المباشر - منصة نائبك.كوم
+جلسة الرفع تحجز مسارات الملفات وتُعطي العميل رابط رفع موقعاً لكل ملف إلى التخزين
+(GCS أو بديل محلي)، ثم يتحقق إنهاء الجلسة من الملفات المرفوعة وينشئ صفوف المرفقات،
+فلا تمر محتويات الملفات بعمال التطبيق
+"""
+
+import logging
+import os
+from collections import namedtuple
+from datetime import timedelta
+from functools import lru_cache
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .exports import open_export_file
+from .models import (
+    AttachmentUploadSession, Complaint, ComplaintAttachment, ComplaintHistory, complaint_attachment_path
+)
+
+try:
+    from google.api_core.exceptions import NotFound
+    from google.cloud import storage as gcs
+except ImportError:  # pragma: no cover - google-cloud-storage اختيارية للبديل المحلي
+    gcs = None
+
+
+logger = logging.getLogger(__name__)
+
+# الملف كما وصل إلى التخزين (content_type قد تكون None إذا لم يحفظها التخزين)
+StoredObject = namedtuple('StoredObject', ['size', 'content_type'])
+
+LOCAL_UPLOAD_SALT = 'complaints.uploads.local'
+
+
+class UploadSessionClosed(APIException):
+    """الجلسة منتهية ولا تقبل الإنهاء"""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'انتهت صلاحية جلسة الرفع. يرجى بدء جلسة جديدة.'
+    default_code = 'upload_session_closed'
+
+
+class GCSUploadBackend:
+    """
+    رفع مباشر إلى GS_BUCKET_NAME برابط موقع (V4) يبدأ رفعاً قابلاً للاستئناف
+
+    العميل يرسل POST للرابط مع الترويسات المعطاة فيحصل على رابط الجلسة (Location)،
+    ثم يرفع الملف عليه بأجزاء ويستأنف من آخر جزء عند انقطاع الاتصال
+    """
+
+    def __init__(self):
+        if gcs is None:
+            raise ImproperlyConfigured('GCSUploadBackend يتطلب google-cloud-storage')
+        if settings.GS_CREDENTIALS:
+            client = gcs.Client.from_service_account_json(settings.GS_CREDENTIALS, project=settings.GS_PROJECT_ID)
+        else:
+            client = gcs.Client(project=settings.GS_PROJECT_ID)
+        self.bucket = client.bucket(settings.GS_BUCKET_NAME)
+
+    def create_target(self, name, content_type, size, expires_at):
+        headers = {
+            'x-goog-resumable': 'start',
+            # GCS يرفض الملف الأكبر من الحجم المعلن
+            'x-goog-content-length-range': f'0,{size}',
+        }
+        url = self.bucket.blob(name).generate_signed_url(
+            version='v4',
+            expiration=expires_at,
+            method='POST',
+            content_type=content_type,
+            headers=headers,
+        )
+        return {'method': 'POST', 'url': url, 'headers': {'Content-Type': content_type, **headers}, 'resumable': True}
+
+    def stat(self, name):
+        blob = self.bucket.get_blob(name)
+        if blob is None:
+            return None
+        return StoredObject(blob.size, blob.content_type)
+
+    def delete(self, name):
+        try:
+            self.bucket.blob(name).delete()
+        except NotFound:
+            pass
+
+
+class LocalUploadBackend:
+    """
+    بديل محلي (التطوير والاختبارات): رابط PUT موقع إلى LocalUploadView يكتب الملف
+    في default_storage بنفس المسار
+    """
+
+    def create_target(self, name, content_type, size, expires_at):
+        token = signing.dumps(
+            {'name': name, 'content_type': content_type, 'size': size, 'expires': int(expires_at.timestamp())},
+            salt=LOCAL_UPLOAD_SALT,
+        )
+        url = reverse('local_upload', args=[token])
+        return {'method': 'PUT', 'url': url, 'headers': {'Content-Type': content_type}, 'resumable': False}
+
+    def stat(self, name):
+        if not default_storage.exists(name):
+            return None
+        # نوع الملف تحققت منه LocalUploadView عند الرفع
+        return StoredObject(default_storage.size(name), None)
+
+    def delete(self, name):
+        default_storage.delete(name)
+
+
+def read_local_target(token):
+    """بيانات رابط الرفع المحلي (None إذا كان التوقيع غير صالح أو انتهت صلاحيته)"""
+    try:
+        target = signing.loads(token, salt=LOCAL_UPLOAD_SALT)
+    except signing.BadSignature:
+        return None
+    if target['expires'] < timezone.now().timestamp():
+        return None
+    return target
+
+
+def write_local_upload(target, content):
+    with open_export_file(default_storage, target['name']) as upload_file:
+        upload_file.write(content)
+
+
+@lru_cache(maxsize=None)
+def load_upload_backend(path):
+    return import_string(path)()
+
+
+def get_upload_backend():
+    """واجهة التخزين المحددة في COMPLAINTS_UPLOAD_BACKEND (نسخة واحدة لكل عملية)"""
+    return load_upload_backend(settings.COMPLAINTS_UPLOAD_BACKEND)
+
+
+def upload_path(session, index, name):
+    """مسار الملف في مجلد مرفقات الشكوى (قصير بما يكفي لحقل الملف، والاسم الأصلي يُحفظ منفصلاً)"""
+    extension = os.path.splitext(name)[1].lower()
+    return complaint_attachment_path(session, f'{session.id.hex[:12]}-{index}{extension}')
+
+
+def check_attachments_limit(complaint, new_count):
+    if complaint.attachments.count() + new_count > settings.MAX_ATTACHMENTS_PER_COMPLAINT:
+        raise ValidationError({
+            'files': f'عدد المرفقات كبير جداً. الحد الأقصى هو {settings.MAX_ATTACHMENTS_PER_COMPLAINT} ملفات.'
+        })
+
+
+def create_upload_session(complaint, user_id, files, backend=None):
+    """
+    إنشاء جلسة رفع لملفات الشكوى، وإرجاع (الجلسة، هدف الرفع لكل ملف بنفس الترتيب)
+
+    files قائمة بالاسم والحجم والنوع (والوصف) المعلنة لكل ملف
+    """
+    backend = backend or get_upload_backend()
+    check_attachments_limit(complaint, len(files))
+
+    session = AttachmentUploadSession(
+        complaint=complaint,
+        created_by_id=user_id,
+        expires_at=timezone.now() + timedelta(seconds=settings.COMPLAINTS_UPLOAD_SESSION_SECONDS),
+    )
+    session.files = [
+        {
+            'name': file['name'],
+            'path': upload_path(session, index, file['name']),
+            'size': file['size'],
+            'content_type': file['content_type'],
+            'description': file.get('description', ''),
+        }
+        for index, file in enumerate(files)
+    ]
+    session.save()
+
+    targets = [
+        backend.create_target(file['path'], file['content_type'], file['size'], session.expires_at)
+        for file in session.files
+    ]
+    return session, targets
+
+
+def session_attachments(session):
+    """المرفقات التي أنشأها إنهاء الجلسة"""
+    return ComplaintAttachment.objects.filter(
+        complaint_id=session.complaint_id, file__in=[file['path'] for file in session.files]
+    ).order_by('uploaded_at', 'id')
+
+
+def verify_uploads(session, backend):
+    """التحقق من وصول كل ملف بالحجم والنوع المعلنين (أخطاء لكل ملف باسمه)"""
+    errors = {}
+    for file in session.files:
+        stored = backend.stat(file['path'])
+        if stored is None:
+            errors[file['name']] = 'لم يتم رفع الملف.'
+        elif stored.size != file['size']:
+            errors[file['name']] = 'حجم الملف المرفوع لا يطابق الحجم المعلن.'
+        elif stored.content_type is not None and stored.content_type != file['content_type']:
+            errors[file['name']] = 'نوع الملف المرفوع لا يطابق النوع المعلن.'
+    if errors:
+        raise ValidationError({'files': errors})
+
+
+def finalize_upload_session(session, user, backend=None):
+    """
+    إنشاء مرفقات الجلسة بعد التحقق من الملفات المرفوعة، وإرجاعها
+
+    الإنهاء المتكرر (إعادة محاولة العميل) يُرجع نفس المرفقات دون تكرارها
+    """
+    backend = backend or get_upload_backend()
+
+    if session.status == 'pending' and not session.is_expired:
+        # التحقق عبر الشبكة قبل حجز الصفوف
+        verify_uploads(session, backend)
+
+    with transaction.atomic():
+        session = AttachmentUploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == 'finalized':
+            return list(session_attachments(session))
+        if session.status != 'pending' or session.is_expired:
+            raise UploadSessionClosed()
+
+        # حجز الشكوى حتى لا تتجاوز جلستان متزامنتان حد المرفقات
+        complaint = Complaint.objects.select_for_update().get(pk=session.complaint_id)
+        check_attachments_limit(complaint, len(session.files))
+
+        attachments = [
+            ComplaintAttachment.objects.create(
+                complaint=complaint,
+                file=file['path'],
+                original_name=file['name'],
+                file_size=file['size'],
+                description=file['description'],
+            )
+            for file in session.files
+        ]
+        ComplaintHistory.objects.create(
+            complaint=complaint,
+            action='attachment_added',
+            description=f'تم إضافة {len(attachments)} مرفقات',
+            performed_by_id=user.id,
+            performed_by_name=user.username,
+            additional_data={'upload_session': str(session.id)},
+        )
+
+        session.status = 'finalized'
+        session.finalized_at = timezone.now()
+        session.save(update_fields=['status', 'finalized_at'])
+
+    return attachments
+
+
+def expire_upload_sessions(now=None, backend=None):
+    """
+    تعليم الجلسات غير المكتملة المنتهية وحذف ما رُفع لها من ملفات (لا مرفقات تشير إليها)
+
+    تُرجع عدد الجلسات المنتهية
+    """
+    now = now or timezone.now()
+    backend = backend or get_upload_backend()
+
+    expired_count = 0
+    due = AttachmentUploadSession.objects.filter(status='pending', expires_at__lte=now)
+    for session in due.only('id', 'files').iterator():
+        # التحديث الشرطي يمنع حذف ملفات جلسة أُنهيت للتو
+        if not AttachmentUploadSession.objects.filter(pk=session.pk, status='pending').update(status='expired'):
+            continue
+        expired_count += 1
+        for file in session.files:
+            try:
+                backend.delete(file['path'])
+            except Exception:
+                logger.exception('Failed to delete abandoned upload %s', file['path'])
+    return expired_count
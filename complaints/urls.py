@@ -13,6 +13,7 @@ router.register(r'attachments', views.ComplaintAttachmentViewSet, basename='atta
 router.register(r'categories', views.ComplaintCategoryViewSet, basename='category')
 router.register(r'templates', views.ComplaintTemplateViewSet, basename='template')
 router.register(r'history', views.ComplaintHistoryViewSet, basename='history')
+router.register(r'upload-sessions', views.AttachmentUploadSessionViewSet, basename='upload-session')
 
 # URLs الأساسية
 urlpatterns = [
@@ -22,6 +23,9 @@ urlpatterns = [
     # API endpoints
     path('api/v1/', include(router.urls)),
     
+    # رفع المرفقات المحلي (بديل التخزين المباشر في التطوير والاختبارات)
+    path('api/v1/uploads/local/<str:token>/', views.LocalUploadView.as_view(), name='local_upload'),
+    
     # Health check
     path('health/', views.HealthCheckView.as_view(), name='health_check'),
     
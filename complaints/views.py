@@ -2,45 +2,68 @@
 Views لخدمة الشكاوى - منصة نائبك.كوم
 """
 
+import hashlib
 import os
 import zipfile
 import tempfile
-from datetime import datetime, timedelta
+from datetime import datetime
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse, FileResponse
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Q, Count
-from rest_framework import status, viewsets, permissions
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import mixins, status, viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 
 from .models import (
-    Complaint, ComplaintAttachment, ComplaintHistory, 
+    AttachmentUploadSession, Complaint, ComplaintAttachment, ComplaintHistory, 
     ComplaintCategory, ComplaintTemplate
 )
 from .serializers import (
     ComplaintListSerializer, ComplaintDetailSerializer, ComplaintCreateSerializer,
     ComplaintUpdateSerializer, ComplaintAssignSerializer, ComplaintResponseSerializer,
     ComplaintAttachmentSerializer, ComplaintHistorySerializer, ComplaintCategorySerializer,
-    ComplaintTemplateSerializer, ComplaintStatsSerializer, ComplaintExportSerializer
+    ComplaintTemplateSerializer, ComplaintStatsSerializer, ComplaintExportSerializer,
+    ComplaintBulkTransitionSerializer, UploadSessionCreateSerializer, AttachmentUploadSessionSerializer
 )
+from .cache import get_cache_metrics, get_user_scope, record_cache_access, scoped_key
+from .conditional import (
+    complaint_validators, content_etag, instance_validators, not_modified_response, set_validators
+)
+from .exports import UTF8_BOM, iter_complaints_csv, iter_complaints_zip
+from .fieldsets import ComplaintHistoryValuesSerializer, ComplaintValuesSerializer, ValuesListMixin
+from .filters import ComplaintSearchFilter
+from .pagination import ComplaintPagination, ComplaintHistoryPagination, ComplaintAttachmentPagination
+from .profiles import get_citizen_profile
+from .scores import publish_score_award
+from .stats import get_complaint_stats
+from .transitions import (
+    RESPONSE_FIELDS, RESULT_CONFLICT, RESULT_FORBIDDEN, RESULT_INVALID_STATUS, RESULT_UPDATED,
+    TransitionConflict, bulk_transition, compare_and_swap, transition_complaint
+)
+from .uploads import create_upload_session, finalize_upload_session, read_local_target, write_local_upload
 
 
-class ComplaintViewSet(viewsets.ModelViewSet):
+class ComplaintViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """ViewSet لإدارة الشكاوى"""
     
-    queryset = Complaint.objects.all().select_related('category').prefetch_related('attachments', 'history')
+    queryset = Complaint.objects.defer('search_vector')
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = ComplaintPagination
+    filter_backends = [DjangoFilterBackend, ComplaintSearchFilter, OrderingFilter]
     search_fields = ['title', 'content', 'reference_number', 'citizen_name']
     ordering_fields = ['created_at', 'updated_at', 'priority', 'status']
     ordering = ['-created_at']
+    values_serializer_class = ComplaintValuesSerializer
     
     def get_serializer_class(self):
         """تحديد Serializer المناسب حسب العملية"""
@@ -55,8 +78,11 @@ class ComplaintViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """تصفية الشكاوى حسب نوع المستخدم"""
+        return self.scope_queryset(self.shape_queryset(super().get_queryset()))
+    
+    def scope_queryset(self, queryset):
+        """الشكاوى التي يراها المستخدم"""
         user = self.request.user
-        queryset = super().get_queryset()
         
         # إذا كان المستخدم مواطن، عرض شكاواه فقط
         if hasattr(user, 'user_type') and user.user_type == 'citizen':
@@ -69,6 +95,95 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         # الأدمن يرى جميع الشكاوى
         return queryset
     
+    def shape_queryset(self, queryset):
+        """تحديد الأعمدة والعلاقات المطلوبة لكل عملية فقط"""
+        # القائمة تقرأ أعمدة حقولها فقط عبر values() (ComplaintValuesSerializer)
+        # التفاصيل تضمّن جزءاً من السجل والمرفقات، فمصدر ETag من with_freshness()
+        if self.action == 'retrieve':
+            return queryset.select_related('category').with_freshness().prefetch_related(
+                *ComplaintDetailSerializer.embedded_prefetches(self.get_expand())
+            )
+        
+        # الإحصائيات والإجراءات (assign, hold, ...) تحتاج صف الشكوى فقط
+        return queryset
+    
+    def get_expand(self):
+        """العلاقات المطلوبة كاملة في التفاصيل: ?expand=history,attachments"""
+        value = self.request.query_params.get('expand', '')
+        expand = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = sorted(expand - set(ComplaintDetailSerializer.EMBEDDED_RELATIONS))
+        if unknown:
+            raise ValidationError({'expand': f'علاقات غير معروفة: {", ".join(unknown)}'})
+        return expand
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'retrieve':
+            context['expand'] = self.get_expand()
+        return context
+    
+    def list(self, request, *args, **kwargs):
+        """قائمة الشكاوى (مخزنة مؤقتاً لكل نطاق مستخدم)"""
+        cache_key = self.response_cache_key(request, 'list')
+        
+        def render():
+            # ETag من الصفحة المرسلة لا من إصدار النطاق (قد يكون خاصاً بكل عامل)
+            response = super(ComplaintViewSet, self).list(request, *args, **kwargs)
+            return response, content_etag(request.build_absolute_uri(), response.data), None
+        
+        # لا مصدر أرخص من الصفحة نفسها: الطلب الشرطي يُقارن بعد عرضها
+        return self.cached_response(request, 'list', cache_key, render, validators=lambda: None)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """تفاصيل الشكوى (مخزنة مؤقتاً لكل نطاق مستخدم، مع ETag من مواعيد تحديثها)"""
+        cache_key = self.response_cache_key(request, 'detail')
+        
+        def render():
+            instance = self.get_object()
+            response = Response(self.get_serializer(instance).data)
+            return (response, *instance_validators(instance))
+        
+        def validators():
+            return complaint_validators(self.scope_queryset(Complaint.objects.all()), kwargs['pk'])
+        
+        return self.cached_response(request, 'detail', cache_key, render, validators)
+    
+    def response_cache_key(self, request, namespace):
+        """مفتاح الاستجابة بإصدار نطاق المستخدم (أي تعديل على شكاوى النطاق يغيره)"""
+        url_hash = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+        return scoped_key(namespace, get_user_scope(request.user), url_hash)
+    
+    def cached_response(self, request, namespace, cache_key, render, validators):
+        """
+        استجابة GET من التخزين المؤقت (عند تفعيل CACHE_RESPONSES) أو من render() مع ETag و Last-Modified
+
+        عند عدم وجودها في التخزين وإرسال العميل لطلب شرطي، validators() تتحقق من حداثة
+        نسخته (دون تحميل البيانات) وترد بـ 304 إذا لم تتغير. إذا أرجعت None تُقارن النسخة بعد العرض
+        """
+        entry = None
+        if settings.CACHE_RESPONSES:
+            entry = cache.get(cache_key)
+            record_cache_access(namespace, entry is not None)
+        
+        if entry is None:
+            if request.META.get('HTTP_IF_NONE_MATCH') or request.META.get('HTTP_IF_MODIFIED_SINCE'):
+                current = validators()
+                not_modified = current and not_modified_response(request, *current)
+                if not_modified:
+                    return not_modified
+            
+            response, etag, last_modified = render()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = {'data': response.data, 'etag': etag, 'last_modified': last_modified}
+            if settings.CACHE_RESPONSES:
+                cache.set(cache_key, entry, settings.CACHE_TIMEOUT)
+        
+        not_modified = not_modified_response(request, entry['etag'], entry['last_modified'])
+        if not_modified:
+            return not_modified
+        return set_validators(Response(entry['data']), entry['etag'], entry['last_modified'])
+    
     def perform_create(self, serializer):
         """إنشاء شكوى جديدة"""
         # الحصول على بيانات المواطن من خدمة المصادقة
@@ -82,14 +197,25 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         )
     
     def get_citizen_data(self, citizen_id):
-        """جلب بيانات المواطن من خدمة المصادقة"""
-        # TODO: تكامل مع خدمة المصادقة
-        # في الوقت الحالي نستخدم بيانات وهمية
-        return {
-            'name': f'مواطن {citizen_id}',
-            'email': f'citizen{citizen_id}@example.com',
-            'phone': f'010{citizen_id:08d}'
-        }
+        """جلب بيانات المواطن عبر التخزين المؤقت (بيانات المستخدم المحلية عند تعذر الوصول)"""
+        return get_citizen_profile(citizen_id) or {}
+    
+    # رسائل نتيجة الانتقال (النجاح لكل إجراء يُمرر عند الاستدعاء)
+    TRANSITION_ERRORS = {
+        RESULT_INVALID_STATUS: ('لا يمكن تنفيذ هذا الإجراء على الشكوى في حالتها الحالية', status.HTTP_400_BAD_REQUEST),
+        RESULT_CONFLICT: (TransitionConflict.default_detail, status.HTTP_409_CONFLICT),
+    }
+    
+    def transition_response(self, result, message, forbidden_message=None):
+        """تحويل نتيجة الانتقال إلى استجابة"""
+        if result == RESULT_UPDATED:
+            return Response({'message': message})
+        
+        if result == RESULT_FORBIDDEN:
+            return Response({'error': forbidden_message}, status=status.HTTP_403_FORBIDDEN)
+        
+        error, status_code = self.TRANSITION_ERRORS[result]
+        return Response({'error': error}, status=status_code)
     
     @action(detail=True, methods=['post'])
     def assign(self, request, pk=None):
@@ -98,25 +224,9 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         serializer = ComplaintAssignSerializer(data=request.data)
         
         if serializer.is_valid():
-            # تحديث الشكوى
-            complaint.assigned_representative_id = serializer.validated_data['representative_id']
-            complaint.assigned_representative_name = serializer.validated_data['representative_name']
-            complaint.assigned_at = timezone.now()
-            complaint.assigned_by_admin_id = request.user.id
-            complaint.status = 'assigned'
-            complaint.save()
-            
-            # إضافة سجل في التاريخ
-            ComplaintHistory.objects.create(
-                complaint=complaint,
-                action='assigned',
-                description=f'تم إسناد الشكوى للنائب: {complaint.assigned_representative_name}',
-                performed_by_id=request.user.id,
-                performed_by_name=request.user.username,
-                additional_data={'notes': serializer.validated_data.get('notes', '')}
-            )
-            
-            return Response({'message': 'تم إسناد الشكوى بنجاح'})
+            params = {'notes': '', **serializer.validated_data}
+            result = transition_complaint(complaint, 'assign', request.user, params)
+            return self.transition_response(result, 'تم إسناد الشكوى بنجاح')
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -127,157 +237,154 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         serializer = ComplaintResponseSerializer(data=request.data)
         
         if serializer.is_valid():
-            response_type = serializer.validated_data['response_type']
-            response_text = serializer.validated_data['response_text']
-            
-            # تحديث الرد حسب نوع المستخدم
-            if response_type == 'admin':
-                complaint.admin_response = response_text
-            else:
-                complaint.representative_response = response_text
+            data = serializer.validated_data
+            response_type = data['response_type']
             
-            # إضافة الحل إذا تم تقديمه
-            if serializer.validated_data.get('resolution'):
-                complaint.resolution = serializer.validated_data['resolution']
-                complaint.status = 'resolved'
-                complaint.resolved_at = timezone.now()
-                
-                # منح النقاط للنائب إذا طُلب ذلك
-                if serializer.validated_data.get('award_points') and not complaint.points_awarded:
-                    complaint.points_awarded = True
-                    complaint.thank_you_message = serializer.validated_data.get('thank_you_message', '')
+            # إضافة الحل إذا تم تقديمه (مع منح النقاط للنائب مرة واحدة إذا طُلب ذلك)
+            if data.get('resolution'):
+                award_points = data.get('award_points') and not complaint.points_awarded
+                with transaction.atomic():
+                    result = transition_complaint(complaint, 'resolve', request.user, {
+                        **data,
+                        'award_points': award_points,
+                    })
                     
-                    # إرسال طلب لخدمة الإحصائيات لزيادة نقاط النائب
-                    self.award_points_to_representative(
-                        complaint.assigned_representative_id,
-                        complaint.thank_you_message
-                    )
-            
-            complaint.save()
+                    if result == RESULT_UPDATED and award_points:
+                        # حدث لخدمة الإحصائيات لزيادة نقاط النائب (في نفس معاملة الحل)
+                        self.award_points_to_representative(
+                            complaint.assigned_representative_id,
+                            complaint.thank_you_message,
+                            complaint.id
+                        )
+                
+                return self.transition_response(result, 'تم إضافة الرد بنجاح')
             
-            # إضافة سجل في التاريخ
-            ComplaintHistory.objects.create(
-                complaint=complaint,
+            # رد بدون تغيير الحالة: يُكتب عمود الرد فقط
+            compare_and_swap(
+                complaint,
+                {RESPONSE_FIELDS[response_type]: data['response_text'], 'updated_at': timezone.now()},
+                request.user,
                 action='response_added',
-                description=f'تم إضافة رد من {response_type}',
-                performed_by_id=request.user.id,
-                performed_by_name=request.user.username
+                description=f'تم إضافة رد من {response_type}'
             )
             
             return Response({'message': 'تم إضافة الرد بنجاح'})
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    def award_points_to_representative(self, representative_id, thank_you_message):
-        """منح النقاط للنائب عبر خدمة الإحصائيات"""
-        # TODO: تكامل مع خدمة الإحصائيات
-        pass
+    def award_points_to_representative(self, representative_id, thank_you_message, complaint_id=None):
+        """منح النقاط للنائب عبر خدمة الإحصائيات (حدث في الصندوق الصادر)"""
+        publish_score_award(
+            representative_id, settings.COMPLAINTS_RESOLUTION_POINTS, thank_you_message, complaint_id
+        )
     
     @action(detail=True, methods=['post'])
     def accept(self, request, pk=None):
         """قبول الشكوى (للنائب)"""
         complaint = self.get_object()
+        result = transition_complaint(complaint, 'accept', request.user)
         
-        if complaint.assigned_representative_id != request.user.id:
-            return Response(
-                {'error': 'غير مسموح لك بقبول هذه الشكوى'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        complaint.status = 'accepted'
-        complaint.save()
-        
-        ComplaintHistory.objects.create(
-            complaint=complaint,
-            action='accepted',
-            description='تم قبول الشكوى من قبل النائب',
-            performed_by_id=request.user.id,
-            performed_by_name=request.user.username
+        return self.transition_response(
+            result, 'تم قبول الشكوى بنجاح', 'غير مسموح لك بقبول هذه الشكوى'
         )
-        
-        return Response({'message': 'تم قبول الشكوى بنجاح'})
     
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         """رفض الشكوى (للنائب)"""
         complaint = self.get_object()
-        reason = request.data.get('reason', '')
-        
-        if complaint.assigned_representative_id != request.user.id:
-            return Response(
-                {'error': 'غير مسموح لك برفض هذه الشكوى'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        complaint.status = 'rejected'
-        complaint.representative_response = reason
-        complaint.save()
+        result = transition_complaint(complaint, 'reject', request.user, {
+            'reason': request.data.get('reason', '')
+        })
         
-        ComplaintHistory.objects.create(
-            complaint=complaint,
-            action='rejected',
-            description=f'تم رفض الشكوى من قبل النائب. السبب: {reason}',
-            performed_by_id=request.user.id,
-            performed_by_name=request.user.username
+        return self.transition_response(
+            result, 'تم رفض الشكوى', 'غير مسموح لك برفض هذه الشكوى'
         )
-        
-        return Response({'message': 'تم رفض الشكوى'})
     
     @action(detail=True, methods=['post'])
     def hold(self, request, pk=None):
         """تعليق الشكوى لمدة 3 أيام (للنائب)"""
         complaint = self.get_object()
-        reason = request.data.get('reason', '')
-        
-        if complaint.assigned_representative_id != request.user.id:
-            return Response(
-                {'error': 'غير مسموح لك بتعليق هذه الشكوى'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        result = transition_complaint(complaint, 'hold', request.user, {
+            'reason': request.data.get('reason', '')
+        })
         
-        complaint.status = 'on_hold'
-        complaint.hold_until = timezone.now() + timedelta(days=3)
-        complaint.representative_response = reason
-        complaint.save()
-        
-        ComplaintHistory.objects.create(
-            complaint=complaint,
-            action='on_hold',
-            description=f'تم تعليق الشكوى لمدة 3 أيام. السبب: {reason}',
-            performed_by_id=request.user.id,
-            performed_by_name=request.user.username
+        return self.transition_response(
+            result, 'تم تعليق الشكوى لمدة 3 أيام', 'غير مسموح لك بتعليق هذه الشكوى'
         )
+    
+    @action(detail=False, methods=['post'], url_path='bulk-transition')
+    def bulk_transition(self, request):
+        """تطبيق انتقال حالة (إسناد، قبول، رفض، تعليق، إغلاق) على عدة شكاوى مع نتيجة لكل معرف"""
+        serializer = ComplaintBulkTransitionSerializer(data=request.data)
         
-        return Response({'message': 'تم تعليق الشكوى لمدة 3 أيام'})
+        if serializer.is_valid():
+            data = serializer.validated_data
+            results = bulk_transition(
+                self.get_queryset(), data['ids'], data['transition'], request.user, params=data
+            )
+            
+            return Response({
+                'updated': sum(1 for result in results.values() if result == RESULT_UPDATED),
+                'results': {str(complaint_id): result for complaint_id, result in results.items()},
+            })
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """إحصائيات الشكاوى"""
-        queryset = self.get_queryset()
-        
-        stats = {
-            'total_complaints': queryset.count(),
-            'pending_complaints': queryset.filter(status='pending').count(),
-            'assigned_complaints': queryset.filter(status='assigned').count(),
-            'resolved_complaints': queryset.filter(status='resolved').count(),
-            'rejected_complaints': queryset.filter(status='rejected').count(),
-            'overdue_complaints': queryset.filter(
-                status='on_hold',
-                hold_until__lt=timezone.now()
-            ).count(),
-            'complaints_by_category': dict(
-                queryset.values('category__name').annotate(count=Count('id')).values_list('category__name', 'count')
-            ),
-            'complaints_by_priority': dict(
-                queryset.values('priority').annotate(count=Count('id')).values_list('priority', 'count')
-            ),
-            'recent_complaints': ComplaintListSerializer(
-                queryset.order_by('-created_at')[:10], many=True
-            ).data
-        }
-        
-        serializer = ComplaintStatsSerializer(stats)
+        """إحصائيات الشكاوى (استعلام تجميعي واحد مع تخزين مؤقت لكل نطاق مستخدم)"""
+        stats, cached, cache_age = get_complaint_stats(
+            self.get_queryset(), get_user_scope(request.user)
+        )
+        
+        serializer = ComplaintStatsSerializer({
+            **stats,
+            'cached': cached,
+            'cache_age_seconds': cache_age,
+        })
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'], url_path='export-csv')
+    def export_csv(self, request):
+        """تصدير الشكاوى كملف CSV متدفق (بنفس تصفية وبحث وترتيب القائمة)"""
+        queryset = self.filter_queryset(self.get_queryset())
+        
+        def stream():
+            yield UTF8_BOM
+            yield from iter_complaints_csv(queryset)
+        
+        response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+        filename = f'complaints_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    @action(detail=False, methods=['get'], url_path='export-zip')
+    def export_zip(self, request):
+        """تصدير الشكاوى ومرفقاتها كأرشيف ZIP متدفق (?include_attachments=false لملف CSV فقط)"""
+        queryset = self.filter_queryset(self.get_queryset())
+        include_attachments = request.query_params.get('include_attachments', 'true').lower() != 'false'
+        
+        response = StreamingHttpResponse(
+            iter_complaints_zip(queryset, include_attachments=include_attachments),
+            content_type='application/zip'
+        )
+        filename = f'complaints_export_{timezone.now().strftime("%Y%m%d_%H%M%S")}.zip'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    @action(detail=True, methods=['post'], url_path='upload-sessions')
+    def upload_sessions(self, request, pk=None):
+        """بدء جلسة رفع مرفقات مباشرة إلى التخزين (رابط رفع موقع لكل ملف، ثم finalize)"""
+        complaint = self.get_object()
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        session, targets = create_upload_session(complaint, request.user.id, serializer.validated_data['files'])
+        
+        data = AttachmentUploadSessionSerializer(session).data
+        for file, target in zip(data['files'], targets):
+            file['upload'] = {**target, 'url': request.build_absolute_uri(target['url'])}
+        return Response(data, status=status.HTTP_201_CREATED)
 
 
 class ComplaintAttachmentViewSet(viewsets.ModelViewSet):
@@ -286,6 +393,7 @@ class ComplaintAttachmentViewSet(viewsets.ModelViewSet):
     queryset = ComplaintAttachment.objects.all()
     serializer_class = ComplaintAttachmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ComplaintAttachmentPagination
     parser_classes = [MultiPartParser, FormParser]
     
     def get_queryset(self):
@@ -296,6 +404,56 @@ class ComplaintAttachmentViewSet(viewsets.ModelViewSet):
         return self.queryset
 
 
+class AttachmentUploadSessionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """ViewSet لجلسات رفع المرفقات المباشر (كل مستخدم يرى جلساته فقط)"""
+    
+    queryset = AttachmentUploadSession.objects.all()
+    serializer_class = AttachmentUploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return self.queryset.filter(created_by_id=self.request.user.id)
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """إنشاء مرفقات الجلسة بعد رفع ملفاتها (آمن عند التكرار)"""
+        session = self.get_object()
+        attachments = finalize_upload_session(session, request.user)
+        session.refresh_from_db()
+        
+        data = self.get_serializer(session).data
+        data['attachments'] = ComplaintAttachmentSerializer(
+            attachments, many=True, context=self.get_serializer_context()
+        ).data
+        return Response(data)
+
+
+class LocalUploadView(APIView):
+    """
+    استقبال ملف عبر رابط رفع محلي موقع (LocalUploadBackend)
+    
+    بديل التخزين المباشر في التطوير والاختبارات: الرابط الموقع هو التفويض
+    """
+    
+    authentication_classes = []
+    permission_classes = []
+    
+    def put(self, request, token):
+        target = read_local_target(token)
+        if target is None:
+            return Response({'error': 'رابط الرفع غير صالح أو منتهي الصلاحية'}, status=status.HTTP_403_FORBIDDEN)
+        
+        if request.content_type.split(';')[0].strip() != target['content_type']:
+            return Response({'error': 'نوع الملف لا يطابق النوع المعلن'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        content = request.body
+        if len(content) != target['size']:
+            return Response({'error': 'حجم الملف لا يطابق الحجم المعلن'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        write_local_upload(target, content)
+        return Response(status=status.HTTP_201_CREATED)
+
+
 class ComplaintCategoryViewSet(viewsets.ModelViewSet):
     """ViewSet لإدارة تصنيفات الشكاوى"""
     
@@ -325,12 +483,14 @@ class ComplaintTemplateViewSet(viewsets.ModelViewSet):
         })
 
 
-class ComplaintHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class ComplaintHistoryViewSet(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet لعرض تاريخ الشكاوى"""
     
     queryset = ComplaintHistory.objects.all()
     serializer_class = ComplaintHistorySerializer
+    values_serializer_class = ComplaintHistoryValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ComplaintHistoryPagination
     
     def get_queryset(self):
         """تصفية التاريخ حسب الشكوى"""
@@ -359,6 +519,7 @@ class ServiceInfoView(APIView):
                 'attachments': '/api/v1/attachments/',
                 'templates': '/api/v1/templates/',
                 'history': '/api/v1/history/',
+                'upload_sessions': '/api/v1/upload-sessions/',
                 'health': '/health/',
                 'admin': '/admin/',
             },
@@ -386,5 +547,6 @@ class HealthCheckView(APIView):
             'status': 'healthy',
             'service': 'naebak-complaints-service',
             'timestamp': timezone.now(),
-            'version': '1.0.0'
+            'version': '1.0.0',
+            'cache': get_cache_metrics(),
         })
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'complaints.middleware.CompressionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -116,6 +117,9 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# عرض JSON عبر orjson (نفس المخرجات، ويرجع للعرض الافتراضي إذا لم تكن مثبتة)
+COMPLAINTS_FAST_JSON = config('COMPLAINTS_FAST_JSON', default=True, cast=bool)
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -133,7 +137,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'complaints.renderers.FastJSONRenderer' if COMPLAINTS_FAST_JSON else 'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -160,24 +164,47 @@ CORS_ALLOWED_ORIGINS = config(
 
 CORS_ALLOW_CREDENTIALS = True
 
-# Cache Configuration (تعطيل Redis مؤقتاً للتطوير المحلي)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Cache Configuration
+# نوع التخزين المؤقت: locmem (لكل عملية، للتطوير)، redis (مشترك بين العمال)،
+# أو tiered (طبقة محلية قصيرة أمام Redis)
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+REDIS_URL = config('REDIS_URL', default='redis://127.0.0.1:6379/1')
+
+# مدة النسخة المحلية في التخزين ذي الطبقتين (بالثواني)
+CACHE_LOCAL_TIMEOUT = config('CACHE_LOCAL_TIMEOUT', default=5, cast=int)
+
+LOCMEM_CACHE = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'unique-snowflake',
+}
+
+REDIS_CACHE = {
+    'BACKEND': 'django_redis.cache.RedisCache',
+    'LOCATION': REDIS_URL,
+    'OPTIONS': {
+        'CLIENT_CLASS': 'django_redis.client.DefaultClient',
     }
 }
 
-# Redis Cache (معطل مؤقتاً)
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django_redis.cache.RedisCache',
-#         'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
-#         'OPTIONS': {
-#             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-#         }
-#     }
-# }
+if CACHE_BACKEND == 'redis':
+    CACHES = {'default': REDIS_CACHE}
+elif CACHE_BACKEND == 'tiered':
+    CACHES = {
+        'default': {
+            'BACKEND': 'complaints.cache_backends.TieredCache',
+            'OPTIONS': {
+                'LOCAL': 'local',
+                'SHARED': 'shared',
+                'LOCAL_TIMEOUT': CACHE_LOCAL_TIMEOUT,
+                # أرقام إصدارات النطاقات تُقرأ من Redis دائماً حتى يظهر الإبطال فوراً لكل العمال
+                'SHARED_ONLY_PREFIXES': ['complaints:version:'],
+            },
+        },
+        'local': {**LOCMEM_CACHE, 'LOCATION': 'complaints-local'},
+        'shared': REDIS_CACHE,
+    }
+else:
+    CACHES = {'default': LOCMEM_CACHE}
 
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://127.0.0.1:6379/0')
@@ -187,6 +214,19 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# فاصل مسح التعليقات المنتهية (بالثواني): كل تشغيل يقرأ المستحق فقط عبر فهرس (status, hold_until)
+HOLD_EXPIRY_INTERVAL_SECONDS = config('HOLD_EXPIRY_INTERVAL_SECONDS', default=30, cast=int)
+
+# المهام الدورية (celery beat)
+CELERY_BEAT_SCHEDULE = {
+    'expire-due-holds': {
+        'task': 'complaints.tasks.send_overdue_reminders',
+        'schedule': HOLD_EXPIRY_INTERVAL_SECONDS,
+        # لا تتراكم التشغيلات الفائتة: التشغيل التالي يلتقط نفس الشكاوى
+        'options': {'expires': HOLD_EXPIRY_INTERVAL_SECONDS},
+    },
+}
+
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -208,6 +248,30 @@ ALLOWED_ATTACHMENT_TYPES = [
 ]
 MAX_ATTACHMENT_SIZE = 5 * 1024 * 1024  # 5MB per file
 
+# إعداد البحث النصي الكامل في PostgreSQL (simple أو arabic)
+COMPLAINTS_SEARCH_CONFIG = config('COMPLAINTS_SEARCH_CONFIG', default='simple')
+
+# جدول ظل FTS5 للبحث على SQLite (بيئات التطوير والحافة)
+COMPLAINTS_SQLITE_FTS = config('COMPLAINTS_SQLITE_FTS', default=True, cast=bool)
+
+# عدد الصفوف المقروءة في كل دفعة عند تصدير الشكاوى
+COMPLAINTS_EXPORT_CHUNK_SIZE = config('COMPLAINTS_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# عدد الشكاوى التقريبي في كل جزء من أجزاء التصدير المتوازي
+COMPLAINTS_EXPORT_SHARD_SIZE = config('COMPLAINTS_EXPORT_SHARD_SIZE', default=5000, cast=int)
+
+# مدة الاحتفاظ بمرفقات الشكاوى المحلولة (بالأيام)
+COMPLAINTS_ATTACHMENT_RETENTION_DAYS = config('COMPLAINTS_ATTACHMENT_RETENTION_DAYS', default=180, cast=int)
+
+# عدد المرفقات في كل دفعة عند تنظيف المرفقات القديمة
+COMPLAINTS_CLEANUP_CHUNK_SIZE = config('COMPLAINTS_CLEANUP_CHUNK_SIZE', default=500, cast=int)
+
+# الحد الأقصى للمرفقات المحذوفة في كل تشغيل (0 بدون حد)
+COMPLAINTS_CLEANUP_MAX_DELETES = config('COMPLAINTS_CLEANUP_MAX_DELETES', default=20000, cast=int)
+
+# عدد الخيوط المتوازية لحذف الملفات من التخزين
+COMPLAINTS_STORAGE_DELETE_WORKERS = config('COMPLAINTS_STORAGE_DELETE_WORKERS', default=8, cast=int)
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -272,5 +336,82 @@ if not DEBUG:
 AUTH_SERVICE_URL = config('AUTH_SERVICE_URL', default='http://localhost:8002')
 CONTENT_SERVICE_URL = config('CONTENT_SERVICE_URL', default='http://localhost:8001')
 STATISTICS_SERVICE_URL = config('STATISTICS_SERVICE_URL', default='http://localhost:8004')
+NOTIFICATIONS_SERVICE_URL = config('NOTIFICATIONS_SERVICE_URL', default='http://localhost:8005')
 SERVICE_TIMEOUT = int(config('SERVICE_TIMEOUT', default='10'))
+
+# عملاء الخدمات الأخرى (complaints.clients)
+# مهلة الاتصال (SERVICE_TIMEOUT هي مهلة القراءة) بالثواني
+SERVICE_CONNECT_TIMEOUT = config('SERVICE_CONNECT_TIMEOUT', default=3, cast=float)
+
+# عدد الاتصالات المفتوحة لكل خادم
+SERVICE_POOL_SIZE = config('SERVICE_POOL_SIZE', default=10, cast=int)
+
+# إعادة المحاولة للطلبات الآمنة للتكرار: العدد والتأخير الأول (بالثواني)
+SERVICE_RETRIES = config('SERVICE_RETRIES', default=2, cast=int)
+SERVICE_RETRY_BACKOFF_SECONDS = config('SERVICE_RETRY_BACKOFF_SECONDS', default=0.2, cast=float)
+
+# قاطع الدائرة: عدد الفشل المتتالي قبل الفتح، ومدة الانتظار قبل الطلب التجريبي
+SERVICE_BREAKER_THRESHOLD = config('SERVICE_BREAKER_THRESHOLD', default=5, cast=int)
+SERVICE_BREAKER_RESET_SECONDS = config('SERVICE_BREAKER_RESET_SECONDS', default=30, cast=int)
+
+# التخزين المؤقت للاستجابات
+# مدة تخزين قوائم وتفاصيل الشكاوى (الإبطال يتم برفع إصدار النطاق عند التعديل)
 CACHE_TIMEOUT = int(config('CACHE_TIMEOUT', default='300'))
+STATS_CACHE_TIMEOUT = int(config('STATS_CACHE_TIMEOUT', default='60'))
+# تخزين القوائم والتفاصيل مفعّل فقط مع تخزين مشترك بين العمال (redis/tiered): مع locmem يبطل
+# كل عامل نسخه وحده فيعرض العمال الآخرون نسخاً قديمة (الإحصائيات تُخزن دائماً لمدة قصيرة)
+CACHE_RESPONSES = config('CACHE_RESPONSES', default=CACHE_BACKEND in ('redis', 'tiered'), cast=bool)
+
+# توصيل الأحداث من الصندوق الصادر للخدمات الأخرى
+# نافذة تجميع الأحداث قبل إرسالها (بالثواني)
+OUTBOX_COALESCE_SECONDS = config('OUTBOX_COALESCE_SECONDS', default=5, cast=int)
+
+# مدة حجز الدفعة أثناء إرسالها (بعدها يمكن لموزع آخر إعادة إرسالها)
+OUTBOX_LEASE_SECONDS = config('OUTBOX_LEASE_SECONDS', default=120, cast=int)
+
+# إعادة المحاولة بتأخير أسي: التأخير الأول، والحد الأقصى، وعدد المحاولات
+OUTBOX_RETRY_BASE_SECONDS = config('OUTBOX_RETRY_BASE_SECONDS', default=30, cast=int)
+OUTBOX_RETRY_MAX_SECONDS = config('OUTBOX_RETRY_MAX_SECONDS', default=3600, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=10, cast=int)
+
+# عدد الدفعات المتزامنة لكل خدمة
+NOTIFICATIONS_CONCURRENCY = config('NOTIFICATIONS_CONCURRENCY', default=4, cast=int)
+STATISTICS_CONCURRENCY = config('STATISTICS_CONCURRENCY', default=2, cast=int)
+
+# عدد الأحداث في كل دفعة لكل خدمة (الإشعارات في طلب واحد، والنقاط طلب لكل حدث)
+NOTIFICATIONS_BATCH_SIZE = config('NOTIFICATIONS_BATCH_SIZE', default=500, cast=int)
+STATISTICS_BATCH_SIZE = config('STATISTICS_BATCH_SIZE', default=50, cast=int)
+
+# فاصل الموزع الدوري (بالثواني): يرسل الأحداث التي تعذرت جدولة موزعها (طابور الرسائل متوقف)
+OUTBOX_SWEEP_SECONDS = config('OUTBOX_SWEEP_SECONDS', default=60, cast=int)
+CELERY_BEAT_SCHEDULE['dispatch-outbox-events'] = {
+    'task': 'complaints.tasks.dispatch_outbox_events',
+    'schedule': OUTBOX_SWEEP_SECONDS,
+    'options': {'expires': OUTBOX_SWEEP_SECONDS},
+}
+
+# النقاط الممنوحة للنائب عند حل الشكوى
+COMPLAINTS_RESOLUTION_POINTS = config('COMPLAINTS_RESOLUTION_POINTS', default=1, cast=int)
+
+# التخزين المؤقت لبيانات المواطنين من خدمة المصادقة
+# مدة صلاحية المدخل، ومدة إرجاعه قديماً أثناء تحديثه في الخلفية (بالثواني)
+CITIZEN_PROFILE_TTL = config('CITIZEN_PROFILE_TTL', default=600, cast=int)
+CITIZEN_PROFILE_STALE_SECONDS = config('CITIZEN_PROFILE_STALE_SECONDS', default=3600, cast=int)
+
+# مدة تخزين "المواطن غير موجود" (أقصر حتى يظهر الحساب الجديد سريعاً)
+CITIZEN_PROFILE_NEGATIVE_TTL = config('CITIZEN_PROFILE_NEGATIVE_TTL', default=60, cast=int)
+
+# عدد المواطنين في كل طلب جلب مجمّع
+CITIZEN_PROFILE_BATCH_SIZE = config('CITIZEN_PROFILE_BATCH_SIZE', default=200, cast=int)
+
+# ضغط الاستجابات: أقل حجم للضغط (بالبايت)، وجودة brotli (0-11، الأعلى أبطأ)
+COMPRESSION_MIN_BYTES = config('COMPRESSION_MIN_BYTES', default=1024, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+
+# عدد عناصر السجل والمرفقات المضمّنة في تفاصيل الشكوى (البقية عبر رابط المؤشر أو ?expand=)
+COMPLAINT_DETAIL_EMBED_LIMIT = config('COMPLAINT_DETAIL_EMBED_LIMIT', default=10, cast=int)
+
+# رفع المرفقات المباشر: واجهة التخزين (GCS في الإنتاج، والبديل المحلي للتطوير والاختبارات)
+# ومدة صلاحية جلسة الرفع وروابطها الموقعة (بالثواني)
+COMPLAINTS_UPLOAD_BACKEND = config('COMPLAINTS_UPLOAD_BACKEND', default='complaints.uploads.LocalUploadBackend')
+COMPLAINTS_UPLOAD_SESSION_SECONDS = config('COMPLAINTS_UPLOAD_SESSION_SECONDS', default=3600, cast=int)
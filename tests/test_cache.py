@@ -0,0 +1,179 @@
+"""
+اختبارات التخزين المؤقت بإصدار لكل نطاق مستخدم والتخزين ذي الطبقتين
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from complaints.cache import get_cache_metrics, reset_cache_metrics
+from complaints.models import Complaint
+from complaints.transitions import transition_complaint
+
+User = get_user_model()
+
+TIERED_CACHES = {
+    'default': {
+        'BACKEND': 'complaints.cache_backends.TieredCache',
+        'OPTIONS': {'LOCAL_TIMEOUT': 5, 'SHARED_ONLY_PREFIXES': ['complaints:version:']},
+    },
+    'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-local'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-shared'},
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTest(SimpleTestCase):
+    """اختبارات القراءة من الطبقتين والعمليات الذرية في الطبقة المشتركة"""
+
+    def setUp(self):
+        """تفريغ الطبقتين"""
+        self.tiered = caches['default']
+        self.local = caches['local']
+        self.shared = caches['shared']
+        self.tiered.clear()
+
+    def test_read_through_local_tier(self):
+        """اختبار نسخ القيمة من الطبقة المشتركة للمحلية عند القراءة"""
+        self.shared.set('key', 'value')
+
+        self.assertEqual(self.tiered.get('key'), 'value')
+        self.assertEqual(self.local.get('key'), 'value')
+        self.assertEqual(self.tiered.get('key'), 'value')
+        self.assertIsNone(self.tiered.get('missing'))
+
+        self.assertEqual(self.tiered.stats(), {'local_hits': 1, 'shared_hits': 1, 'misses': 1})
+
+    def test_shared_only_keys_and_atomic_operations(self):
+        """اختبار أن أرقام الإصدارات والأقفال لا تُنسخ محلياً"""
+        self.tiered.set('complaints:version:admin', 1)
+        self.assertEqual(self.tiered.incr('complaints:version:admin'), 2)
+        self.assertEqual(self.tiered.get('complaints:version:admin'), 2)
+        self.assertIsNone(self.local.get('complaints:version:admin'))
+
+        self.assertTrue(self.tiered.add('lock', 1))
+        self.assertFalse(self.tiered.add('lock', 1))
+        self.assertIsNone(self.local.get('lock'))
+
+    def test_write_and_delete_both_tiers(self):
+        """اختبار الكتابة والحذف في الطبقتين"""
+        self.tiered.set_many({'a': 1, 'b': 2}, timeout=60)
+        self.assertEqual(self.local.get_many(['a', 'b']), {'a': 1, 'b': 2})
+
+        self.tiered.delete('a')
+        self.assertIsNone(self.local.get('a'))
+        self.assertIsNone(self.shared.get('a'))
+        self.assertEqual(self.tiered.get_many(['a', 'b']), {'b': 2})
+
+
+@override_settings(CACHE_RESPONSES=True)
+class ScopedResponseCacheTest(TestCase):
+    """اختبارات تخزين القوائم والتفاصيل لكل نطاق وإبطالها عند التعديل"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        reset_cache_metrics()
+        self.admin = User.objects.create_user(username="admin1", password="pass12345")
+        self.citizen = User.objects.create_user(username="citizen1", password="pass12345")
+        self.citizen.user_type = 'citizen'
+        self.other_citizen = User.objects.create_user(username="citizen2", password="pass12345")
+        self.other_citizen.user_type = 'citizen'
+
+        self.complaint = self.create_complaint(self.citizen)
+        self.other_complaint = self.create_complaint(self.other_citizen)
+
+    def create_complaint(self, citizen):
+        return Complaint.objects.create(
+            title="شكوى اختبار",
+            content="محتوى الشكوى",
+            citizen_id=citizen.id,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+
+    def get(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_list_and_detail_cached_per_scope(self):
+        """اختبار القراءة الثانية بدون استعلامات، وفصل نطاقات المستخدمين"""
+        detail_url = f'/api/v1/complaints/{self.complaint.id}/'
+        self.get(self.citizen, '/api/v1/complaints/')
+        self.get(self.citizen, detail_url)
+
+        response, queries = self.get(self.citizen, '/api/v1/complaints/')
+        self.assertEqual(queries, 0)
+        self.assertEqual(response.data['count'], 1)
+        _, queries = self.get(self.citizen, detail_url)
+        self.assertEqual(queries, 0)
+
+        response, queries = self.get(self.admin, '/api/v1/complaints/')
+        self.assertGreater(queries, 0)
+        self.assertEqual(response.data['count'], 2)
+
+    @override_settings(CACHE_RESPONSES=False)
+    def test_not_cached_without_shared_backend(self):
+        """اختبار عدم تخزين الاستجابات دون تخزين مشترك بين العمال"""
+        self.get(self.citizen, '/api/v1/complaints/')
+
+        _, queries = self.get(self.citizen, '/api/v1/complaints/')
+        self.assertGreater(queries, 0)
+        self.assertEqual(get_cache_metrics()['namespaces'], {})
+
+    def test_write_invalidates_affected_scopes_only(self):
+        """اختبار أن تعديل شكوى مواطن لا يبطل نطاق مواطن آخر"""
+        self.get(self.citizen, '/api/v1/complaints/')
+        self.get(self.other_citizen, '/api/v1/complaints/')
+        self.get(self.admin, '/api/v1/complaints/')
+
+        self.other_complaint.title = "عنوان جديد"
+        self.other_complaint.save()
+
+        _, queries = self.get(self.citizen, '/api/v1/complaints/')
+        self.assertEqual(queries, 0)
+        response, _ = self.get(self.other_citizen, '/api/v1/complaints/')
+        self.assertEqual(response.data['results'][0]['title'], "عنوان جديد")
+        _, queries = self.get(self.admin, '/api/v1/complaints/')
+        self.assertGreater(queries, 0)
+
+    def test_reassignment_invalidates_both_representatives(self):
+        """اختبار إبطال نطاق النائب السابق والجديد عند إعادة الإسناد"""
+        old_rep = User.objects.create_user(username="rep1", password="pass12345")
+        old_rep.user_type = 'representative'
+        new_rep = User.objects.create_user(username="rep2", password="pass12345")
+        new_rep.user_type = 'representative'
+        transition_complaint(self.complaint, 'assign', self.admin, {
+            'representative_id': old_rep.id, 'representative_name': 'النائب الأول', 'notes': '',
+        })
+
+        response, _ = self.get(old_rep, '/api/v1/complaints/')
+        self.assertEqual(response.data['count'], 1)
+        self.get(new_rep, '/api/v1/complaints/')
+
+        transition_complaint(self.complaint, 'assign', self.admin, {
+            'representative_id': new_rep.id, 'representative_name': 'النائب الثاني', 'notes': '',
+        })
+
+        response, _ = self.get(old_rep, '/api/v1/complaints/')
+        self.assertEqual(response.data['count'], 0)
+        response, _ = self.get(new_rep, '/api/v1/complaints/')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_hit_miss_counters(self):
+        """اختبار عدادات القراءة في فحص صحة الخدمة"""
+        self.get(self.citizen, '/api/v1/complaints/')
+        self.get(self.citizen, '/api/v1/complaints/')
+
+        self.assertEqual(
+            get_cache_metrics()['namespaces']['list'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+        )
+        response = APIClient().get('/health/')
+        self.assertEqual(response.data['cache']['backend'], 'LocMemCache')
@@ -0,0 +1,160 @@
+"""
+اختبارات عملاء الخدمات الأخرى مقابل خدمة وهمية محلية
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+import requests
+
+from complaints.clients import CircuitOpenError, ServiceError, get_client, get_metrics, reset_clients
+
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    """خدمة وهمية: ترد بالردود المجدولة بالترتيب (ثم 200) وتسجل الطلبات"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    script = []
+    received = []
+
+    def respond(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.received.append({
+            'method': self.command,
+            'path': self.path,
+            'headers': dict(self.headers),
+            'port': self.client_address[1],
+        })
+        status, delay = self.script.pop(0) if self.script else (200, 0)
+        time.sleep(delay)
+        body = json.dumps({'name': 'أحمد محمد'}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = respond
+    do_POST = respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServiceClientTest(SimpleTestCase):
+    """اختبارات المهلة وإعادة المحاولة وقاطع الدائرة والجلسات المشتركة"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeServiceHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        cls.settings_override = override_settings(
+            AUTH_SERVICE_URL=url,
+            STATISTICS_SERVICE_URL=url,
+            SERVICE_TIMEOUT=0.2,
+            SERVICE_RETRIES=2,
+            SERVICE_RETRY_BACKOFF_SECONDS=0.001,
+            SERVICE_BREAKER_THRESHOLD=3,
+            SERVICE_BREAKER_RESET_SECONDS=30,
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        """إعادة حالة الخدمة الوهمية والعملاء"""
+        reset_clients()
+        self.addCleanup(reset_clients)
+        FakeServiceHandler.script = []
+        FakeServiceHandler.received = []
+
+    def test_keep_alive_session_per_host(self):
+        """اختبار إعادة استخدام نفس الاتصال بين الطلبات والخدمات على نفس الخادم"""
+        for _attempt in range(3):
+            get_client('auth').get('/api/v1/users/1/')
+        get_client('statistics').get('/api/v1/health/')
+
+        self.assertEqual(len({request['port'] for request in FakeServiceHandler.received}), 1)
+
+    def test_retries_transient_errors(self):
+        """اختبار إعادة المحاولة بعد 503 لطلب آمن للتكرار"""
+        FakeServiceHandler.script = [(503, 0), (503, 0)]
+
+        response = get_client('auth').get('/api/v1/users/1/')
+
+        self.assertEqual(response.json(), {'name': 'أحمد محمد'})
+        self.assertEqual(len(FakeServiceHandler.received), 3)
+        self.assertEqual(get_metrics()['auth']['retries'], 2)
+
+    def test_post_without_idempotency_key_not_retried(self):
+        """اختبار عدم تكرار POST بدون مفتاح عدم تكرار"""
+        FakeServiceHandler.script = [(503, 0)]
+
+        with self.assertRaises(ServiceError):
+            get_client('statistics').post('/api/v1/update-score/', json={})
+        self.assertEqual(len(FakeServiceHandler.received), 1)
+
+        FakeServiceHandler.script = [(503, 0)]
+        get_client('statistics').post('/api/v1/update-score/', json={}, headers={'Idempotency-Key': 'abc'})
+        self.assertEqual(FakeServiceHandler.received[-1]['headers']['Idempotency-Key'], 'abc')
+        self.assertEqual(len(FakeServiceHandler.received), 3)
+
+    def test_read_timeout(self):
+        """اختبار مهلة القراءة وإعادة المحاولة ثم الفشل"""
+        FakeServiceHandler.script = [(200, 0.5)] * 3
+
+        with self.assertRaises(ServiceError):
+            get_client('auth').get('/api/v1/users/1/')
+        self.assertEqual(get_metrics()['auth']['failures'], 1)
+
+    def test_client_errors_not_retried(self):
+        """اختبار أن 404 لا يُعاد ولا يُحسب فشلاً للخدمة"""
+        FakeServiceHandler.script = [(404, 0)]
+
+        with self.assertRaises(requests.HTTPError):
+            get_client('auth').get('/api/v1/users/999/')
+        self.assertEqual(len(FakeServiceHandler.received), 1)
+        self.assertEqual(get_client('auth').breaker.state, 'closed')
+
+    def test_circuit_breaker(self):
+        """اختبار فتح الدائرة بعد الفشل المتتالي ثم الطلب التجريبي بعد مدة الانتظار"""
+        client = get_client('auth')
+        FakeServiceHandler.script = [(500, 0)] * 3
+        for _attempt in range(3):
+            with self.assertRaises(requests.HTTPError):
+                client.get('/api/v1/users/1/')
+
+        with self.assertRaises(CircuitOpenError):
+            client.get('/api/v1/users/1/')
+        self.assertEqual(len(FakeServiceHandler.received), 3)
+        self.assertEqual(get_metrics()['auth']['rejected'], 1)
+
+        later = time.monotonic() + 31
+        with mock.patch('complaints.clients.time.monotonic', return_value=later):
+            self.assertEqual(client.breaker.state, 'half_open')
+            client.get('/api/v1/users/1/')
+        self.assertEqual(client.breaker.state, 'closed')
+
+    def test_unexpected_error_releases_trial(self):
+        """اختبار أن خطأ غير متوقع في الطلب التجريبي لا يُبقي الدائرة رافضة للطلبات"""
+        client = get_client('auth')
+        client.breaker.opened_at = time.monotonic() - 31
+
+        with mock.patch('complaints.clients.get_session', side_effect=ValueError('bad session')):
+            with self.assertRaises(ValueError):
+                client.get('/api/v1/users/1/')
+
+        self.assertEqual(client.breaker.state, 'half_open')
+        client.get('/api/v1/users/1/')
+        self.assertEqual(client.breaker.state, 'closed')
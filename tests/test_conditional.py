@@ -0,0 +1,172 @@
+"""
+اختبارات الطلبات الشرطية (ETag / Last-Modified) لقائمة وتفاصيل الشكاوى
+"""
+
+import tempfile
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from complaints.models import Complaint, ComplaintAttachment, ComplaintCategory, ComplaintHistory
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CACHE_RESPONSES=True)
+class ConditionalGetTest(TestCase):
+    """اختبارات الرد بـ 304 وتغير ETag عند تعديل الشكوى أو سجلها أو مرفقاتها"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.complaint = Complaint.objects.create(
+            title="شكوى اختبار",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+        self.url = f'/api/v1/complaints/{self.complaint.id}/'
+
+    def get(self, url, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **headers)
+        return response, queries
+
+    def test_detail_validators(self):
+        """اختبار إرسال ETag ضعيف و Last-Modified مع التفاصيل"""
+        response, _ = self.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_detail_not_modified(self):
+        """اختبار 304 من التخزين المؤقت، ثم باستعلام واحد بدون السجل والمرفقات"""
+        etag = self.get(self.url)[0]['ETag']
+
+        response, queries = self.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        cache.clear()
+        response, queries = self.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(queries), 1)
+
+    def test_detail_if_modified_since(self):
+        """اختبار 304 عند إرسال موعد آخر تعديل"""
+        last_modified = self.get(self.url)[0]['Last-Modified']
+        cache.clear()
+
+        response, _ = self.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_related_rows(self):
+        """اختبار تغير ETag عند إضافة سجل أو مرفق، وعودته عند حذف المرفق"""
+        etags = [self.get(self.url)[0]['ETag']]
+
+        ComplaintHistory.objects.create(
+            complaint=self.complaint, action='updated', description='تعديل',
+            performed_by_id=self.user.id, performed_by_name=self.user.username,
+        )
+        cache.clear()
+        etags.append(self.get(self.url)[0]['ETag'])
+
+        attachment = ComplaintAttachment.objects.create(
+            complaint=self.complaint,
+            file=SimpleUploadedFile('file.pdf', b'%PDF-1.4 test'),
+            original_name='file.pdf',
+            file_size=13,
+        )
+        etags.append(self.get(self.url)[0]['ETag'])
+
+        attachment.delete()
+        response, _ = self.get(self.url, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, 200)
+        etags.append(response['ETag'])
+
+        self.assertEqual(len(set(etags)), 3)
+        self.assertEqual(etags[3], etags[1])
+
+    def test_detail_etag_changes_with_category(self):
+        """اختبار تغير ETag التفاصيل عند تعديل تصنيف الشكوى"""
+        category = ComplaintCategory.objects.create(name="خدمات عامة")
+        Complaint.objects.filter(pk=self.complaint.pk).update(category=category)
+        etag = self.get(self.url)[0]['ETag']
+
+        category.name = "المرافق"
+        category.save()
+
+        response, _ = self.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['category_name'], "المرافق")
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_from_content(self):
+        """اختبار أن ETag القائمة من الصفحة نفسها ولا يعتمد على التخزين المؤقت لعامل بعينه"""
+        etag = self.get('/api/v1/complaints/')[0]['ETag']
+
+        # عامل آخر بتخزين فارغ يعطي نفس ETag
+        cache.clear()
+        response, _ = self.get('/api/v1/complaints/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # تعديل لم يصل إبطاله لهذا العامل يغير ETag
+        Complaint.objects.filter(pk=self.complaint.pk).update(title="عنوان جديد", updated_at=timezone.now())
+        with self.settings(CACHE_RESPONSES=False):
+            response, _ = self.get('/api/v1/complaints/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_changes_when_attachments_move(self):
+        """اختبار تغير ETag القائمة عند حذف مرفق من شكوى وإضافة مرفق لأخرى"""
+        other = Complaint.objects.create(
+            title="شكوى أخرى", content="محتوى", citizen_id=124,
+            citizen_name="سارة علي", citizen_email="sara@example.com",
+        )
+        attachment = ComplaintAttachment.objects.create(
+            complaint=self.complaint,
+            file=SimpleUploadedFile('file.pdf', b'%PDF-1.4 test'),
+            original_name='file.pdf',
+            file_size=13,
+        )
+        etag = self.get('/api/v1/complaints/')[0]['ETag']
+
+        attachment.delete()
+        ComplaintAttachment.objects.create(
+            complaint=other,
+            file=SimpleUploadedFile('other.pdf', b'%PDF-1.4 test'),
+            original_name='other.pdf',
+            file_size=13,
+        )
+        cache.clear()
+
+        response, _ = self.get('/api/v1/complaints/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_not_modified_until_write(self):
+        """اختبار 304 للقائمة بدون استعلامات حتى تعديل شكوى في النطاق"""
+        etag = self.get('/api/v1/complaints/')[0]['ETag']
+
+        response, queries = self.get('/api/v1/complaints/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        self.complaint.title = "عنوان جديد"
+        self.complaint.save()
+
+        response, _ = self.get('/api/v1/complaints/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,98 @@
+"""
+اختبارات جدول عدادات الشكاوى
+"""
+
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from complaints.models import Complaint, ComplaintCategory, ComplaintStatCounter
+from complaints.stats import compute_complaint_stats, compute_counter_stats, diff_counter_buckets
+
+
+class ComplaintStatCounterTest(TestCase):
+    """اختبارات تحديث العدادات تدريجياً"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.category = ComplaintCategory.objects.create(name="خدمات عامة")
+
+    def create_complaint(self, **kwargs):
+        """إنشاء شكوى للاختبار"""
+        return Complaint.objects.create(
+            title="شكوى اختبار",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+            **kwargs
+        )
+
+    def counter(self, status, priority='medium', category_id=0, representative_id=0):
+        """قراءة قيمة خانة واحدة"""
+        bucket = ComplaintStatCounter.objects.filter(
+            status=status, priority=priority,
+            category_id=category_id, representative_id=representative_id
+        ).first()
+        return bucket.count if bucket else 0
+
+    def test_counters_follow_complaint_lifecycle(self):
+        """اختبار تحديث العدادات عند الإنشاء والتعديل والحذف"""
+        complaint = self.create_complaint(category=self.category)
+        self.assertEqual(self.counter('pending', category_id=self.category.id), 1)
+
+        complaint.status = 'assigned'
+        complaint.assigned_representative_id = 7
+        complaint.save()
+        self.assertEqual(self.counter('pending', category_id=self.category.id), 0)
+        self.assertEqual(self.counter('assigned', category_id=self.category.id, representative_id=7), 1)
+
+        complaint.delete()
+        self.assertEqual(self.counter('assigned', category_id=self.category.id, representative_id=7), 0)
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_deleted_category_merged_into_uncategorized(self):
+        """اختبار نقل خانات التصنيف المحذوف إلى "بدون تصنيف" """
+        complaint = self.create_complaint(category=self.category)
+        self.create_complaint(category=self.category, status='assigned', assigned_representative_id=7)
+        self.create_complaint()
+        other = ComplaintCategory.objects.create(name="المرافق")
+        self.create_complaint(category=other)
+
+        self.category.delete()
+        self.assertEqual(self.counter('pending'), 2)
+        self.assertEqual(self.counter('assigned', representative_id=7), 1)
+        self.assertEqual(self.counter('pending', category_id=other.id), 1)
+        self.assertEqual(diff_counter_buckets(), {})
+
+        # الشكوى تتحرك من خانة "بدون تصنيف" لا من خانة التصنيف المحذوف
+        complaint.refresh_from_db()
+        complaint.status = 'resolved'
+        complaint.save()
+        self.assertEqual(diff_counter_buckets(), {})
+
+        ComplaintCategory.objects.filter(pk=other.pk).delete()
+        self.assertEqual(self.counter('pending'), 2)
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_counter_stats_match_aggregate_stats(self):
+        """اختبار تطابق الإحصائيات من العدادات مع الاستعلام التجميعي"""
+        self.create_complaint(category=self.category, priority='high')
+        self.create_complaint(status='resolved')
+        self.create_complaint(status='assigned', assigned_representative_id=7)
+
+        self.assertEqual(compute_counter_stats(), compute_complaint_stats(Complaint.objects.all()))
+        self.assertEqual(compute_counter_stats(representative_id=7)['total_complaints'], 1)
+
+    def test_rebuild_command_repairs_drift(self):
+        """اختبار اكتشاف الانحراف وإصلاحه بأمر الإدارة"""
+        self.create_complaint()
+        Complaint.objects.update(status='closed')
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_complaint_counters', '--verify', stdout=StringIO())
+
+        call_command('rebuild_complaint_counters', stdout=StringIO())
+        self.assertEqual(self.counter('closed'), 1)
+        call_command('rebuild_complaint_counters', '--verify', stdout=StringIO())
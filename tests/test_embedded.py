@@ -0,0 +1,110 @@
+"""
+اختبارات تضمين السجل والمرفقات المحدود في تفاصيل الشكوى و ?expand=
+"""
+
+import tempfile
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from complaints.models import Complaint, ComplaintAttachment, ComplaintHistory
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), COMPLAINT_DETAIL_EMBED_LIMIT=3)
+class ComplaintDetailEmbeddingTest(TestCase):
+    """اختبارات تفاصيل الشكوى مع سجل ومرفقات أكثر من الحد"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.complaint = Complaint.objects.create(
+            title="شكوى طويلة",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+        for index in range(7):
+            ComplaintHistory.objects.create(
+                complaint=self.complaint, action='status_changed', description=f'تعديل {index}',
+                performed_by_id=self.user.id, performed_by_name=self.user.username,
+            )
+        for index in range(4):
+            ComplaintAttachment.objects.create(
+                complaint=self.complaint,
+                file=SimpleUploadedFile(f'file{index}.pdf', b'%PDF-1.4 test'),
+                original_name=f'file{index}.pdf',
+            )
+        self.url = f'/api/v1/complaints/{self.complaint.id}/'
+        self.history_ids = list(
+            ComplaintHistory.objects.filter(complaint=self.complaint)
+            .order_by('-performed_at', '-id').values_list('id', flat=True)
+        )
+
+    def test_embeds_latest_history_with_cursor(self):
+        """اختبار تضمين أحدث السجل فقط مع رابط يكمل من بعده"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['id'] for entry in response.data['history']], self.history_ids[:3])
+        self.assertEqual(len(response.data['attachments']), 3)
+        self.assertEqual(response.data['attachments_count'], 4)
+
+        remaining = []
+        next_link = response.data['history_next']
+        while next_link:
+            page = self.client.get(next_link)
+            remaining.extend(entry['id'] for entry in page.data['results'])
+            next_link = page.data['next']
+        self.assertEqual(remaining, self.history_ids[3:])
+
+    def test_attachments_cursor(self):
+        """اختبار أن رابط المرفقات يعيد المرفق غير المضمّن"""
+        response = self.client.get(self.url)
+        page = self.client.get(response.data['attachments_next'])
+
+        self.assertEqual([item['original_name'] for item in page.data['results']], ['file3.pdf'])
+
+    def test_expand_returns_full_relation(self):
+        """اختبار ?expand= لإرجاع العلاقة كاملة بدون رابط"""
+        response = self.client.get(f'{self.url}?expand=history')
+
+        self.assertEqual([entry['id'] for entry in response.data['history']], self.history_ids)
+        self.assertIsNone(response.data['history_next'])
+        self.assertEqual(len(response.data['attachments']), 3)
+        self.assertIsNotNone(response.data['attachments_next'])
+
+    def test_no_cursor_within_limit(self):
+        """اختبار عدم وجود رابط عندما تكفي العناصر المضمّنة"""
+        with self.settings(COMPLAINT_DETAIL_EMBED_LIMIT=10):
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data['history']), len(self.history_ids))
+        self.assertIsNone(response.data['history_next'])
+        self.assertIsNone(response.data['attachments_next'])
+
+    def test_bounded_rows_fetched(self):
+        """اختبار أن استعلامات السجل والمرفقات محدودة بالحد + 1"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+
+        self.assertEqual(len(queries), 3)
+        for sql in (query['sql'] for query in queries[1:]):
+            self.assertIn('ROW_NUMBER()', sql)
+
+    def test_unknown_expand_rejected(self):
+        """اختبار رفض العلاقات غير المعروفة"""
+        response = self.client.get(f'{self.url}?expand=history,citizen')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('citizen', response.data['expand'])
@@ -0,0 +1,288 @@
+"""
+اختبارات تصدير الشكاوى
+"""
+
+import csv
+import io
+import json
+import tempfile
+import zipfile
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from celery import current_app
+from rest_framework.test import APIClient
+
+from complaints.exports import (
+    CSV_HEADER, UTF8_BOM, iter_complaints_zip, plan_export_ranges, write_complaints_zip
+)
+from complaints.models import Complaint, ComplaintAttachment, ComplaintExportJob
+from complaints.tasks import (
+    create_complaints_export, create_sharded_complaints_export, generate_complaints_csv,
+    resume_complaints_export
+)
+
+User = get_user_model()
+
+
+class ComplaintCSVExportTest(TestCase):
+    """اختبارات تصدير CSV المتدفق"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.water = Complaint.objects.create(
+            title="انقطاع المياه",
+            content="انقطاع المياه منذ يومين",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+            priority='high',
+        )
+        self.road = Complaint.objects.create(
+            title="حفرة في الطريق",
+            content="حفرة كبيرة أمام المدرسة",
+            citizen_id=456,
+            citizen_name="فاطمة علي",
+            citizen_email="fatma@example.com",
+            assigned_representative_id=7,
+            assigned_representative_name="النائب",
+        )
+
+    def export(self, query=''):
+        """تنفيذ طلب التصدير وإرجاع صفوف الملف"""
+        response = self.client.get(f'/api/v1/complaints/export-csv/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith(UTF8_BOM))
+        return list(csv.reader(io.StringIO(content[len(UTF8_BOM):])))
+
+    def test_export_all(self):
+        """اختبار تصدير جميع الشكاوى مع العناوين والقيم المعروضة"""
+        rows = self.export()
+
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual(len(rows), 3)
+
+        by_reference = {row[0]: row for row in rows[1:]}
+        water = by_reference[self.water.reference_number]
+        self.assertEqual(water[3], 'في الانتظار')
+        self.assertEqual(water[4], 'عالية')
+        self.assertEqual(water[7], 'غير مُسند')
+        self.assertEqual(water[8], self.water.created_at.strftime('%Y-%m-%d %H:%M'))
+        self.assertEqual(water[10], 'لم يتم الحل')
+        self.assertEqual(by_reference[self.road.reference_number][7], 'النائب')
+
+    def test_export_honors_search(self):
+        """اختبار أن التصدير يطبق نفس بحث القائمة"""
+        rows = self.export('?search=المياه')
+
+        self.assertEqual([row[0] for row in rows[1:]], [self.water.reference_number])
+
+    def test_export_honors_ordering(self):
+        """اختبار أن التصدير يطبق نفس ترتيب القائمة"""
+        rows = self.export('?ordering=created_at')
+
+        self.assertEqual(
+            [row[0] for row in rows[1:]],
+            [self.water.reference_number, self.road.reference_number]
+        )
+
+    def test_task_csv_matches_export(self):
+        """اختبار أن ملف CSV في مهمة التصدير يستخدم نفس الصفوف"""
+        content = generate_complaints_csv(Complaint.objects.order_by('-created_at'))
+        rows = list(csv.reader(io.StringIO(content)))
+
+        self.assertEqual(rows, self.export())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ComplaintZipExportTest(TestCase):
+    """اختبارات أرشيف ZIP المتدفق"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        for index in range(3):
+            self.create_complaint(index)
+
+    def create_complaint(self, index):
+        complaint = Complaint.objects.create(
+            title=f"شكوى {index}",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+        for name, content in (('photo.jpg', b'\xff\xd8' + b'x' * 2000), ('notes.txt', b'a' * 2000)):
+            ComplaintAttachment.objects.create(
+                complaint=complaint,
+                file=SimpleUploadedFile(name, content),
+                original_name=name,
+                file_size=len(content)
+            )
+        return complaint
+
+    def read_zip(self, data):
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        self.assertIsNone(archive.testzip())
+        return archive
+
+    def test_http_export(self):
+        """اختبار تنزيل الأرشيف كاملاً عبر الواجهة"""
+        response = self.client.get('/api/v1/complaints/export-zip/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        archive = self.read_zip(b''.join(response.streaming_content))
+        names = archive.namelist()
+        self.assertIn('complaints_list.csv', names)
+        self.assertEqual(len([name for name in names if name.endswith('details.txt')]), 3)
+        self.assertEqual(len([name for name in names if '/attachments/' in name]), 6)
+
+        rows = list(csv.reader(io.StringIO(archive.read('complaints_list.csv').decode('utf-8'))))
+        self.assertEqual(len(rows), 4)
+
+    def test_compressed_media_stored(self):
+        """اختبار تخزين الصور كما هي وضغط الملفات النصية"""
+        archive = self.read_zip(b''.join(iter_complaints_zip(Complaint.objects.all())))
+
+        for info in archive.infolist():
+            if info.filename.endswith('photo.jpg'):
+                self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+            elif info.filename.endswith('notes.txt'):
+                self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_attachments_prefetched_in_batches(self):
+        """اختبار أن عدد الاستعلامات لا يعتمد على عدد الشكاوى"""
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                b''.join(iter_complaints_zip(Complaint.objects.all()))
+            return len(queries)
+
+        before = count_queries()
+        for index in range(3, 8):
+            self.create_complaint(index)
+
+        self.assertEqual(count_queries(), before)
+
+    def test_without_attachments(self):
+        """اختبار تصدير ملف CSV فقط"""
+        response = self.client.get('/api/v1/complaints/export-zip/?include_attachments=false')
+        archive = self.read_zip(b''.join(response.streaming_content))
+
+        self.assertEqual(archive.namelist(), ['complaints_list.csv'])
+
+    def test_progress_reported(self):
+        """اختبار الإبلاغ عن التقدم بعد كل شكوى"""
+        progress = []
+        write_complaints_zip(io.BytesIO(), Complaint.objects.all(), progress=progress.append)
+
+        self.assertEqual(progress[-3:], [1, 2, 3])
+
+    def test_task_writes_to_storage(self):
+        """اختبار أن مهمة التصدير تكتب الأرشيف في التخزين مباشرة"""
+        result = create_complaints_export(self.user.id, {'include_attachments': True})
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['total'], 3)
+        with default_storage.open(result['file_path'], 'rb') as export_file:
+            archive = self.read_zip(export_file.read())
+        self.assertIn('complaints_list.csv', archive.namelist())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), COMPLAINTS_EXPORT_SHARD_SIZE=4)
+class ShardedExportTest(TestCase):
+    """اختبارات التصدير المقسم إلى أجزاء مع استئناف الأجزاء الفاشلة فقط"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات (تنفيذ مهام Celery مباشرة)"""
+        current_app.conf.task_always_eager = True
+        self.addCleanup(setattr, current_app.conf, 'task_always_eager', False)
+
+        base = timezone.now() - timezone.timedelta(days=30)
+        for index in range(10):
+            Complaint.objects.create(
+                title=f"شكوى {index}",
+                content="محتوى الشكوى",
+                citizen_id=123,
+                citizen_name="أحمد محمد",
+                citizen_email="ahmed@example.com",
+            )
+        # توقيتات متساوية لبعض الشكاوى للتأكد من عدم تقسيم نفس التوقيت على جزأين
+        for index, complaint in enumerate(Complaint.objects.order_by('id')):
+            Complaint.objects.filter(pk=complaint.pk).update(
+                created_at=base + timezone.timedelta(days=index // 2)
+            )
+
+    def read_manifest(self, job):
+        with default_storage.open(job.manifest_path, 'rb') as manifest_file:
+            return json.loads(manifest_file.read().decode('utf-8'))
+
+    def test_ranges_cover_all_rows(self):
+        """اختبار أن الأجزاء تغطي جميع الشكاوى دون تكرار"""
+        queryset = Complaint.objects.all()
+        ranges = plan_export_ranges(queryset, 3, timezone.now())
+
+        counts = []
+        for start, end in ranges:
+            part = queryset.filter(created_at__lt=end)
+            if start is not None:
+                part = part.filter(created_at__gte=start)
+            counts.append(part.count())
+
+        self.assertEqual(sum(counts), 10)
+        self.assertTrue(all(count <= 4 for count in counts))
+
+    def test_sharded_export(self):
+        """اختبار التصدير المقسم وكتابة ملف الفهرس"""
+        result = create_sharded_complaints_export(1, {'include_attachments': True})
+        self.assertEqual(result['status'], 'success')
+
+        job = ComplaintExportJob.objects.get(id=result['job_id'])
+        self.assertEqual(job.status, 'completed')
+        self.assertGreater(job.shards.count(), 1)
+
+        manifest = self.read_manifest(job)
+        self.assertEqual(manifest['total'], 10)
+
+        exported = 0
+        for part in manifest['parts']:
+            with default_storage.open(part['file_path'], 'rb') as part_file:
+                archive = zipfile.ZipFile(io.BytesIO(part_file.read()))
+            rows = list(csv.reader(io.StringIO(archive.read('complaints_list.csv').decode('utf-8'))))
+            exported += len(rows) - 1
+        self.assertEqual(exported, 10)
+
+    def test_resume_redoes_failed_shards_only(self):
+        """اختبار أن إعادة المحاولة لا تعيد الأجزاء المكتملة"""
+        result = create_sharded_complaints_export(1, {'include_attachments': False})
+        job = ComplaintExportJob.objects.get(id=result['job_id'])
+
+        failed = job.shards.get(index=1)
+        failed.status = 'failed'
+        failed.save()
+        job.status = 'failed'
+        job.save()
+
+        resume_complaints_export(str(job.id))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        attempts = dict(job.shards.values_list('index', 'attempts'))
+        self.assertEqual(attempts[1], 2)
+        self.assertTrue(all(count == 1 for index, count in attempts.items() if index != 1))
+        self.assertEqual(self.read_manifest(job)['total'], 10)
@@ -0,0 +1,130 @@
+"""
+اختبارات الحقول المختارة (?fields=) والتسلسل السريع لقوائم الشكاوى والسجل
+"""
+
+import tempfile
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from complaints.fieldsets import ComplaintHistoryValuesSerializer, ComplaintValuesSerializer
+from complaints.models import Complaint, ComplaintAttachment, ComplaintCategory, ComplaintHistory
+from complaints.serializers import ComplaintHistorySerializer, ComplaintListSerializer
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ValuesSerializerTest(TestCase):
+    """اختبارات تطابق مخرجات التسلسل السريع مع Serializer القائمة"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        category = ComplaintCategory.objects.create(name="خدمات عامة")
+        for index, (status, hold_until) in enumerate([
+            ('pending', None),
+            ('on_hold', timezone.now() - timedelta(days=1)),
+            ('on_hold', timezone.now() + timedelta(days=1)),
+            ('overdue', None),
+        ]):
+            complaint = Complaint.objects.create(
+                title=f"شكوى {index}",
+                content="محتوى الشكوى",
+                citizen_id=123,
+                citizen_name="أحمد محمد",
+                citizen_email="ahmed@example.com",
+                category=category if index % 2 else None,
+                status=status,
+                hold_until=hold_until,
+                assigned_representative_id=7 if index else None,
+            )
+            ComplaintAttachment.objects.create(
+                complaint=complaint,
+                file=SimpleUploadedFile('file.pdf', b'%PDF-1.4 test'),
+                original_name='file.pdf',
+                file_size=13,
+            )
+            ComplaintHistory.objects.create(
+                complaint=complaint, action='status_changed', description='تعديل',
+                performed_by_id=self.user.id, performed_by_name=self.user.username,
+                additional_data={'notes': 'ملاحظة'} if index % 2 else None,
+            )
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_complaint_rows_match_serializer(self):
+        """اختبار تطابق البايتات مع ComplaintListSerializer للحقول الافتراضية"""
+        queryset = Complaint.objects.order_by('-created_at')
+        serializer = ComplaintValuesSerializer()
+        fast = serializer.to_representation(serializer.prepare(queryset).values(*serializer.columns))
+        slow = ComplaintListSerializer(queryset.with_attachments_count(), many=True).data
+
+        self.assertEqual(self.render(fast), self.render(slow))
+        self.assertNotIn('category_name', fast[-1])
+
+    def test_history_rows_match_serializer(self):
+        """اختبار تطابق البايتات مع ComplaintHistorySerializer"""
+        queryset = ComplaintHistory.objects.order_by('-performed_at')
+        serializer = ComplaintHistoryValuesSerializer()
+        fast = serializer.to_representation(queryset.values(*serializer.columns))
+
+        self.assertEqual(
+            self.render(fast), self.render(ComplaintHistorySerializer(queryset, many=True).data)
+        )
+
+    def test_list_endpoint_matches_serializer(self):
+        """اختبار أن استجابة القائمة لم تتغير للحقول الافتراضية"""
+        response = self.client.get('/api/v1/complaints/')
+        expected = ComplaintListSerializer(
+            Complaint.objects.with_attachments_count().order_by('-created_at', '-id'), many=True
+        ).data
+
+        self.assertEqual(self.render(response.data['results']), self.render(expected))
+
+    def test_sparse_fieldset(self):
+        """اختبار ?fields= بترتيب Serializer وبدون الأعمدة غير المطلوبة"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/complaints/?fields=status_display,id&count=false')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['results'][0]), ['id', 'status_display'])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"title"', queries[0]['sql'])
+        self.assertNotIn('complaints_complaintattachment', queries[0]['sql'])
+
+    def test_sparse_fieldset_paginates(self):
+        """اختبار أن مؤشر الصفحة يعمل حتى بدون حقول الترتيب في ?fields="""
+        first = self.client.get('/api/v1/complaints/?fields=title&page_size=3')
+        second = self.client.get(first.data['next'])
+
+        titles = [item['title'] for item in first.data['results'] + second.data['results']]
+        self.assertEqual(sorted(titles), [f"شكوى {index}" for index in range(4)])
+
+    def test_history_sparse_fieldset(self):
+        """اختبار ?fields= لقائمة السجل"""
+        response = self.client.get('/api/v1/history/?fields=action,action_display')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['results'][0], {'action': 'status_changed', 'action_display': 'تم تغيير الحالة'}
+        )
+
+    def test_unknown_field_rejected(self):
+        """اختبار رفض الحقول غير المعروفة"""
+        response = self.client.get('/api/v1/complaints/?fields=title,content')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('content', response.data['fields'])
@@ -0,0 +1,101 @@
+"""
+اختبارات انتهاء التعليق بالمسح الدوري قصير الفاصل
+"""
+
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from complaints.models import Complaint, ComplaintHistory
+from complaints.stats import diff_counter_buckets
+from complaints.tasks import send_overdue_reminders
+from complaints.transitions import HOLD_DURATION, bulk_transition, transition_complaint
+
+User = get_user_model()
+
+
+class HoldExpiryTest(TestCase):
+    """اختبارات نقل التعليقات المستحقة إلى متأخرة عند تشغيل المسح"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات (بدون توصيل الإشعارات)"""
+        dispatch = mock.patch('complaints.outbox.schedule_dispatch')
+        dispatch.start()
+        self.addCleanup(dispatch.stop)
+
+        self.user = User.objects.create_user(username="rep1", password="pass12345")
+        self.complaint = Complaint.objects.create(
+            title="شكوى اختبار",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+        transition_complaint(self.complaint, 'assign', self.user, {
+            'representative_id': self.user.id,
+            'representative_name': 'النائب',
+        })
+
+    def hold(self):
+        transition_complaint(self.complaint, 'hold', self.user, {'reason': 'دراسة'})
+
+    def sweep(self, after=HOLD_DURATION + timezone.timedelta(minutes=1)):
+        """تشغيل المسح الدوري بعد مدة من الآن"""
+        later = timezone.now() + after
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            return send_overdue_reminders.apply().get()
+
+    def test_due_hold_expired(self):
+        """اختبار نقل الشكوى إلى متأخرة بعد موعدها مع السجل والعدادات"""
+        self.hold()
+
+        self.assertEqual(self.sweep()['processed_count'], 1)
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.status, 'overdue')
+        self.assertTrue(ComplaintHistory.objects.filter(action='status_changed').exists())
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_hold_not_due(self):
+        """اختبار أن التعليق قبل موعده لا يتأثر"""
+        self.hold()
+
+        self.assertEqual(self.sweep(after=timezone.timedelta(hours=1))['processed_count'], 0)
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.status, 'on_hold')
+
+    def test_released_hold_not_expired(self):
+        """اختبار أن إنهاء التعليق قبل موعده يمنع انتهاءه دون إلغاء أي مؤقت"""
+        self.hold()
+        transition_complaint(self.complaint, 'accept', self.user)
+
+        self.assertEqual(self.sweep()['processed_count'], 0)
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.status, 'accepted')
+
+    def test_bulk_hold_expired_together(self):
+        """اختبار انتهاء التعليق المجمّع في نفس التشغيل"""
+        other = Complaint.objects.create(
+            title="شكوى أخرى",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+            status='assigned',
+            assigned_representative_id=self.user.id,
+        )
+        ids = [self.complaint.id, other.id]
+        bulk_transition(Complaint.objects.all(), ids, 'hold', self.user, {'reason': 'دراسة'})
+
+        self.assertEqual(self.sweep()['processed_count'], 2)
+        self.assertEqual(Complaint.objects.filter(status='overdue').count(), 2)
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_periodic_schedule(self):
+        """اختبار جدولة المسح كمهمة دورية قصيرة الفاصل"""
+        entry = settings.CELERY_BEAT_SCHEDULE['expire-due-holds']
+
+        self.assertEqual(entry['task'], send_overdue_reminders.name)
+        self.assertEqual(entry['schedule'], settings.HOLD_EXPIRY_INTERVAL_SECONDS)
+        self.assertLess(entry['schedule'], HOLD_DURATION.total_seconds())
@@ -0,0 +1,102 @@
+"""
+اختبارات إشعارات الشكاوى عبر الصندوق الصادر
+"""
+
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+import requests
+
+from complaints.clients import reset_clients
+from complaints.models import Complaint, OutboxEvent
+from complaints.outbox import dispatch_pending
+from complaints.transitions import bulk_transition, transition_complaint
+
+User = get_user_model()
+
+
+class FakeService:
+    """خدمة وهمية تسجل الطلبات ومفاتيح الأحداث المستلمة"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.requests = []
+        self.event_ids = set()
+
+    def request(self, method, url, json=None, headers=None, timeout=None):
+        if self.fail:
+            raise requests.ConnectionError('الخدمة غير متاحة')
+        self.requests.append((url, json, headers))
+        if 'recipients' in json:
+            for recipient in json['recipients']:
+                for notification in recipient['notifications']:
+                    self.event_ids.add(notification['event_id'])
+        else:
+            self.event_ids.add(headers['Idempotency-Key'])
+        return mock.Mock(status_code=200, raise_for_status=lambda: None)
+
+
+class ComplaintNotificationsTest(TestCase):
+    """اختبارات كتابة الإشعارات مع التغيير وإرسالها مجمّعة لكل مستلم"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        reset_clients()
+        self.user = User.objects.create_user(username="rep1", password="pass12345")
+        self.complaints = [
+            Complaint.objects.create(
+                title=f"شكوى {index}",
+                content="محتوى الشكوى",
+                citizen_id=100 + index % 2,
+                citizen_name="أحمد محمد",
+                citizen_email="ahmed@example.com",
+            )
+            for index in range(4)
+        ]
+
+    def assign_all(self):
+        return bulk_transition(Complaint.objects.all(), [c.id for c in self.complaints], 'assign', self.user, {
+            'representative_id': self.user.id,
+            'representative_name': 'النائب',
+        })
+
+    def test_transition_writes_outbox(self):
+        """اختبار كتابة إشعار للمواطن في معاملة الانتقال"""
+        self.assign_all()
+        complaint = self.complaints[0]
+        complaint.refresh_from_db()
+
+        transition_complaint(complaint, 'accept', self.user)
+
+        event = OutboxEvent.objects.get(payload__data__action='accepted')
+        self.assertEqual((event.destination, event.status), ('notifications', 'pending'))
+        self.assertEqual(event.payload['user_id'], complaint.citizen_id)
+        self.assertEqual(event.payload['data']['complaint_id'], str(complaint.id))
+
+    def test_bulk_assign_writes_one_event_per_complaint(self):
+        """اختبار إشعار النائب لكل شكوى في الإسناد المجمّع"""
+        self.assign_all()
+
+        events = OutboxEvent.objects.filter(payload__user_id=self.user.id)
+        self.assertEqual(events.count(), 4)
+        self.assertEqual(events.first().payload['title'], 'تم إسناد شكوى جديدة إليك')
+
+    def test_batch_coalesced_per_recipient(self):
+        """اختبار إرسال جميع الإشعارات المستحقة في طلب واحد مجمّع لكل مستلم"""
+        self.assign_all()
+        for complaint in self.complaints:
+            complaint.refresh_from_db()
+            transition_complaint(complaint, 'accept', self.user)
+        service = FakeService()
+
+        with mock.patch('complaints.clients.get_session', return_value=service):
+            result = dispatch_pending(destinations=['notifications'])
+
+        self.assertEqual(result['destinations']['notifications']['delivered_count'], 8)
+        self.assertEqual(len(service.requests), 1)
+        _url, body, _headers = service.requests[0]
+        per_recipient = {recipient['user_id']: len(recipient['notifications']) for recipient in body['recipients']}
+        self.assertEqual(per_recipient, {self.user.id: 4, 100: 2, 101: 2})
+        self.assertFalse(OutboxEvent.objects.filter(status='pending').exists())
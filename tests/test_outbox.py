@@ -0,0 +1,168 @@
+"""
+اختبارات موزع الصندوق الصادر
+"""
+
+import threading
+import time
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from complaints.clients import reset_clients
+from complaints.models import Complaint, OutboxEvent
+from complaints.outbox import dispatch_pending, publish, schedule_dispatch
+from complaints.tasks import dispatch_outbox_events
+from complaints.transitions import transition_complaint
+
+from tests.test_notifications import FakeService
+
+User = get_user_model()
+
+
+class SlowService(FakeService):
+    """خدمة وهمية بطيئة تسجل أقصى عدد طلبات متزامنة"""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def request(self, *args, **kwargs):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(0.02)
+        try:
+            with self.lock:
+                return super().request(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.current -= 1
+
+
+@override_settings(SERVICE_RETRIES=0)
+class OutboxDispatchTest(TestCase):
+    """اختبارات الإرسال مرة على الأقل مع إعادة المحاولة وحدود التزامن"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        reset_clients()
+
+    def publish_scores(self, count):
+        return publish('statistics', 'score_awarded', [
+            {'representative_id': 7, 'points': 1} for _index in range(count)
+        ])
+
+    def dispatch(self, service, now=None, **kwargs):
+        with mock.patch('complaints.clients.get_session', return_value=service):
+            return dispatch_pending(now=now, **kwargs)
+
+    def test_idempotency_key_per_event(self):
+        """اختبار إرسال معرف كل حدث كمفتاح عدم تكرار"""
+        events = self.publish_scores(3)
+        service = FakeService()
+
+        result = self.dispatch(service)
+
+        self.assertEqual(result['destinations']['statistics']['delivered_count'], 3)
+        self.assertEqual(service.event_ids, {str(event.event_id) for event in events})
+
+    def test_retry_with_backoff(self):
+        """اختبار تأجيل الدفعة الفاشلة ثم إرسالها بنفس معرفات الأحداث"""
+        events = self.publish_scores(2)
+
+        result = self.dispatch(FakeService(fail=True))
+        self.assertEqual(result['destinations']['statistics']['failed_count'], 2)
+        self.assertGreater(result['next_at'], timezone.now())
+        self.assertEqual(set(OutboxEvent.objects.values_list('attempts', flat=True)), {1})
+
+        service = FakeService()
+        self.assertEqual(self.dispatch(service)['destinations']['statistics']['delivered_count'], 0)
+
+        self.dispatch(service, now=result['next_at'])
+        self.assertEqual(service.event_ids, {str(event.event_id) for event in events})
+        self.assertFalse(OutboxEvent.objects.exclude(status='delivered').exists())
+
+    def test_gives_up_after_max_attempts(self):
+        """اختبار تعليم الحدث فاشلاً بعد آخر محاولة"""
+        self.publish_scores(2)
+        OutboxEvent.objects.update(attempts=9)
+
+        self.dispatch(FakeService(fail=True))
+
+        self.assertEqual(OutboxEvent.objects.filter(status='failed').count(), 2)
+
+    @override_settings(STATISTICS_CONCURRENCY=2)
+    def test_concurrency_limit_per_destination(self):
+        """اختبار ألا يتجاوز عدد الدفعات المتزامنة حد الخدمة"""
+        self.publish_scores(12)
+        service = SlowService()
+
+        result = self.dispatch(service, destinations=['statistics'], batch_size=2)
+
+        self.assertEqual(result['destinations']['statistics']['delivered_count'], 12)
+        self.assertEqual(service.peak, 2)
+
+    def test_dispatch_scheduled_once_per_window(self):
+        """اختبار جدولة موزع واحد للأحداث خلال نافذة التجميع"""
+        with mock.patch.object(dispatch_outbox_events, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.publish_scores(2)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.publish_scores(1)
+            schedule_dispatch()
+
+        apply_async.assert_called_once()
+
+    def test_broker_failure_does_not_fail_write(self):
+        """اختبار أن تعذر الوصول لطابور الرسائل لا يُفشل الكتابة ويحرر مفتاح الجدولة"""
+        with mock.patch.object(dispatch_outbox_events, 'apply_async', side_effect=ConnectionError) as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.publish_scores(1)
+            schedule_dispatch()
+
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertEqual(OutboxEvent.objects.filter(status='pending').count(), 1)
+
+    def test_periodic_dispatcher_scheduled(self):
+        """اختبار جدولة الموزع الدوري لإرسال الأحداث التي تعذرت جدولتها"""
+        entry = settings.CELERY_BEAT_SCHEDULE['dispatch-outbox-events']
+
+        self.assertEqual(entry['task'], dispatch_outbox_events.name)
+        self.assertEqual(entry['schedule'], settings.OUTBOX_SWEEP_SECONDS)
+
+    def test_resolution_points_event_in_same_transaction(self):
+        """اختبار كتابة حدث منح النقاط مع حل الشكوى"""
+        user = User.objects.create_user(username="rep1", password="pass12345")
+        complaint = Complaint.objects.create(
+            title="شكوى اختبار",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+        transition_complaint(complaint, 'assign', user, {
+            'representative_id': user.id,
+            'representative_name': 'النائب',
+        })
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(f'/api/v1/complaints/{complaint.id}/respond/', {
+            'response_type': 'representative',
+            'response_text': 'تم التواصل مع الجهة المختصة',
+            'resolution': 'تم إصلاح العطل',
+            'award_points': True,
+            'thank_you_message': 'شكراً',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        event = OutboxEvent.objects.get(destination='statistics')
+        self.assertEqual(event.payload['representative_id'], user.id)
+        self.assertEqual(event.payload['complaint_id'], str(complaint.id))
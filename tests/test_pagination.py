@@ -0,0 +1,96 @@
+"""
+اختبارات ترقيم الصفحات بالمؤشر
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from complaints.models import Complaint, ComplaintHistory
+
+User = get_user_model()
+
+
+class KeysetPaginationTest(TestCase):
+    """اختبارات التصفح بالمؤشر على قائمة الشكاوى والسجل"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        for index in range(25):
+            Complaint.objects.create(
+                title=f"شكوى {index}",
+                content="محتوى الشكوى",
+                citizen_id=123,
+                citizen_name="أحمد محمد",
+                citizen_email="ahmed@example.com",
+            )
+
+        # نفس وقت الإنشاء لعدة صفوف للتأكد من ثبات الترتيب بالمعرف
+        Complaint.objects.update(created_at=timezone.now())
+
+    def walk(self, url):
+        """التنقل عبر جميع الصفحات وإرجاع المعرفات"""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_walk_all_pages(self):
+        """اختبار المرور على جميع الصفحات دون تكرار أو فقدان"""
+        ids = self.walk('/api/v1/complaints/?page_size=10')
+
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+
+    def test_walk_with_custom_ordering(self):
+        """اختبار التصفح مع ترتيب مختار عبر ?ordering (المعرف يفصل بين القيم المتساوية)"""
+        ids = self.walk('/api/v1/complaints/?ordering=-priority&page_size=7')
+
+        self.assertEqual(len(set(ids)), 25)
+
+    def test_previous_link(self):
+        """اختبار الرجوع للصفحة السابقة"""
+        first = self.client.get('/api/v1/complaints/?page_size=10')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+
+    def test_count_opt_out(self):
+        """اختبار إلغاء حساب العدد الكلي"""
+        response = self.client.get('/api/v1/complaints/')
+        self.assertEqual(response.data['count'], 25)
+
+        response = self.client.get('/api/v1/complaints/?count=false')
+        self.assertNotIn('count', response.data)
+
+    def test_invalid_cursor(self):
+        """اختبار رفض المؤشر غير الصالح"""
+        response = self.client.get('/api/v1/complaints/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_history_pagination(self):
+        """اختبار ترقيم سجل الشكاوى"""
+        complaint = Complaint.objects.first()
+        for index in range(15):
+            ComplaintHistory.objects.create(
+                complaint=complaint,
+                action='status_changed',
+                description=f'تغيير {index}',
+                performed_by_id=1,
+                performed_by_name='admin1'
+            )
+
+        ids = self.walk(f'/api/v1/history/?complaint_id={complaint.id}&page_size=4')
+        self.assertEqual(len(set(ids)), 15)
@@ -0,0 +1,136 @@
+"""
+اختبارات التخزين المؤقت لبيانات المواطنين
+"""
+
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+import requests
+
+from complaints.clients import reset_clients
+from complaints.models import Complaint
+from complaints.profiles import get_citizen_profile, get_many, sync_citizen_details
+
+
+class FakeAuthService:
+    """خدمة مصادقة وهمية: مستخدمون معروفون، وتسجيل الطلبات"""
+
+    def __init__(self, users, fail=False):
+        self.users = users
+        self.fail = fail
+        self.requests = []
+
+    def response(self, status_code, body):
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = body
+        response.raise_for_status.side_effect = (
+            requests.HTTPError(response=response) if status_code >= 400 else None
+        )
+        return response
+
+    def request(self, method, url, params=None, timeout=None, **kwargs):
+        if self.fail:
+            raise requests.ConnectionError('الخدمة غير متاحة')
+        self.requests.append((url, params))
+        if params and 'ids' in params:
+            ids = [int(citizen_id) for citizen_id in params['ids'].split(',')]
+            return self.response(200, {'results': [self.users[i] for i in ids if i in self.users]})
+        citizen_id = int(url.rstrip('/').rsplit('/', 1)[1])
+        if citizen_id not in self.users:
+            return self.response(404, {'detail': 'Not found.'})
+        return self.response(200, self.users[citizen_id])
+
+
+@override_settings(
+    SERVICE_RETRIES=0,
+    CITIZEN_PROFILE_TTL=600,
+    CITIZEN_PROFILE_STALE_SECONDS=3600,
+    CITIZEN_PROFILE_NEGATIVE_TTL=60,
+    CITIZEN_PROFILE_BATCH_SIZE=2,
+)
+class CitizenProfileCacheTest(TestCase):
+    """اختبارات الصلاحية والتخزين السلبي والتحديث في الخلفية والجلب المجمّع"""
+
+    def setUp(self):
+        """إعداد الخدمة الوهمية"""
+        cache.clear()
+        reset_clients()
+        self.addCleanup(reset_clients)
+        self.service = FakeAuthService({
+            1: {'id': 1, 'name': 'أحمد محمد', 'email': 'ahmed@example.com'},
+            2: {'id': 2, 'name': 'فاطمة علي', 'email': 'fatima@example.com'},
+            3: {'id': 3, 'name': 'محمود حسن', 'email': 'mahmoud@example.com'},
+        })
+        patcher = mock.patch('complaints.clients.get_session', return_value=self.service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def later(self, seconds):
+        return mock.patch('complaints.profiles.time.time', return_value=time.time() + seconds)
+
+    def test_profile_cached_until_ttl(self):
+        """اختبار أن القراءة الثانية من التخزين دون طلب للخدمة"""
+        self.assertEqual(get_citizen_profile(1)['name'], 'أحمد محمد')
+        self.assertEqual(get_citizen_profile(1)['name'], 'أحمد محمد')
+
+        self.assertEqual(len(self.service.requests), 1)
+
+    def test_missing_citizen_cached(self):
+        """اختبار تخزين "غير موجود" لمدة أقصر"""
+        self.assertIsNone(get_citizen_profile(999))
+        self.assertIsNone(get_citizen_profile(999))
+        self.assertEqual(len(self.service.requests), 1)
+
+        with self.later(61), mock.patch('complaints.profiles.schedule_refresh') as schedule_refresh:
+            self.assertIsNone(get_citizen_profile(999))
+        schedule_refresh.assert_called_once_with([999])
+
+    def test_stale_profile_served_while_refreshing(self):
+        """اختبار إرجاع القديم فوراً وجدولة تحديث واحد فقط"""
+        get_citizen_profile(1)
+        self.service.users[1]['name'] = 'أحمد محمود'
+
+        with self.later(601), mock.patch('complaints.tasks.refresh_citizen_profiles.delay') as delay:
+            self.assertEqual(get_citizen_profile(1)['name'], 'أحمد محمد')
+            get_citizen_profile(1)
+        delay.assert_called_once_with([1])
+        self.assertEqual(len(self.service.requests), 1)
+
+    def test_service_down_without_entry(self):
+        """اختبار عدم تخزين فشل الخدمة"""
+        self.service.fail = True
+        self.assertIsNone(get_citizen_profile(1))
+
+        self.service.fail = False
+        self.assertEqual(get_citizen_profile(1)['name'], 'أحمد محمد')
+
+    def test_get_many_batches_requests(self):
+        """اختبار جلب الناقص فقط على دفعات وتخزين غير الموجودين"""
+        get_citizen_profile(1)
+
+        profiles = get_many([1, 2, 3, 999, 2])
+
+        self.assertEqual(set(profiles), {1, 2, 3, 999})
+        self.assertEqual(profiles[3]['name'], 'محمود حسن')
+        self.assertIsNone(profiles[999])
+        self.assertEqual([params for _url, params in self.service.requests[1:]], [{'ids': '2,3'}, {'ids': '999'}])
+
+        get_many([1, 2, 3, 999])
+        self.assertEqual(len(self.service.requests), 3)
+
+    def test_sync_citizen_details(self):
+        """اختبار تحديث البيانات المنسوخة في الشكاوى التي تغيرت فقط"""
+        for citizen_id, name in [(1, 'أحمد محمد'), (2, 'اسم قديم'), (2, 'اسم قديم'), (999, 'محذوف')]:
+            Complaint.objects.create(
+                title='شكوى', content='محتوى الشكوى', citizen_id=citizen_id,
+                citizen_name=name, citizen_email=f'{citizen_id}@example.com',
+            )
+
+        self.assertEqual(sync_citizen_details(), 3)
+
+        self.assertEqual(
+            sorted(Complaint.objects.values_list('citizen_id', 'citizen_name')),
+            [(1, 'أحمد محمد'), (2, 'فاطمة علي'), (2, 'فاطمة علي'), (999, 'محذوف')]
+        )
+        self.assertEqual(Complaint.objects.get(citizen_id=1).citizen_email, 'ahmed@example.com')
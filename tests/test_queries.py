@@ -0,0 +1,151 @@
+"""
+اختبارات عدد الاستعلامات لواجهات الشكاوى
+"""
+
+import tempfile
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from complaints.models import Complaint, ComplaintAttachment, ComplaintCategory, ComplaintHistory
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ComplaintListQueriesTest(TestCase):
+    """اختبارات ثبات عدد الاستعلامات في قائمة الشكاوى"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        category = ComplaintCategory.objects.create(name="خدمات عامة")
+        for index in range(12):
+            complaint = Complaint.objects.create(
+                title=f"شكوى {index}",
+                content="محتوى الشكوى",
+                citizen_id=123,
+                citizen_name="أحمد محمد",
+                citizen_email="ahmed@example.com",
+                category=category,
+            )
+            for number in range(index % 3):
+                ComplaintAttachment.objects.create(
+                    complaint=complaint,
+                    file=SimpleUploadedFile(f'file{number}.pdf', b'%PDF-1.4 test'),
+                    original_name=f'file{number}.pdf',
+                    file_size=13
+                )
+
+    def count_list_queries(self, page_size):
+        """تنفيذ طلب القائمة وإرجاع عدد الاستعلامات والاستجابة"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/v1/complaints/?page_size={page_size}')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_list_query_count_constant(self):
+        """اختبار أن عدد الاستعلامات لا يعتمد على حجم الصفحة"""
+        small_count, _ = self.count_list_queries(2)
+        large_count, response = self.count_list_queries(12)
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_list_attachments_count_annotated(self):
+        """اختبار صحة عدد المرفقات المحسوب في الاستعلام"""
+        _, response = self.count_list_queries(12)
+
+        for item in response.data['results']:
+            complaint = Complaint.objects.get(pk=item['id'])
+            self.assertEqual(item['attachments_count'], complaint.attachments.count())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ComplaintActionQueriesTest(TestCase):
+    """اختبارات تشكيل الاستعلام لكل عملية (عدد الاستعلامات والأعمدة المجلوبة)"""
+
+    COMPLAINT_TABLE = Complaint._meta.db_table
+    HISTORY_TABLE = ComplaintHistory._meta.db_table
+    ATTACHMENT_TABLE = ComplaintAttachment._meta.db_table
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        category = ComplaintCategory.objects.create(name="خدمات عامة")
+        self.complaint = Complaint.objects.create(
+            title="شكوى اختبار",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+            category=category,
+        )
+        for index in range(5):
+            ComplaintHistory.objects.create(
+                complaint=self.complaint,
+                action='status_changed',
+                description=f'تغيير {index}',
+                performed_by_id=1,
+                performed_by_name='admin1'
+            )
+
+    def capture(self, method, url, data=None):
+        """تنفيذ الطلب وإرجاع نصوص الاستعلامات المنفذة"""
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 400)
+        return [query['sql'] for query in queries]
+
+    def column(self, name):
+        return f'"{self.COMPLAINT_TABLE}"."{name}"'
+
+    def touches(self, queries, table):
+        return any(f'"{table}"' in sql for sql in queries)
+
+    def test_list_defers_long_text_columns(self):
+        """اختبار أن القائمة لا تجلب النصوص الطويلة ولا السجل"""
+        queries = self.capture('get', '/api/v1/complaints/')
+
+        self.assertEqual(len(queries), 2)
+        page_query = queries[-1]
+        self.assertIn(self.column('title'), page_query)
+        for field in ('content', 'resolution', 'admin_response', 'representative_response'):
+            self.assertNotIn(self.column(field), page_query)
+        self.assertFalse(self.touches(queries, self.HISTORY_TABLE))
+
+    def test_retrieve_prefetches_relations(self):
+        """اختبار أن التفاصيل تجلب المرفقات والسجل باستعلام واحد لكل منهما"""
+        queries = self.capture('get', f'/api/v1/complaints/{self.complaint.id}/')
+
+        self.assertEqual(len(queries), 3)
+        self.assertIn(self.column('content'), queries[0])
+
+    def test_stats_skips_relations(self):
+        """اختبار أن الإحصائيات لا تجلب السجل"""
+        queries = self.capture('get', '/api/v1/complaints/stats/')
+
+        self.assertEqual(len(queries), 3)
+        self.assertFalse(self.touches(queries, self.HISTORY_TABLE))
+
+    def test_actions_skip_prefetch(self):
+        """اختبار أن الإجراءات لا تجلب السجل أو المرفقات"""
+        queries = self.capture('post', f'/api/v1/complaints/{self.complaint.id}/assign/', {
+            'representative_id': 7,
+            'representative_name': 'النائب',
+        })
+
+        selects = [sql for sql in queries if sql.startswith('SELECT')]
+        self.assertFalse(any(f'FROM "{self.HISTORY_TABLE}"' in sql for sql in selects))
+        self.assertFalse(any(f'FROM "{self.ATTACHMENT_TABLE}"' in sql for sql in selects))
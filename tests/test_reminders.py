@@ -0,0 +1,114 @@
+"""
+اختبارات تذكيرات الشكاوى المتأخرة
+"""
+
+from unittest import mock, skipUnless
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from complaints.models import Complaint, ComplaintHistory, OutboxEvent
+from complaints.stats import compute_complaint_stats, diff_counter_buckets
+from complaints.tasks import send_overdue_reminders
+
+
+class OverdueRemindersTest(TestCase):
+    """اختبارات المطالبة المجمّعة بالشكاوى المتأخرة"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        now = timezone.now()
+        self.expired = self.create_complaints(5, hold_until=now - timezone.timedelta(hours=1))
+        self.active = self.create_complaints(2, hold_until=now + timezone.timedelta(days=1))
+
+    def create_complaints(self, count, **kwargs):
+        """إنشاء شكاوى معلقة للاختبار"""
+        return [
+            Complaint.objects.create(
+                title=f"شكوى {index}",
+                content="محتوى الشكوى",
+                citizen_id=123,
+                citizen_name="أحمد محمد",
+                citizen_email="ahmed@example.com",
+                status='on_hold',
+                assigned_representative_id=7,
+                **kwargs
+            ).id
+            for index in range(count)
+        ]
+
+    def run_reminders(self):
+        with mock.patch('complaints.outbox.schedule_dispatch'):
+            with self.captureOnCommitCallbacks(execute=True):
+                return send_overdue_reminders()
+
+    def test_claims_expired_holds(self):
+        """اختبار نقل الشكاوى المنتهية فقط إلى متأخرة مع السجل والعدادات"""
+        result = self.run_reminders()
+
+        self.assertEqual(result, {'status': 'success', 'processed_count': 5})
+        self.assertEqual(
+            set(Complaint.objects.filter(status='overdue').values_list('id', flat=True)),
+            set(self.expired)
+        )
+        self.assertEqual(Complaint.objects.filter(status='on_hold').count(), 2)
+        self.assertEqual(ComplaintHistory.objects.filter(action='status_changed').count(), 5)
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_rows_claimed_once(self):
+        """اختبار أن التشغيل الثاني لا يعيد إرسال التذكيرات"""
+        self.run_reminders()
+
+        self.assertEqual(self.run_reminders()['processed_count'], 0)
+
+    def test_query_count_independent_of_size(self):
+        """اختبار أن المطالبة لا تنفذ استعلامات لكل شكوى"""
+        # التشغيل الأول ينشئ خانة عداد "متأخرة"، فالمقارنة بين تشغيلين بعده
+        send_overdue_reminders()
+        hold_until = timezone.now() - timezone.timedelta(hours=1)
+
+        self.create_complaints(2, hold_until=hold_until)
+        with CaptureQueriesContext(connection) as small:
+            send_overdue_reminders()
+
+        self.create_complaints(30, hold_until=hold_until)
+        with CaptureQueriesContext(connection) as large:
+            result = send_overdue_reminders()
+
+        self.assertEqual(result['processed_count'], 30)
+        self.assertEqual(len(large), len(small))
+
+    @skipUnless(connection.vendor == 'postgresql', 'UPDATE ... RETURNING على PostgreSQL فقط')
+    def test_claim_with_update_returning(self):
+        """اختبار المطالبة بـ UPDATE ... RETURNING واحد على PostgreSQL"""
+        with CaptureQueriesContext(connection) as queries:
+            self.run_reminders()
+
+        claims = [query['sql'] for query in queries if 'SKIP LOCKED' in query['sql']]
+        self.assertEqual(len(claims), 1)
+        self.assertTrue(claims[0].startswith('UPDATE'))
+        self.assertIn('RETURNING', claims[0])
+
+    def test_overdue_counted_in_stats(self):
+        """اختبار أن الشكاوى المتأخرة تظهر في الإحصائيات بعد المطالبة بها"""
+        before = compute_complaint_stats(Complaint.objects.all())['overdue_complaints']
+        self.run_reminders()
+        after = compute_complaint_stats(Complaint.objects.all())
+
+        self.assertEqual(before, 5)
+        self.assertEqual(after['overdue_complaints'], 5)
+        self.assertEqual(after['complaints_by_status']['overdue'], 5)
+
+    def test_reminders_queued_in_outbox(self):
+        """اختبار كتابة تذكير للنائب المُسند لكل شكوى في الصندوق الصادر"""
+        self.run_reminders()
+
+        reminders = OutboxEvent.objects.all()
+        self.assertEqual(reminders.count(), 5)
+        self.assertEqual(set(reminders.values_list('payload__user_id', flat=True)), {7})
+        self.assertEqual(
+            {reminder.payload['data']['complaint_id'] for reminder in reminders},
+            {str(complaint_id) for complaint_id in self.expired}
+        )
+        self.assertEqual(reminders.first().payload['data']['action'], 'overdue_reminder')
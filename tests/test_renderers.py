@@ -0,0 +1,122 @@
+"""
+اختبارات عرض JSON السريع وضغط الاستجابات
+"""
+
+import gzip
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from zoneinfo import ZoneInfo
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from complaints import middleware
+from complaints.middleware import CompressionMiddleware, accepted_encodings
+from complaints.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    """اختبارات تطابق مخرجات FastJSONRenderer مع JSONRenderer"""
+
+    def assertSameOutput(self, data, **kwargs):
+        self.assertEqual(FastJSONRenderer().render(data, **kwargs), JSONRenderer().render(data, **kwargs))
+
+    def test_same_bytes_for_api_types(self):
+        """اختبار المعرفات والتواريخ والنصوص العربية والأرقام العشرية"""
+        self.assertSameOutput({
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'created_at': datetime(2024, 3, 1, 10, 30, 15, 123456, tzinfo=ZoneInfo('Africa/Cairo')),
+            'updated_at': datetime(2024, 3, 1, 8, 30, tzinfo=dt_timezone.utc),
+            'title': 'شكوى بخصوص انقطاع المياه',
+            'amount': Decimal('12.50'),
+            'items': [1, 2.5, True, None, {'nested': 'نص'}],
+            None: 'مفتاح فارغ',
+        })
+
+    def test_line_separators_escaped(self):
+        """اختبار ترميز فاصلي الأسطر كما في JSONRenderer"""
+        self.assertSameOutput({'content': 'سطر\u2028سطر\u2029'})
+
+    def test_empty_data(self):
+        """اختبار أن None تُعرض كاستجابة فارغة"""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indent_falls_back(self):
+        """اختبار أن طلب المسافات البادئة يستخدم JSONRenderer"""
+        self.assertSameOutput({'a': [1, 2]}, accepted_media_type='application/json; indent=4')
+
+
+@override_settings(COMPRESSION_MIN_BYTES=100, COMPRESSION_BROTLI_QUALITY=5)
+class CompressionMiddlewareTest(SimpleTestCase):
+    """اختبارات ضغط الاستجابات"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.factory = RequestFactory()
+        self.body = ('{"title": "شكوى بخصوص انقطاع المياه"}' * 20).encode()
+
+    def respond(self, response, accept_encoding='gzip, deflate, br'):
+        request = self.factory.get('/api/v1/complaints/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=None, **headers):
+        response = HttpResponse(self.body if body is None else body, content_type='application/json')
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    @mock.patch.object(middleware, 'brotli', None)
+    def test_gzip_above_threshold(self):
+        """اختبار ضغط gzip فوق الحد مع Vary وإضعاف ETag"""
+        response = self.respond(self.json_response(ETag='"abc"'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_brotli_preferred_when_available(self):
+        """اختبار تفضيل brotli عند توفرها"""
+        fake_brotli = mock.Mock(compress=mock.Mock(return_value=b'br'))
+        with mock.patch.object(middleware, 'brotli', fake_brotli):
+            response = self.respond(self.json_response())
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        fake_brotli.compress.assert_called_once_with(self.body, quality=5)
+
+    def test_small_response_not_compressed(self):
+        """اختبار عدم ضغط الاستجابات الأصغر من الحد"""
+        response = self.respond(self.json_response(b'{"ok": true}'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_client_without_encoding(self):
+        """اختبار عدم الضغط لعميل لا يقبله"""
+        response = self.respond(self.json_response(), accept_encoding='identity, gzip;q=0')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_streaming_and_binary_skipped(self):
+        """اختبار تخطي الاستجابات المتدفقة وغير النصية"""
+        streaming = self.respond(StreamingHttpResponse(iter([self.body]), content_type='application/json'))
+        binary = self.respond(HttpResponse(self.body, content_type='application/pdf'))
+
+        self.assertFalse(streaming.has_header('Content-Encoding'))
+        self.assertFalse(binary.has_header('Content-Encoding'))
+
+    def test_html_not_compressed(self):
+        """اختبار عدم ضغط صفحات HTML (رمز CSRF) مهما كان حجمها"""
+        html = b'<input name="csrfmiddlewaretoken" value="secret">' * 50
+        response = self.respond(HttpResponse(html, content_type='text/html; charset=utf-8'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, html)
+
+    def test_accepted_encodings(self):
+        """اختبار تحليل Accept-Encoding"""
+        self.assertEqual(accepted_encodings('gzip;q=0.8, br;q=0, *'), {'gzip', '*'})
@@ -0,0 +1,104 @@
+"""
+اختبارات تنظيف المرفقات القديمة
+"""
+
+import tempfile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from complaints.models import Complaint, ComplaintAttachment
+from complaints.retention import cleanup_attachments, expired_attachments
+from complaints.tasks import cleanup_old_attachments
+
+
+class FailingStorage:
+    """تخزين بعيد وهمي يفشل في حذف ملفات محددة (بدون path)"""
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.deleted = []
+
+    def delete(self, name):
+        if name in self.failing:
+            raise ConnectionError(name)
+        self.deleted.append(name)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), COMPLAINTS_CLEANUP_CHUNK_SIZE=2)
+class CleanupOldAttachmentsTest(TestCase):
+    """اختبارات حذف المرفقات القديمة على دفعات"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.old = self.create_complaint(resolved_days_ago=200, attachments=5)
+        self.recent = self.create_complaint(resolved_days_ago=10, attachments=2)
+
+    def create_complaint(self, resolved_days_ago, attachments):
+        complaint = Complaint.objects.create(
+            title="شكوى محلولة",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+            status='resolved',
+            resolved_at=timezone.now() - timezone.timedelta(days=resolved_days_ago),
+        )
+        for index in range(attachments):
+            ComplaintAttachment.objects.create(
+                complaint=complaint,
+                file=SimpleUploadedFile(f'file{index}.pdf', b'x' * 100),
+                original_name=f'file{index}.pdf',
+                file_size=100
+            )
+        return complaint
+
+    def old_files(self):
+        return list(self.old.attachments.values_list('file', flat=True))
+
+    def test_task_deletes_old_attachments(self):
+        """اختبار حذف المرفقات القديمة وملفاتها فقط مع حساب المساحة المستردة"""
+        files = self.old_files()
+
+        result = cleanup_old_attachments()
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['deleted_count'], 5)
+        self.assertEqual(result['bytes_reclaimed'], 500)
+        self.assertFalse(self.old.attachments.exists())
+        self.assertEqual(self.recent.attachments.count(), 2)
+        self.assertFalse(any(default_storage.exists(name) for name in files))
+
+    def test_dry_run(self):
+        """اختبار التشغيل التجريبي دون حذف"""
+        result = cleanup_old_attachments(dry_run=True)
+
+        self.assertEqual((result['deleted_count'], result['bytes_reclaimed']), (5, 500))
+        self.assertEqual(self.old.attachments.count(), 5)
+        self.assertTrue(all(default_storage.exists(name) for name in self.old_files()))
+
+    def test_max_deletes(self):
+        """اختبار الحد الأقصى للحذف في التشغيل الواحد"""
+        self.assertEqual(cleanup_old_attachments(max_deletes=3)['deleted_count'], 3)
+        self.assertEqual(self.old.attachments.count(), 2)
+
+    def test_one_delete_query_per_chunk(self):
+        """اختبار حذف الصفوف باستعلام DELETE واحد لكل دفعة"""
+        with CaptureQueriesContext(connection) as queries:
+            cleanup_attachments(expired_attachments(), storage=FailingStorage(set()))
+
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+
+    def test_failed_blob_kept(self):
+        """اختبار إبقاء صف المرفق الذي فشل حذف ملفه لمحاولة لاحقة"""
+        failing = self.old_files()[1]
+        storage = FailingStorage({failing})
+
+        result = cleanup_attachments(expired_attachments(), storage=storage)
+
+        self.assertEqual((result['deleted_count'], result['failed_count']), (4, 1))
+        self.assertEqual(self.old_files(), [failing])
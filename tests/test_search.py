@@ -0,0 +1,201 @@
+"""
+اختبارات البحث في الشكاوى
+"""
+
+from io import StringIO
+from unittest import skipUnless
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from complaints.models import Complaint
+from complaints.search import (
+    PostgresSearchBackend, SQLiteFTSBackend, get_search_backend, is_reference_fragment, is_reference_number,
+    normalize_arabic
+)
+
+User = get_user_model()
+
+
+class ArabicNormalizationTest(TestCase):
+    """اختبارات توحيد النص العربي"""
+
+    def test_strip_tashkeel(self):
+        """اختبار حذف التشكيل والتطويل"""
+        self.assertEqual(normalize_arabic('مُشْكِلَةٌ'), 'مشكله')
+        self.assertEqual(normalize_arabic('الكهربـــاء'), 'الكهرباء')
+
+    def test_unify_letters(self):
+        """اختبار توحيد أشكال الألف والياء والتاء المربوطة"""
+        self.assertEqual(normalize_arabic('أحمد إبراهيم آمال'), 'احمد ابراهيم امال')
+        self.assertEqual(normalize_arabic('مستشفى المدينة'), 'مستشفي المدينه')
+
+    def test_reference_number_detection(self):
+        """اختبار التعرف على رقم المرجع"""
+        self.assertTrue(is_reference_number('COMP-20250101-ABCDEF12'))
+        self.assertTrue(is_reference_number('comp-20250101-abcdef12'))
+        self.assertFalse(is_reference_number('مشكلة الصرف'))
+
+    def test_reference_fragment_detection(self):
+        """اختبار التعرف على جزء رقم المرجع"""
+        self.assertTrue(is_reference_fragment('20250101'))
+        self.assertTrue(is_reference_fragment('comp-2025'))
+        self.assertFalse(is_reference_fragment('الطريق'))
+        self.assertFalse(is_reference_fragment('شارع 9'))
+
+
+class ComplaintSearchFilterTest(TestCase):
+    """اختبارات فلتر البحث في قائمة الشكاوى"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.water = self.create_complaint("انقطاع المياه", "لا توجد مياه منذ يومين")
+        self.road = self.create_complaint("حفرة في الطريق", "حفرة كبيرة أمام المدرسة")
+
+    def create_complaint(self, title, content):
+        """إنشاء شكوى للاختبار"""
+        return Complaint.objects.create(
+            title=title,
+            content=content,
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+
+    def search(self, term):
+        response = self.client.get('/api/v1/complaints/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_reference_number_lookup(self):
+        """اختبار البحث برقم المرجع الكامل"""
+        ids = self.search(self.road.reference_number.lower())
+        self.assertEqual(ids, [str(self.road.id)])
+
+    def test_partial_reference_number(self):
+        """اختبار البحث بجزء من رقم المرجع"""
+        Complaint.objects.filter(pk=self.road.pk).update(reference_number='COMP-20250101-1A2B3C4D')
+
+        self.assertEqual(self.search('1a2b3c'), [str(self.road.id)])
+        self.assertEqual(self.search('20250101-1A2B'), [str(self.road.id)])
+
+    def test_text_search(self):
+        """اختبار البحث النصي"""
+        ids = self.search('المياه')
+        self.assertEqual(ids, [str(self.water.id)])
+
+    def test_sqlite_fts_backend_used(self):
+        """اختبار استخدام جدول ظل FTS5 على SQLite"""
+        self.assertIsInstance(get_search_backend(), SQLiteFTSBackend)
+
+    def test_normalized_search(self):
+        """اختبار مطابقة الأشكال المختلفة للحروف والتشكيل"""
+        hospital = self.create_complaint("إغلاق مستشفى المدينة", "المستشفى مغلق")
+
+        self.assertEqual(self.search('مستشفي'), [str(hospital.id)])
+        self.assertEqual(self.search('اغلاق'), [str(hospital.id)])
+        self.assertEqual(self.search('مُسْتَشْفَى المدينه'), [str(hospital.id)])
+
+    def test_short_terms(self):
+        """اختبار الكلمات الأقصر من 3 أحرف"""
+        self.assertEqual(self.search('في'), [str(self.road.id)])
+
+    def test_index_follows_updates_and_deletes(self):
+        """اختبار مزامنة جدول الظل مع التعديل والحذف"""
+        self.water.title = "انقطاع الكهرباء"
+        self.water.save()
+        self.assertEqual(self.search('المياه'), [])
+        self.assertEqual(self.search('الكهرباء'), [str(self.water.id)])
+
+        self.road.delete()
+        self.assertEqual(self.search('حفرة'), [])
+
+    def test_rebuild_search_index(self):
+        """اختبار إعادة بناء الفهرس على دفعات"""
+        backend = get_search_backend()
+        backend.reset('default')
+        self.assertFalse(backend.search(Complaint.objects.all(), 'المياه').exists())
+
+        call_command('rebuild_search_index', chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(list(backend.search(Complaint.objects.all(), 'المياه')), [self.water])
+        self.assertEqual(list(backend.search(Complaint.objects.all(), 'حفرة')), [self.road])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'البحث عبر tsvector متاح في PostgreSQL فقط')
+class PostgresSearchBackendTest(TestCase):
+    """اختبارات البحث النصي عبر tsvector في PostgreSQL"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.backend = PostgresSearchBackend()
+
+    def create_complaint(self, title, content, citizen_name="أحمد محمد"):
+        """إنشاء شكوى للاختبار"""
+        return Complaint.objects.create(
+            title=title,
+            content=content,
+            citizen_id=123,
+            citizen_name=citizen_name,
+            citizen_email="ahmed@example.com",
+        )
+
+    def search(self, term, **params):
+        response = self.client.get('/api/v1/complaints/', {'search': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_postgres_backend_used(self):
+        """اختبار اختيار محرك tsvector على PostgreSQL"""
+        self.assertIsInstance(get_search_backend(), PostgresSearchBackend)
+
+    def test_index_on_save(self):
+        """اختبار فهرسة الشكوى عند الحفظ مع توحيد النص"""
+        hospital = self.create_complaint("إغلاق مستشفى المدينة", "المستشفى مغلق")
+
+        self.assertIsNotNone(Complaint.objects.get(pk=hospital.pk).search_vector)
+        self.assertEqual(self.search('مُسْتَشْفَى'), [str(hospital.id)])
+        self.assertEqual(self.search('اغلاق'), [str(hospital.id)])
+
+    def test_rank_ordering(self):
+        """اختبار ترتيب النتائج بالصلة (العنوان قبل المحتوى) ما لم يُطلب ترتيب صريح"""
+        in_title = self.create_complaint("انقطاع المياه", "منذ يومين")
+        in_content = self.create_complaint("مشكلة في الحي", "انقطاع المياه منذ يومين")
+
+        self.assertEqual(self.search('المياه'), [str(in_title.id), str(in_content.id)])
+        self.assertEqual(
+            self.search('المياه', ordering='-created_at'), [str(in_content.id), str(in_title.id)]
+        )
+
+    def test_rank_cursor(self):
+        """اختبار تصفح نتائج البحث المرتبة بالصلة بالمؤشر"""
+        in_title = self.create_complaint("انقطاع المياه", "منذ يومين")
+        in_content = self.create_complaint("مشكلة في الحي", "انقطاع المياه منذ يومين")
+
+        first = self.client.get('/api/v1/complaints/', {'search': 'المياه', 'page_size': 1})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual([item['id'] for item in first.data['results']], [str(in_title.id)])
+        self.assertEqual([item['id'] for item in second.data['results']], [str(in_content.id)])
+
+    def test_index_many_matches_index(self):
+        """اختبار أن الفهرسة المجمّعة من الأعمدة تطابق فهرسة كل شكوى"""
+        complaints = [
+            self.create_complaint("إغلاق مستشفى المدينة", "المستشفى مُغلق"),
+            self.create_complaint("حفرة في الطريق", "حفرة كبيرة", citizen_name="سلمى"),
+        ]
+        expected = dict(Complaint.objects.values_list('pk', 'search_vector'))
+        Complaint.objects.update(search_vector=None)
+
+        self.backend.index_many(complaints, 'default')
+
+        self.assertEqual(dict(Complaint.objects.values_list('pk', 'search_vector')), expected)
@@ -0,0 +1,88 @@
+"""
+اختبارات محرك إحصائيات الشكاوى
+"""
+
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from complaints.models import Complaint, ComplaintCategory
+from complaints.stats import compute_complaint_stats
+
+User = get_user_model()
+
+
+class ComplaintStatsTest(TestCase):
+    """اختبارات حساب الإحصائيات وتخزينها مؤقتاً"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        self.admin_user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+        self.category = ComplaintCategory.objects.create(name="خدمات عامة")
+
+        self.create_complaint(status='pending', priority='high', category=self.category)
+        self.create_complaint(status='pending', priority='low')
+        self.create_complaint(status='resolved', priority='high', category=self.category)
+        self.create_complaint(
+            status='on_hold', priority='urgent',
+            hold_until=timezone.now() - timedelta(days=1)
+        )
+
+    def create_complaint(self, **kwargs):
+        """إنشاء شكوى للاختبار"""
+        return Complaint.objects.create(
+            title="شكوى اختبار",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+            **kwargs
+        )
+
+    def test_compute_stats_single_query(self):
+        """اختبار حساب جميع العدادات في استعلام واحد"""
+        with CaptureQueriesContext(connection) as queries:
+            stats = compute_complaint_stats(Complaint.objects.all())
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(stats['total_complaints'], 4)
+        self.assertEqual(stats['pending_complaints'], 2)
+        self.assertEqual(stats['resolved_complaints'], 1)
+        self.assertEqual(stats['overdue_complaints'], 1)
+        self.assertEqual(stats['complaints_by_status']['on_hold'], 1)
+        self.assertEqual(stats['complaints_by_priority'], {'high': 2, 'low': 1, 'urgent': 1})
+        self.assertEqual(stats['complaints_by_category'], {"خدمات عامة": 2, None: 2})
+
+    def test_stats_endpoint_cached(self):
+        """اختبار تخزين الإحصائيات مؤقتاً لكل نطاق"""
+        first = self.client.get('/api/v1/complaints/stats/')
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.data['cached'])
+        self.assertEqual(first.data['total_complaints'], 4)
+        self.assertEqual(len(first.data['recent_complaints']), 4)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get('/api/v1/complaints/stats/')
+
+        self.assertTrue(second.data['cached'])
+        self.assertGreaterEqual(second.data['cache_age_seconds'], 0)
+        self.assertEqual(len(queries), 0)
+
+    def test_stats_invalidated_on_write(self):
+        """اختبار إبطال الإحصائيات المخزنة عند تعديل الشكاوى"""
+        self.client.get('/api/v1/complaints/stats/')
+        self.create_complaint(status='pending')
+
+        response = self.client.get('/api/v1/complaints/stats/')
+        self.assertFalse(response.data['cached'])
+        self.assertEqual(response.data['total_complaints'], 5)
+        self.assertEqual(response.data['pending_complaints'], 3)
@@ -0,0 +1,219 @@
+"""
+اختبارات انتقالات حالة الشكوى
+"""
+
+import uuid
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from complaints.models import Complaint, ComplaintHistory
+from complaints.stats import diff_counter_buckets
+from complaints.transitions import transition_complaint
+
+User = get_user_model()
+
+
+class BulkTransitionTest(TestCase):
+    """اختبارات تطبيق الانتقالات على عدة شكاوى"""
+
+    URL = '/api/v1/complaints/bulk-transition/'
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_complaints(self, count, **kwargs):
+        """إنشاء شكاوى للاختبار"""
+        return [
+            Complaint.objects.create(
+                title=f"شكوى {index}",
+                content="محتوى الشكوى",
+                citizen_id=123,
+                citizen_name="أحمد محمد",
+                citizen_email="ahmed@example.com",
+                **kwargs
+            ).id
+            for index in range(count)
+        ]
+
+    def post(self, ids, transition, **extra):
+        return self.client.post(self.URL, {
+            'ids': [str(complaint_id) for complaint_id in ids],
+            'transition': transition,
+            **extra
+        }, format='json')
+
+    def assign(self, ids, representative_id=7):
+        return self.post(
+            ids, 'assign',
+            representative_id=representative_id,
+            representative_name='النائب',
+            notes='عاجل'
+        )
+
+    def test_bulk_assign(self):
+        """اختبار الإسناد المجمّع مع السجل والعدادات"""
+        ids = self.create_complaints(5)
+
+        response = self.assign(ids)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 5)
+        self.assertEqual(
+            Complaint.objects.filter(status='assigned', assigned_representative_id=7).count(), 5
+        )
+        history = ComplaintHistory.objects.filter(action='assigned')
+        self.assertEqual(history.count(), 5)
+        self.assertEqual(history.first().additional_data, {'notes': 'عاجل'})
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_query_count_independent_of_size(self):
+        """اختبار أن عدد الاستعلامات لا يعتمد على عدد الشكاوى (الأول ينشئ خانة العداد الجديدة)"""
+        small = self.create_complaints(3)
+        large = self.create_complaints(40)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.assign(small)
+        with CaptureQueriesContext(connection) as large_queries:
+            self.assign(large)
+
+        self.assertLessEqual(len(large_queries), len(small_queries))
+        self.assertLessEqual(len(small_queries), 11)
+
+    def test_per_id_results(self):
+        """اختبار نتيجة كل معرف: محدثة، غير موجودة، حالة غير مسموحة"""
+        pending, resolved = self.create_complaints(1) + self.create_complaints(1, status='resolved')
+        missing = uuid.uuid4()
+
+        response = self.post([pending, resolved, missing], 'hold', reason='للدراسة')
+
+        self.assertEqual(response.data['results'], {
+            str(pending): 'invalid_status',
+            str(resolved): 'invalid_status',
+            str(missing): 'not_found',
+        })
+
+        self.assign([pending])
+        response = self.post([pending], 'close')
+        self.assertEqual(response.data['results'], {str(pending): 'updated'})
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_representative_only_transitions(self):
+        """اختبار أن القبول مسموح فقط للنائب المُسند"""
+        mine = self.create_complaints(2)
+        others = self.create_complaints(1)
+        self.assign(mine, representative_id=self.user.id)
+        self.assign(others, representative_id=self.user.id + 100)
+
+        response = self.post(mine + others, 'accept')
+
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['results'][str(others[0])], 'forbidden')
+        self.assertEqual(Complaint.objects.filter(status='accepted').count(), 2)
+
+    def test_assign_requires_representative(self):
+        """اختبار رفض الإسناد بدون بيانات النائب"""
+        ids = self.create_complaints(1)
+
+        response = self.post(ids, 'assign')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('representative_id', response.data)
+
+
+class CompareAndSwapTransitionTest(TestCase):
+    """اختبارات التحديث الشرطي لشكوى واحدة"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        self.user = User.objects.create_user(username="rep1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.complaint = Complaint.objects.create(
+            title="شكوى اختبار",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+        transition_complaint(self.complaint, 'assign', self.user, {
+            'representative_id': self.user.id,
+            'representative_name': 'النائب',
+        })
+
+    def url(self, action=''):
+        return f'/api/v1/complaints/{self.complaint.id}/{action}'
+
+    def test_stale_instance_conflicts(self):
+        """اختبار أن التحديث من نسخة قديمة يفشل بدلاً من استبدال التغيير الأحدث"""
+        stale = Complaint.objects.get(pk=self.complaint.pk)
+
+        self.assertEqual(transition_complaint(self.complaint, 'accept', self.user), 'updated')
+        self.assertEqual(transition_complaint(stale, 'hold', self.user, {'reason': 'دراسة'}), 'conflict')
+
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.status, 'accepted')
+        self.assertFalse(ComplaintHistory.objects.filter(action='on_hold').exists())
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_only_changed_columns_written(self):
+        """اختبار أن الإجراء يكتب الأعمدة المتغيرة فقط مع السجل"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url('accept/'))
+
+        self.assertEqual(response.status_code, 200)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "complaints_complaint"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"content"', updates[0])
+        self.assertNotIn('"title"', updates[0])
+        self.assertTrue(ComplaintHistory.objects.filter(action='accepted').exists())
+
+    def test_action_errors(self):
+        """اختبار رفض الإجراء لغير النائب المُسند أو من حالة غير مسموحة"""
+        other = User.objects.create_user(username="rep2", password="pass12345")
+        client = APIClient()
+        client.force_authenticate(user=other)
+
+        self.assertEqual(client.post(self.url('accept/')).status_code, 403)
+
+        self.client.post(self.url('reject/'), {'reason': 'خارج الاختصاص'})
+        response = self.client.post(self.url('hold/'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_resolve_awards_points_once(self):
+        """اختبار الحل مع منح النقاط"""
+        response = self.client.post(self.url('respond/'), {
+            'response_type': 'representative',
+            'response_text': 'تم التواصل مع الجهة المختصة',
+            'resolution': 'تم إصلاح العطل',
+            'award_points': True,
+            'thank_you_message': 'شكراً',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.status, 'resolved')
+        self.assertTrue(self.complaint.points_awarded)
+        self.assertIsNotNone(self.complaint.resolved_at)
+        self.assertEqual(self.complaint.representative_response, 'تم التواصل مع الجهة المختصة')
+        self.assertEqual(diff_counter_buckets(), {})
+
+    def test_update_serializer_uses_transitions(self):
+        """اختبار أن التعديل المباشر يلتزم بجدول الانتقالات ويسجل تغيير الحالة"""
+        response = self.client.patch(self.url(), {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.patch(self.url(), {'status': 'accepted', 'priority': 'high'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.complaint.refresh_from_db()
+        self.assertEqual((self.complaint.status, self.complaint.priority), ('accepted', 'high'))
+        history = ComplaintHistory.objects.get(action='accepted')
+        self.assertIn('مُوجهة لنائب', history.description)
+        self.assertEqual(diff_counter_buckets(), {})
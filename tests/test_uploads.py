@@ -0,0 +1,193 @@
+"""
+اختبارات رفع المرفقات المباشر (جلسات الرفع والبديل المحلي للتخزين)
+"""
+
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from complaints.models import AttachmentUploadSession, Complaint, ComplaintAttachment, ComplaintHistory
+from complaints.uploads import GCSUploadBackend, expire_upload_sessions
+
+User = get_user_model()
+
+PDF = b'%PDF-1.4 test'
+PNG = b'\x89PNG\r\n\x1a\n test'
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    COMPLAINTS_UPLOAD_BACKEND='complaints.uploads.LocalUploadBackend',
+    MAX_ATTACHMENTS_PER_COMPLAINT=3,
+)
+class UploadSessionTest(TestCase):
+    """اختبارات جلسة الرفع من البدء حتى الإنهاء"""
+
+    def setUp(self):
+        """إعداد البيانات للاختبارات"""
+        cache.clear()
+        self.user = User.objects.create_user(username="admin1", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.complaint = Complaint.objects.create(
+            title="شكوى بمرفقات",
+            content="محتوى الشكوى",
+            citizen_id=123,
+            citizen_name="أحمد محمد",
+            citizen_email="ahmed@example.com",
+        )
+        self.files = [
+            {'name': 'تقرير.pdf', 'size': len(PDF), 'content_type': 'application/pdf', 'description': 'التقرير'},
+            {'name': 'صورة.png', 'size': len(PNG), 'content_type': 'image/png'},
+        ]
+
+    def start_session(self, files=None):
+        return self.client.post(
+            f'/api/v1/complaints/{self.complaint.id}/upload-sessions/',
+            {'files': self.files if files is None else files},
+            format='json',
+        )
+
+    def upload(self, file, content):
+        upload = file['upload']
+        return APIClient().generic(
+            upload['method'], upload['url'], content, content_type=upload['headers']['Content-Type']
+        )
+
+    def finalize(self, session_id):
+        return self.client.post(f'/api/v1/upload-sessions/{session_id}/finalize/')
+
+    def test_upload_and_finalize(self):
+        """اختبار الرفع المباشر ثم إنشاء المرفقات عند الإنهاء"""
+        session = self.start_session()
+        self.assertEqual(session.status_code, 201)
+        self.assertNotIn('path', session.data['files'][0])
+
+        for file, content in zip(session.data['files'], (PDF, PNG)):
+            self.assertEqual(self.upload(file, content).status_code, 201)
+
+        response = self.finalize(session.data['id'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'finalized')
+        self.assertEqual(
+            [item['original_name'] for item in response.data['attachments']], ['تقرير.pdf', 'صورة.png']
+        )
+        attachment = ComplaintAttachment.objects.get(original_name='تقرير.pdf')
+        self.assertEqual((attachment.file_type, attachment.file_size, attachment.description), ('pdf', len(PDF), 'التقرير'))
+        with default_storage.open(attachment.file.name) as stored:
+            self.assertEqual(stored.read(), PDF)
+        self.assertTrue(ComplaintHistory.objects.filter(complaint=self.complaint, action='attachment_added').exists())
+
+    def test_finalize_is_idempotent(self):
+        """اختبار أن تكرار الإنهاء لا يكرر المرفقات"""
+        session = self.start_session(self.files[:1])
+        self.upload(session.data['files'][0], PDF)
+
+        first = self.finalize(session.data['id'])
+        second = self.finalize(session.data['id'])
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['attachments'], first.data['attachments'])
+        self.assertEqual(ComplaintAttachment.objects.count(), 1)
+
+    def test_finalize_requires_uploaded_files(self):
+        """اختبار رفض الإنهاء قبل رفع كل الملفات"""
+        session = self.start_session()
+        self.upload(session.data['files'][0], PDF)
+
+        response = self.finalize(session.data['id'])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['files']), ['صورة.png'])
+        self.assertFalse(ComplaintAttachment.objects.exists())
+
+    def test_local_upload_checks_size_type_and_signature(self):
+        """اختبار رفض الرفع بحجم أو نوع مختلف أو رابط معدّل"""
+        file = self.start_session().data['files'][0]
+
+        self.assertEqual(self.upload(file, PDF + b'extra').status_code, 400)
+        wrong_type = APIClient().put(file['upload']['url'], PDF, content_type='image/png')
+        self.assertEqual(wrong_type.status_code, 400)
+        tampered = APIClient().put(file['upload']['url'].replace('/local/', '/local/x'), PDF, content_type='application/pdf')
+        self.assertEqual(tampered.status_code, 403)
+
+    def test_session_validation(self):
+        """اختبار رفض الامتدادات غير المدعومة والملفات الكبيرة وتجاوز حد المرفقات"""
+        bad_extension = self.start_session([{'name': 'script.exe', 'size': 10, 'content_type': 'application/pdf'}])
+        too_large = self.start_session([{'name': 'big.pdf', 'size': 50 * 1024 * 1024, 'content_type': 'application/pdf'}])
+        too_many = self.start_session(self.files * 2)
+
+        self.assertEqual(bad_extension.status_code, 400)
+        self.assertEqual(too_large.status_code, 400)
+        self.assertEqual(too_many.status_code, 400)
+        self.assertFalse(AttachmentUploadSession.objects.exists())
+
+    def test_limit_rechecked_on_finalize(self):
+        """اختبار أن الإنهاء يعيد فحص حد المرفقات (جلسات متزامنة)"""
+        first = self.start_session()
+        second = self.start_session(self.files[:1])
+        for file, content in zip(first.data['files'], (PDF, PNG)):
+            self.upload(file, content)
+        self.upload(second.data['files'][0], PDF)
+        self.finalize(first.data['id'])
+
+        ComplaintAttachment.objects.create(
+            complaint=self.complaint, file='complaints/existing.pdf', original_name='existing.pdf', file_size=1
+        )
+        response = self.finalize(second.data['id'])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ComplaintAttachment.objects.count(), 3)
+
+    def test_expired_session(self):
+        """اختبار رفض إنهاء جلسة منتهية وحذف ملفاتها المتروكة"""
+        session = self.start_session(self.files[:1])
+        self.upload(session.data['files'][0], PDF)
+        path = AttachmentUploadSession.objects.get().files[0]['path']
+        AttachmentUploadSession.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(self.finalize(session.data['id']).status_code, 409)
+        self.assertEqual(expire_upload_sessions(), 1)
+        self.assertEqual(AttachmentUploadSession.objects.get().status, 'expired')
+        self.assertFalse(default_storage.exists(path))
+
+    def test_sessions_are_private(self):
+        """اختبار أن المستخدم لا يصل لجلسات غيره"""
+        session = self.start_session()
+        other = APIClient()
+        other.force_authenticate(user=User.objects.create_user(username="other", password="pass12345"))
+
+        self.assertEqual(other.get(f'/api/v1/upload-sessions/{session.data["id"]}/').status_code, 404)
+        self.assertEqual(other.post(f'/api/v1/upload-sessions/{session.data["id"]}/finalize/').status_code, 404)
+
+
+class GCSUploadBackendTest(TestCase):
+    """اختبارات هدف الرفع القابل للاستئناف في GCS"""
+
+    def test_signed_resumable_target(self):
+        """اختبار رابط موقع لبدء رفع قابل للاستئناف بحد للحجم"""
+        backend = GCSUploadBackend.__new__(GCSUploadBackend)
+        backend.bucket = mock.Mock()
+        backend.bucket.blob.return_value.generate_signed_url.return_value = 'https://storage.example/signed'
+        expires_at = timezone.now() + timedelta(hours=1)
+
+        target = backend.create_target('complaints/1/attachments/a.pdf', 'application/pdf', 100, expires_at)
+
+        self.assertEqual((target['method'], target['url'], target['resumable']), ('POST', 'https://storage.example/signed', True))
+        self.assertEqual(target['headers']['x-goog-resumable'], 'start')
+        backend.bucket.blob.assert_called_once_with('complaints/1/attachments/a.pdf')
+        backend.bucket.blob.return_value.generate_signed_url.assert_called_once_with(
+            version='v4',
+            expiration=expires_at,
+            method='POST',
+            content_type='application/pdf',
+            headers={'x-goog-resumable': 'start', 'x-goog-content-length-range': '0,100'},
+        )